@@ -0,0 +1,364 @@
+"""
+Modulo per il ritaglio dei contorni con rette parallele agli assi.
+Tutti i tagli del progetto sono orizzontali o verticali: gli anelli
+di un glifo vengono ritagliati insieme, lavorando direttamente sul buffer
+di coordinate di GlyphOutline con operazioni vettoriali NumPy
+(Sutherland-Hodgman generalizzato a più rette parallele in un'unica
+passata). Gli archi di ogni fascia vengono poi ricomposti lungo le linee
+di taglio, quindi i pezzi di un poligono valido restano anelli validi
+e Shapely serve solo per l'assemblaggio finale.
+Una griglia viene tagliata in modo gerarchico: prima le fasce orizzontali,
+poi ogni fascia nelle sue colonne, lavorando solo sui pezzi già interni
+alla fascia. Ogni anello porta l'indice del gruppo (font, fascia, cella)
+a cui appartiene, così più glifi vengono tagliati in blocco.
+"""
+
+import numpy as np
+
+from glyph_outline import GlyphOutline
+
+
+def _open_rings(outline):
+    """Coordinate e offset degli anelli senza il punto di chiusura ripetuto"""
+    coords = outline.coords
+    offsets = outline.offsets
+    lengths = np.diff(offsets)
+    nonempty = lengths > 1
+    closing = np.zeros(len(coords), dtype=bool)
+    last = offsets[1:][nonempty] - 1
+    first = offsets[:-1][nonempty]
+    closing[last[np.all(coords[last] == coords[first], axis=1)]] = True
+    if not closing.any():
+        return coords, offsets
+    removed = np.concatenate([[0], np.cumsum(closing)])
+    return coords[~closing], offsets - removed[offsets]
+
+
+def _close_rings(coords, offsets):
+    """Costruisce un GlyphOutline chiudendo ogni anello sul primo punto"""
+    if len(offsets) < 2:
+        return GlyphOutline()
+    closed = np.insert(coords, offsets[1:], coords[offsets[:-1]], axis=0)
+    return GlyphOutline(closed, offsets + np.arange(len(offsets)))
+
+
+def _select_rings(coords, offsets, indices):
+    """Anelli scelti da un array di indici, nell'ordine dato"""
+    lengths = np.diff(offsets)[indices]
+    new_offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+    new_offsets[1:] = np.cumsum(lengths)
+    gather = np.repeat(offsets[:-1][indices] - new_offsets[:-1], lengths) + np.arange(new_offsets[-1])
+    return coords[gather], new_offsets
+
+
+def _drop_short_rings(coords, offsets, min_points=3):
+    """
+    Elimina i punti consecutivi coincidenti e gli anelli con meno di min_points punti.
+
+    Returns:
+        Tuple (coords, offsets, keep) con keep maschera degli anelli mantenuti
+    """
+    ring_ids = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    duplicate = np.zeros(len(coords), dtype=bool)
+    duplicate[1:] = np.all(coords[1:] == coords[:-1], axis=1) & (ring_ids[1:] == ring_ids[:-1])
+    coords = coords[~duplicate]
+    ring_ids = ring_ids[~duplicate]
+    lengths = np.bincount(ring_ids, minlength=len(offsets) - 1)
+    keep = lengths >= min_points
+    new_offsets = np.zeros(int(keep.sum()) + 1, dtype=np.int64)
+    new_offsets[1:] = np.cumsum(lengths[keep])
+    return coords[keep[ring_ids]], new_offsets, keep
+
+
+def _stitch_arcs(points, starts, ends, ring_starts, ring_lengths, exit_keys, entry_keys,
+                 exit_directions, entry_directions, along):
+    """
+    Ricompone gli archi di una fascia in anelli chiusi.
+    Ogni arco entra nella fascia in starts ed esce in ends; lungo la retta
+    di taglio l'interno del poligono va, da ogni uscita, nel verso indicato
+    fino al punto di entrata successivo con la stessa chiave (gruppo,
+    fascia e retta), che è l'inizio dell'arco seguente.
+
+    Args:
+        points: Array (N, 2) dei punti emessi dal taglio
+        starts, ends: Indice del punto di entrata e di uscita di ogni arco
+        ring_starts, ring_lengths: Anello (ciclico) di punti a cui appartiene ogni arco
+        exit_keys, entry_keys: Chiave della retta di uscita e di entrata di ogni arco
+        exit_directions, entry_directions: +1 o -1, verso dell'interno lungo la retta
+        along: Asse delle rette di taglio (1 - axis)
+
+    Returns:
+        Tuple (coords, offsets, first_arcs) degli anelli aperti, con il primo
+        arco di ogni anello, oppure None se gli attraversamenti non si alternano
+    """
+    count = len(starts)
+    position = np.concatenate([
+        points[ends, along] * exit_directions,
+        points[starts, along] * entry_directions,
+    ])
+    keys = np.concatenate([exit_keys, entry_keys])
+    kind = np.repeat([0, 1], count)
+    order = np.lexsort((kind, position, keys))
+
+    # Punti coincidenti (contorni che si toccano sulla retta): all'interno
+    # di ogni gruppo di pari posizione si alternano uscite ed entrate
+    # a partire da quella attesa nel primo posto del gruppo
+    sorted_keys, sorted_position = keys[order], position[order]
+    new_group = np.ones(len(order), dtype=bool)
+    new_group[1:] = (sorted_keys[1:] != sorted_keys[:-1]) | (sorted_position[1:] != sorted_position[:-1])
+    group_start = np.maximum.accumulate(np.where(new_group, np.arange(len(order)), 0))
+    parity = np.empty(len(order), dtype=np.int64)
+    parity[order] = group_start % 2
+    order = np.lexsort((kind ^ parity, position, keys))
+
+    if not np.array_equal(kind[order], np.tile([0, 1], count)):
+        return None
+    first, second = order[0::2], order[1::2]
+    if not np.array_equal(keys[first], keys[second]):
+        return None
+
+    next_arc = np.empty(count, dtype=np.int64)
+    next_arc[first] = second - count
+
+    # Cicli della permutazione next_arc: ogni ciclo è un anello
+    visited = np.zeros(count, dtype=bool)
+    arc_order = []
+    ring_sizes = []
+    for start in range(count):
+        if visited[start]:
+            continue
+        size = 0
+        arc = start
+        while not visited[arc]:
+            visited[arc] = True
+            arc_order.append(arc)
+            arc = next_arc[arc]
+            size += 1
+        ring_sizes.append(size)
+
+    arc_order = np.asarray(arc_order, dtype=np.int64)
+    lengths = ((ends - starts) % ring_lengths + 1)[arc_order]
+    arc_offsets = np.cumsum(lengths) - lengths
+    local = np.arange(lengths.sum()) - np.repeat(arc_offsets, lengths)
+    base = np.repeat(ring_starts[arc_order], lengths)
+    gather = base + (np.repeat(starts[arc_order], lengths) - base + local) % np.repeat(ring_lengths[arc_order], lengths)
+
+    ring_ends = np.cumsum(ring_sizes)
+    offsets = np.concatenate([[0], (arc_offsets + lengths)[ring_ends - 1]]).astype(np.int64)
+    first_arcs = arc_order[ring_ends - np.asarray(ring_sizes)]
+    return points[gather], offsets, first_arcs
+
+
+def _split_rings(coords, offsets, groups, axis, lines):
+    """
+    Divide anelli aperti in fasce con più rette parallele, in un'unica passata.
+    Con K rette ci sono K + 1 fasce; un punto sulla retta j appartiene
+    alla fascia j + 1. Ogni lato produce un'intersezione per ogni retta
+    che attraversa, quindi il lavoro cresce con i punti e gli attraversamenti,
+    non con il numero di fasce.
+
+    Args:
+        coords, offsets: Anelli aperti (senza punto di chiusura), esterni
+            antiorari e buchi orari
+        groups: Gruppo di ogni anello
+        axis: 0 per rette verticali, 1 per orizzontali
+        lines: Array ordinato delle coordinate delle rette
+
+    Returns:
+        Tuple (coords, offsets, groups) con groups = gruppo * (K + 1) + fascia
+    """
+    bands_count = len(lines) + 1
+    lengths = np.diff(offsets)
+    ring_ids = np.repeat(np.arange(len(lengths)), lengths)
+    band = np.searchsorted(lines, coords[:, axis], side="right")
+
+    # Indice del punto successivo nello stesso anello
+    following = np.arange(1, len(coords) + 1)
+    following[offsets[1:] - 1] = offsets[:-1]
+    steps = band[following] - band
+
+    # Anelli interamente dentro una fascia
+    crossed = np.bincount(ring_ids[steps != 0], minlength=len(lengths)) > 0
+    whole = np.nonzero(~crossed)[0]
+    kept_coords, kept_offsets = _select_rings(coords, offsets, whole)
+    kept_groups = groups[whole] * bands_count + band[offsets[:-1][whole]]
+    if len(whole) == len(lengths):
+        return kept_coords, kept_offsets, kept_groups
+
+    crossed = np.nonzero(crossed)[0]
+    coords, offsets = _select_rings(coords, offsets, crossed)
+    groups = groups[crossed]
+    lengths = np.diff(offsets)
+    ring_ids = np.repeat(np.arange(len(lengths)), lengths)
+    band = np.searchsorted(lines, coords[:, axis], side="right")
+    following = np.arange(1, len(coords) + 1)
+    following[offsets[1:] - 1] = offsets[:-1]
+    steps = band[following] - band
+
+    # Ogni lato produce le intersezioni con le rette che attraversa,
+    # poi il suo punto finale
+    crossings = np.abs(steps)
+    counts = crossings + 1
+    starts = np.cumsum(counts) - counts
+    result = np.empty((int(counts.sum()), 2), dtype=np.float64)
+    result[starts + crossings] = coords[following]
+
+    edges = np.repeat(np.arange(len(coords)), crossings)
+    local = np.arange(len(edges)) - np.repeat(np.cumsum(crossings) - crossings, crossings)
+    upward = steps[edges] > 0
+    line = np.where(upward, band[edges] + local, band[edges] - 1 - local)
+    value = lines[line]
+    p = coords[edges]
+    q = coords[following[edges]]
+    t = (value - p[:, axis]) / (q[:, axis] - p[:, axis])
+    intersections = p + t[:, None] * (q - p)
+    intersections[:, axis] = value
+    position = starts[edges] + local
+    result[position] = intersections
+
+    new_lengths = np.bincount(ring_ids, weights=counts, minlength=len(lengths)).astype(np.int64)
+    new_offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    new_offsets[1:] = np.cumsum(new_lengths)
+
+    # Archi: da ogni intersezione alla successiva dello stesso anello,
+    # nella fascia in cui entra il lato
+    arc_ring = ring_ids[edges]
+    successor = np.arange(1, len(edges) + 1)
+    ring_last = np.nonzero(np.append(arc_ring[1:] != arc_ring[:-1], True))[0]
+    ring_first = np.concatenate([[0], ring_last[:-1] + 1])
+    successor[ring_last] = ring_first
+    arc_start = position
+    arc_end = position[successor]
+    arc_band = np.where(upward, line + 1, line)
+    start_line = line
+    end_line = line[successor]
+
+    # Archi che restano sulla retta inferiore della fascia (un punto
+    # che la tocca da sotto, o un lato che giace sulla retta): non
+    # racchiudono area e vengono scartati
+    point_ring = np.repeat(np.arange(len(lengths)), new_lengths)
+    first_of_ring = np.empty(len(lengths), dtype=np.int64)
+    first_of_ring[arc_ring[ring_first]] = ring_first
+    last_of_ring = np.empty(len(lengths), dtype=np.int64)
+    last_of_ring[arc_ring[ring_last]] = ring_last
+    is_crossing = np.zeros(len(result), dtype=bool)
+    is_crossing[position] = True
+    arc_of_point = np.cumsum(is_crossing) - 1
+    wrapped = arc_of_point < first_of_ring[point_ring]
+    arc_of_point[wrapped] = last_of_ring[point_ring[wrapped]]
+    off_line = result[:, axis] != lines[line[arc_of_point]]
+    off_count = np.bincount(arc_of_point, weights=off_line, minlength=len(edges))
+    degenerate = (start_line == end_line) & (start_line == arc_band - 1) & (off_count == 0)
+    keep = ~degenerate
+    arc_start, arc_end, arc_ring = arc_start[keep], arc_end[keep], arc_ring[keep]
+    arc_band, start_line, end_line = arc_band[keep], start_line[keep], end_line[keep]
+    if len(arc_start) == 0:
+        return kept_coords, kept_offsets, kept_groups
+
+    # Verso dell'interno lungo la retta: dipende dal lato della fascia
+    sign = 1 if axis == 1 else -1
+    exit_directions = np.where(end_line == arc_band - 1, sign, -sign)
+    entry_directions = np.where(start_line == arc_band - 1, sign, -sign)
+    arc_groups = groups[arc_ring] * bands_count + arc_band
+    stitched = _stitch_arcs(
+        result, arc_start, arc_end, new_offsets[arc_ring], new_lengths[arc_ring],
+        arc_groups * len(lines) + end_line, arc_groups * len(lines) + start_line,
+        exit_directions, entry_directions, 1 - axis
+    )
+    if stitched is None:
+        raise ValueError("Attraversamenti non alternati: contorni non validi")
+
+    pieces, pieces_offsets, first_arcs = stitched
+    pieces, pieces_offsets, keep = _drop_short_rings(pieces, pieces_offsets)
+    return (
+        np.concatenate([kept_coords, pieces]),
+        np.concatenate([kept_offsets, pieces_offsets[1:] + kept_offsets[-1]]),
+        np.concatenate([kept_groups, arc_groups[first_arcs][keep]]),
+    )
+
+
+def _concatenate_rings(parts):
+    """Unisce più tuple (coords, offsets, groups) di anelli aperti"""
+    coords = np.concatenate([p[0] for p in parts])
+    starts = np.cumsum([0] + [len(p[0]) for p in parts[:-1]])
+    offsets = np.concatenate([[0]] + [p[1][1:] + s for p, s in zip(parts, starts)]).astype(np.int64)
+    groups = np.concatenate([p[2] for p in parts])
+    return coords, offsets, groups
+
+
+def slice_grid(outlines, x_edges, y_edges, assignment):
+    """
+    Taglia i glifi di più font in una griglia e tiene, per ogni cella,
+    il pezzo del font assegnato. Prima ogni glifo viene diviso nelle fasce
+    orizzontali (solo quelle in cui il font compare), poi ogni fascia nelle
+    sue colonne: ogni passo lavora solo sui pezzi interni alla fascia.
+    I contorni devono avere i bordi esterni antiorari e i buchi orari,
+    come quelli di GlyphOutline.from_shapely.
+
+    Args:
+        outlines: Lista di GlyphOutline, uno per font
+        x_edges: Array ordinato dei limiti delle colonne (cols + 1 valori)
+        y_edges: Array ordinato dei limiti delle righe (rows + 1 valori)
+        assignment: Array (rows, cols) con l'indice del font di ogni cella
+
+    Returns:
+        Lista di rows * cols GlyphOutline, cella per cella riga dopo riga
+    """
+    x_edges = np.asarray(x_edges, dtype=np.float64)
+    y_edges = np.asarray(y_edges, dtype=np.float64)
+    assignment = np.asarray(assignment, dtype=np.int64)
+    rows, cols = assignment.shape
+    count = len(outlines)
+
+    parts = []
+    for i, outline in enumerate(outlines):
+        if outline is None or not len(outline):
+            continue
+        coords, offsets = _open_rings(outline)
+        parts.append((coords, offsets, np.full(len(offsets) - 1, i, dtype=np.int64)))
+    if not parts:
+        return [GlyphOutline() for _ in range(rows * cols)]
+    coords, offsets, groups = _concatenate_rings(parts)
+
+    # Fasce orizzontali: la fascia 0 e l'ultima sono fuori dalla griglia
+    coords, offsets, groups = _split_rings(coords, offsets, groups, 1, y_edges)
+    font, row = groups // (rows + 2), groups % (rows + 2) - 1
+    needed = np.zeros((count, rows), dtype=bool)
+    for r in range(rows):
+        fonts = assignment[r][(assignment[r] >= 0) & (assignment[r] < count)]
+        needed[fonts, r] = True
+    inside = (row >= 0) & (row < rows)
+    inside[inside] = needed[font[inside], row[inside]]
+    keep = np.nonzero(inside)[0]
+    coords, offsets = _select_rings(coords, offsets, keep)
+    groups = font[keep] * rows + row[keep]
+
+    # Colonne di ogni fascia
+    if len(keep):
+        coords, offsets, groups = _split_rings(coords, offsets, groups, 0, x_edges)
+        strip, col = groups // (cols + 2), groups % (cols + 2) - 1
+        font, row = strip // rows, strip % rows
+        inside = (col >= 0) & (col < cols)
+        inside[inside] = assignment[row[inside], col[inside]] == font[inside]
+        keep = np.nonzero(inside)[0]
+        coords, offsets = _select_rings(coords, offsets, keep)
+        groups = row[keep] * cols + col[keep]
+
+    # Anelli ordinati per cella
+    order = np.argsort(groups, kind="stable")
+    coords, offsets = _select_rings(coords, offsets, order)
+    bounds = np.searchsorted(groups[order], np.arange(rows * cols + 1))
+    return [
+        _close_rings(coords[offsets[a]:offsets[b]], offsets[a:b + 1] - offsets[a])
+        for a, b in zip(bounds[:-1], bounds[1:])
+    ]
+
+
+def clip_to_box(outline, x0, y0, x1, y1):
+    """
+    Ritaglia gli anelli di un glifo con un rettangolo.
+
+    Returns:
+        GlyphOutline con gli anelli interni al rettangolo
+    """
+    return slice_grid([outline], [x0, x1], [y0, y1], [[0]])[0]
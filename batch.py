@@ -0,0 +1,316 @@
+"""
+Modulo per la generazione in batch da riga di comando.
+Un manifest JSON o TOML descrive i lavori (font, metodo e punti di taglio,
+seme, caratteri, file di uscita); i lavori vengono eseguiti da un gruppo
+di processi e l'esito di ognuno finisce in un riepilogo JSON.
+I lavori con gli stessi font sorgente vengono eseguiti nello stesso processo,
+che apre e legge ogni font una sola volta.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from font_mixer import mix_fonts, DEFAULT_CHARSET
+from font_session import SourcePool
+from outline_cache import OutlineCache
+from piece_cache import PieceCache
+from result_cache import ResultCache
+from bezier_utils import DEFAULT_FLATTEN_TOLERANCE
+
+# Parametri accettati da un lavoro del manifest
+JOB_KEYS = {
+    "name", "fonts", "cut_method", "h_cuts", "v_cuts", "use_vertical_cuts", "normalize",
+    "font_name", "charset", "preserve_curves", "fit_error", "clip_backend",
+    "flatten_tolerance", "seed", "output",
+}
+
+# Nomi inglesi accettati per i metodi di taglio
+CUT_METHOD_ALIASES = {"random": "casuale", "equal": "equidistante", "custom": "personalizzato"}
+
+# Font sorgente, pezzi ritagliati e font già generati del processo, condivisi da tutti i suoi lavori
+_source_pools = {}
+_piece_cache = None
+_result_cache = None
+
+
+def load_manifest(manifest_path):
+    """
+    Legge un manifest di lavori.
+
+    Il manifest contiene una lista "jobs" e, facoltativamente, una sezione
+    "defaults" con i valori comuni a tutti i lavori. I percorsi relativi
+    sono risolti rispetto alla cartella del manifest.
+
+    Args:
+        manifest_path: Percorso del file .json o .toml
+
+    Returns:
+        Lista di dizionari, uno per lavoro, con tutti i parametri
+
+    Raises:
+        ValueError: se il manifest non è valido
+    """
+    extension = os.path.splitext(manifest_path)[1].lower()
+    if extension == ".toml":
+        import tomllib
+        with open(manifest_path, "rb") as f:
+            data = tomllib.load(f)
+    elif extension == ".json":
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    else:
+        raise ValueError(f"Formato del manifest non supportato: {extension}")
+
+    if not isinstance(data, dict):
+        raise ValueError("Il manifest deve essere un oggetto con la lista \"jobs\"")
+    if not isinstance(data.get("jobs"), list) or not data["jobs"]:
+        raise ValueError("Il manifest non contiene lavori (lista \"jobs\")")
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    defaults = data.get("defaults", {})
+    if not isinstance(defaults, dict):
+        raise ValueError("La sezione \"defaults\" deve essere un oggetto")
+
+    jobs = []
+    for index, entry in enumerate(data["jobs"], 1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"Lavoro {index}: deve essere un oggetto con i parametri")
+        job = dict(defaults)
+        job.update(entry)
+
+        unknown = set(job) - JOB_KEYS
+        if unknown:
+            raise ValueError(f"Lavoro {index}: parametri sconosciuti {sorted(unknown)}")
+        fonts = job.get("fonts", [])
+        if not isinstance(fonts, list) or not all(isinstance(path, str) for path in fonts):
+            raise ValueError(f"Lavoro {index}: \"fonts\" deve essere una lista di percorsi")
+        if len(fonts) < 2:
+            raise ValueError(f"Lavoro {index}: servono almeno 2 font")
+
+        cut_method = job.get("cut_method", "equidistante")
+        cut_method = CUT_METHOD_ALIASES.get(cut_method, cut_method)
+        if cut_method not in ("casuale", "equidistante", "personalizzato"):
+            raise ValueError(f"Lavoro {index}: metodo di taglio sconosciuto '{cut_method}'")
+        job["cut_method"] = cut_method
+
+        job.setdefault("name", f"job{index}")
+        job.setdefault("font_name", job["name"])
+        job["fonts"] = [os.path.join(base_dir, path) for path in job["fonts"]]
+        job["output"] = os.path.join(base_dir, job.get("output", os.path.join("output", f"{job['font_name']}.ttf")))
+        jobs.append(job)
+
+    names = [job["name"] for job in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError("I nomi dei lavori devono essere unici")
+
+    return jobs
+
+
+def _job_entry(job, error=None):
+    """Voce del riepilogo di un lavoro, da completare con l'esito"""
+    return {
+        "name": job["name"],
+        "status": "error" if error else "ok",
+        "output": None,
+        "fonts": job["fonts"],
+        "cut_method": job["cut_method"],
+        "seed": job.get("seed"),
+        "cached": False,
+        "letters": 0,
+        "bytes": 0,
+        "seconds": 0.0,
+        "error": error,
+    }
+
+
+def run_job(job):
+    """
+    Esegue un lavoro con i font e i pezzi condivisi del processo.
+
+    Args:
+        job: Dizionario dei parametri restituito da load_manifest
+
+    Returns:
+        Dizionario con l'esito del lavoro (voce del riepilogo)
+    """
+    global _piece_cache, _result_cache
+
+    tolerance = job.get("flatten_tolerance", DEFAULT_FLATTEN_TOLERANCE)
+    pool = _source_pools.get(tolerance)
+    if pool is None:
+        pool = _source_pools[tolerance] = SourcePool(OutlineCache(), tolerance)
+    if _piece_cache is None:
+        _piece_cache = PieceCache()
+    if _result_cache is None:
+        _result_cache = ResultCache(outline_cache=pool.cache)
+
+    entry = _job_entry(job)
+    start = time.perf_counter()
+    try:
+        missing = [path for path in job["fonts"] if not os.path.isfile(path)]
+        if missing:
+            raise FileNotFoundError(f"Font non trovati: {', '.join(missing)}")
+        result = mix_fonts(
+            job["fonts"],
+            cut_method=job["cut_method"],
+            h_cuts=job.get("h_cuts"),
+            v_cuts=job.get("v_cuts"),
+            normalize=job.get("normalize", True),
+            use_vertical_cuts=job.get("use_vertical_cuts", False),
+            font_name=job["font_name"],
+            charset=job.get("charset", DEFAULT_CHARSET),
+            flatten_tolerance=tolerance,
+            preserve_curves=job.get("preserve_curves", False),
+            fit_error=job.get("fit_error"),
+            clip_backend=job.get("clip_backend", "shapely"),
+            piece_cache=_piece_cache,
+            output_path=job["output"],
+            source_pool=pool,
+            seed=job.get("seed"),
+            result_cache=_result_cache,
+        )
+        entry["output"] = result.output_path
+        entry["seed"] = result.seed
+        entry["cached"] = result.cached
+        entry["letters"] = len(result.letters)
+        entry["bytes"] = len(result.font_data)
+    except Exception as e:
+        print(f"Errore nel lavoro {job['name']}: {str(e)}")
+        traceback.print_exc()
+        entry["status"] = "error"
+        entry["error"] = str(e)
+    entry["seconds"] = round(time.perf_counter() - start, 3)
+    return entry
+
+
+def _run_group(jobs):
+    """Esegue in un processo di lavoro i lavori con gli stessi font sorgente"""
+    return [run_job(job) for job in jobs]
+
+
+def group_jobs(jobs):
+    """
+    Raggruppa i lavori per insieme di font sorgente, così che
+    ogni gruppo apra e legga i propri font una sola volta.
+
+    Returns:
+        Lista di liste di lavori, i gruppi più grandi per primi
+    """
+    groups = {}
+    for job in jobs:
+        key = tuple(sorted(os.path.abspath(path) for path in job["fonts"]))
+        groups.setdefault(key, []).append(job)
+    return sorted(groups.values(), key=len, reverse=True)
+
+
+def run_batch(jobs, workers=1):
+    """
+    Esegue i lavori, in parallelo su più processi se workers > 1.
+
+    Args:
+        jobs: Lavori restituiti da load_manifest
+        workers: Numero massimo di processi (1 = nel processo corrente)
+
+    Returns:
+        Lista degli esiti, nell'ordine dei lavori del manifest
+    """
+    groups = group_jobs(jobs)
+    results = {}
+
+    workers = max(1, min(int(workers), len(groups)))
+    if workers == 1:
+        try:
+            for group in groups:
+                for entry in _run_group(group):
+                    results[entry["name"]] = entry
+        finally:
+            close_sources()
+    else:
+        # "spawn" come nell'assemblaggio parallelo: ogni processo ha i propri font
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = {pool.submit(_run_group, group): group for group in groups}
+            for future in as_completed(futures):
+                try:
+                    entries = future.result()
+                except Exception as e:
+                    print(f"Errore nel processo di lavoro: {str(e)}")
+                    entries = [_job_entry(job, str(e)) for job in futures[future]]
+                for entry in entries:
+                    results[entry["name"]] = entry
+
+    return [results[job["name"]] for job in jobs]
+
+
+def close_sources():
+    """Chiude i font condivisi dal processo corrente"""
+    for pool in _source_pools.values():
+        pool.close()
+    _source_pools.clear()
+
+
+def write_summary(entries, summary_path, elapsed):
+    """
+    Scrive il riepilogo JSON dei lavori.
+
+    Args:
+        entries: Esiti restituiti da run_batch
+        summary_path: Percorso del file
+        elapsed: Durata totale in secondi
+    """
+    summary = {
+        "jobs": entries,
+        "succeeded": sum(1 for entry in entries if entry["status"] == "ok"),
+        "failed": sum(1 for entry in entries if entry["status"] != "ok"),
+        "seconds": round(elapsed, 3),
+    }
+    directory = os.path.dirname(summary_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+
+def main(argv=None):
+    """
+    Entry point della generazione in batch.
+
+    Returns:
+        Codice di uscita: 0 se tutti i lavori sono riusciti, 1 altrimenti,
+        2 se il manifest non è valido
+    """
+    parser = argparse.ArgumentParser(description="Genera font ibridi dai lavori di un manifest JSON/TOML")
+    parser.add_argument("manifest", help="File .json o .toml con i lavori")
+    parser.add_argument("--workers", type=int, default=1, help="Processi per l'esecuzione dei lavori")
+    parser.add_argument("--summary", help="File del riepilogo JSON (predefinito: accanto al manifest)")
+    args = parser.parse_args(argv)
+
+    try:
+        jobs = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"Manifest non valido: {str(e)}", file=sys.stderr)
+        return 2
+
+    for job in jobs:
+        os.makedirs(os.path.dirname(job["output"]), exist_ok=True)
+
+    start = time.perf_counter()
+    entries = run_batch(jobs, args.workers)
+    elapsed = time.perf_counter() - start
+
+    summary_path = args.summary or os.path.splitext(args.manifest)[0] + ".summary.json"
+    write_summary(entries, summary_path, elapsed)
+
+    failed = sum(1 for entry in entries if entry["status"] != "ok")
+    print(f"Lavori completati: {len(entries) - failed}/{len(entries)} in {elapsed:.1f} s", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""
+Modulo per l'approssimazione delle curve di Bézier con segmenti lineari.
+Il numero di segmenti di ogni curva dipende da una tolleranza
+sulla deviazione massima, espressa in unità del font.
+Le curve di un glifo vengono valutate tutte insieme con NumPy,
+usando matrici di Bernstein precalcolate.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+# Deviazione massima ammessa tra curva e spezzata, in unità del font
+DEFAULT_FLATTEN_TOLERANCE = 1.0
+
+# Limite di sicurezza sul numero di segmenti per singola curva
+MAX_SEGMENTS = 256
+
+
+@lru_cache(maxsize=None)
+def bernstein_matrix(degree, steps):
+    """
+    Matrice dei polinomi di Bernstein per t = 1/steps, 2/steps, ..., 1.
+
+    Args:
+        degree: Grado della curva (2 quadratica, 3 cubica)
+        steps: Numero di segmenti
+
+    Returns:
+        Array (steps, degree + 1) di sola lettura
+    """
+    t = np.arange(1, steps + 1, dtype=np.float64) / steps
+    s = 1.0 - t
+    if degree == 2:
+        matrix = np.stack([s * s, 2 * s * t, t * t], axis=1)
+    elif degree == 3:
+        matrix = np.stack([s * s * s, 3 * s * s * t, 3 * s * t * t, t * t * t], axis=1)
+    else:
+        raise ValueError(f"Grado di curva non supportato: {degree}")
+    matrix.setflags(write=False)
+    return matrix
+
+
+def segment_counts(ctrl, tolerance=DEFAULT_FLATTEN_TOLERANCE):
+    """
+    Calcola quanti segmenti servono per approssimare ogni curva
+    entro la tolleranza data (formula di Wang).
+
+    Args:
+        ctrl: Array (M, degree + 1, 2) di punti di controllo
+        tolerance: Deviazione massima ammessa
+
+    Returns:
+        Array (M,) di interi, ciascuno tra 1 e MAX_SEGMENTS
+    """
+    degree = ctrl.shape[1] - 1
+    second_diff = ctrl[:, :-2] - 2 * ctrl[:, 1:-1] + ctrl[:, 2:]
+    l = np.linalg.norm(second_diff, axis=2).max(axis=1)
+    counts = np.ceil(np.sqrt(degree * (degree - 1) / 8.0 * l / tolerance))
+    return np.clip(counts, 1, MAX_SEGMENTS).astype(np.int64)
+
+
+def flatten_curves(ctrl, tolerance=DEFAULT_FLATTEN_TOLERANCE):
+    """
+    Approssima in blocco un insieme di curve dello stesso grado.
+    Le curve con lo stesso numero di segmenti vengono valutate
+    con un unico prodotto matriciale.
+
+    Args:
+        ctrl: Array (M, degree + 1, 2) di punti di controllo
+        tolerance: Deviazione massima ammessa
+
+    Returns:
+        Tuple (points, offsets): i punti della curva i (senza il punto iniziale)
+        sono points[offsets[i]:offsets[i + 1]]
+    """
+    ctrl = np.asarray(ctrl, dtype=np.float64)
+    offsets = np.zeros(len(ctrl) + 1, dtype=np.int64)
+    if len(ctrl) == 0:
+        return np.empty((0, 2)), offsets
+
+    degree = ctrl.shape[1] - 1
+    counts = segment_counts(ctrl, tolerance)
+    offsets[1:] = np.cumsum(counts)
+    points = np.empty((offsets[-1], 2), dtype=np.float64)
+
+    for steps in np.unique(counts):
+        group = np.nonzero(counts == steps)[0]
+        # (m, steps, 2) = (steps, degree+1) x (m, degree+1, 2)
+        evaluated = np.einsum("sk,mkd->msd", bernstein_matrix(degree, int(steps)), ctrl[group])
+        # Indici di destinazione di tutti i punti del gruppo
+        targets = (offsets[group][:, None] + np.arange(steps)).ravel()
+        points[targets] = evaluated.reshape(-1, 2)
+
+    return points, offsets
+
+
+def bezier_point(ctrl, t):
+    """
+    Valuta una curva di Bézier di qualsiasi grado in t (de Casteljau).
+
+    Args:
+        ctrl: Array (degree + 1, 2) di punti di controllo
+        t: Parametro in [0, 1]
+
+    Returns:
+        Array (2,) con il punto della curva
+    """
+    points = np.asarray(ctrl, dtype=np.float64)
+    while len(points) > 1:
+        points = (1 - t) * points[:-1] + t * points[1:]
+    return points[0]
+
+
+def split_bezier_at(ctrl, t):
+    """
+    Divide una curva di Bézier in t con l'algoritmo di de Casteljau.
+
+    Args:
+        ctrl: Array (degree + 1, 2) di punti di controllo
+        t: Parametro di divisione in (0, 1)
+
+    Returns:
+        Tuple (left, right) con i punti di controllo delle due parti
+    """
+    points = np.asarray(ctrl, dtype=np.float64)
+    left = [points[0]]
+    right = [points[-1]]
+    while len(points) > 1:
+        points = (1 - t) * points[:-1] + t * points[1:]
+        left.append(points[0])
+        right.append(points[-1])
+    return np.array(left), np.array(right[::-1])
+
+
+def split_bezier(ctrl, ts):
+    """
+    Divide una curva di Bézier in più parametri.
+
+    Args:
+        ctrl: Array (degree + 1, 2) di punti di controllo
+        ts: Parametri di divisione ordinati, tutti in (0, 1)
+
+    Returns:
+        Lista di len(ts) + 1 array di punti di controllo
+    """
+    pieces = []
+    rest = np.asarray(ctrl, dtype=np.float64)
+    previous = 0.0
+    for t in ts:
+        # Riporta t nel parametro locale della parte rimanente
+        left, rest = split_bezier_at(rest, (t - previous) / (1 - previous))
+        pieces.append(left)
+        previous = t
+    pieces.append(rest)
+    return pieces
+
+
+def axis_crossings(ctrl, axis, value, eps=1e-9):
+    """
+    Trova i parametri in cui una curva attraversa una retta
+    orizzontale (axis=1) o verticale (axis=0).
+
+    Args:
+        ctrl: Array (degree + 1, 2) di punti di controllo
+        axis: 0 per x = value, 1 per y = value
+        value: Coordinata della retta
+        eps: Margine escluso agli estremi del parametro
+
+    Returns:
+        Lista ordinata di parametri t in (eps, 1 - eps)
+    """
+    c = np.asarray(ctrl, dtype=np.float64)[:, axis]
+
+    # Per la proprietà dell'inviluppo convesso la curva non attraversa la retta
+    if c.min() >= value or c.max() <= value:
+        return []
+
+    degree = len(c) - 1
+    if degree == 1:
+        coefficients = [c[1] - c[0], c[0] - value]
+    elif degree == 2:
+        coefficients = [c[0] - 2 * c[1] + c[2], 2 * (c[1] - c[0]), c[0] - value]
+    elif degree == 3:
+        coefficients = [
+            -c[0] + 3 * c[1] - 3 * c[2] + c[3],
+            3 * c[0] - 6 * c[1] + 3 * c[2],
+            3 * (c[1] - c[0]),
+            c[0] - value,
+        ]
+    else:
+        raise ValueError(f"Grado di curva non supportato: {degree}")
+
+    roots = np.roots(coefficients)
+    ts = sorted(
+        float(r.real) for r in roots
+        if abs(r.imag) < 1e-9 and eps < r.real < 1 - eps
+    )
+
+    # Elimina le radici doppie (tangenze)
+    unique = []
+    for t in ts:
+        if not unique or t - unique[-1] > eps:
+            unique.append(t)
+    return unique
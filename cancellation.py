@@ -0,0 +1,35 @@
+"""
+Modulo per l'annullamento cooperativo delle generazioni.
+Chi esegue il lavoro controlla il token tra una lettera e l'altra e tra
+una fase e l'altra; chi lo ha avviato può annullarlo da qualsiasi thread.
+"""
+
+import threading
+
+
+class GenerationCancelled(Exception):
+    """Sollevata da CancelToken.check quando la generazione è stata annullata"""
+
+
+class CancelToken:
+    """
+    Segnale di annullamento condiviso tra l'interfaccia e il thread di lavoro.
+    L'annullamento non interrompe il lavoro in corso: viene rispettato
+    al controllo successivo, quindi entro il tempo di una lettera.
+    """
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """Richiede l'annullamento"""
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        """True se l'annullamento è stato richiesto"""
+        return self._event.is_set()
+
+    def check(self):
+        """Solleva GenerationCancelled se l'annullamento è stato richiesto"""
+        if self._event.is_set():
+            raise GenerationCancelled()
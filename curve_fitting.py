@@ -0,0 +1,332 @@
+"""
+Modulo per la compressione dei contorni poligonali in curve quadratiche.
+Le sequenze di vertici tra due angoli vengono approssimate con una
+B-spline quadratica (formato TrueType: punti fuori curva consecutivi
+con punto sulla curva implicito a metà), entro un errore massimo.
+Gli angoli, compresi quelli creati dalle linee di taglio, restano spigoli vivi.
+"""
+
+import numpy as np
+
+# Distanza massima ammessa tra il contorno originale e la curva, in unità del font
+DEFAULT_FIT_ERROR = 1.0
+
+# Cambio di direzione oltre il quale un vertice è considerato un angolo
+CORNER_ANGLE = 40.0
+
+# Cambio di direzione minimo per un angolo agli estremi di un lato orizzontale o verticale
+AXIS_CORNER_ANGLE = 1.0
+
+# Iterazioni di riparametrizzazione per ogni tentativo di approssimazione
+REFINE_ITERATIONS = 2
+
+# Punti fuori curva oltre i quali una sequenza viene divisa a metà
+MAX_CONTROLS = 8
+
+# Punti valutati su ogni segmento quadratico per il controllo dell'errore
+CHECK_SAMPLES = 16
+
+
+def _open_ring(contour):
+    """Array (N, 2) del contorno senza ripetere il punto iniziale"""
+    points = np.asarray(contour, dtype=np.float64)
+    if len(points) > 1 and np.array_equal(points[0], points[-1]):
+        points = points[:-1]
+    return points
+
+
+def find_corners(points, corner_angle=CORNER_ANGLE):
+    """
+    Individua gli angoli di un contorno chiuso.
+    Un vertice è un angolo se la direzione cambia più di corner_angle gradi,
+    oppure se è l'estremo di un lato esattamente orizzontale o verticale
+    e la direzione cambia: i tagli sono sempre paralleli agli assi,
+    quindi le loro intersezioni con il glifo restano spigoli vivi.
+
+    Args:
+        points: Array (N, 2) del contorno senza ripetere il punto iniziale
+        corner_angle: Soglia in gradi
+
+    Returns:
+        Array booleano (N,)
+    """
+    incoming = points - np.roll(points, 1, axis=0)
+    outgoing = np.roll(points, -1, axis=0) - points
+
+    cross = incoming[:, 0] * outgoing[:, 1] - incoming[:, 1] * outgoing[:, 0]
+    dot = (incoming * outgoing).sum(axis=1)
+    turn = np.degrees(np.abs(np.arctan2(cross, dot)))
+
+    axis_aligned = (outgoing[:, 0] == 0) | (outgoing[:, 1] == 0)
+    touches_axis_edge = axis_aligned | np.roll(axis_aligned, 1)
+
+    return (turn > corner_angle) | (touches_axis_edge & (turn > AXIS_CORNER_ANGLE))
+
+
+def _spline_basis(u, count):
+    """
+    Coefficienti della B-spline quadratica TrueType con count punti fuori curva.
+    Il punto al parametro globale u in [0, 1] vale
+    a * start + sum(basis[k] * control[k]) + b * end.
+
+    Returns:
+        Tuple (basis, a, b, segment, t)
+    """
+    s = np.clip(u * count, 0, count)
+    segment = np.minimum(s.astype(np.int64), count - 1)
+    t = s - segment
+
+    w0 = (1 - t) ** 2
+    w1 = 2 * t * (1 - t)
+    w2 = t ** 2
+
+    rows = np.arange(len(u))
+    basis = np.zeros((len(u), count))
+    a = np.where(segment == 0, w0, 0.0)
+    b = np.where(segment == count - 1, w2, 0.0)
+
+    # Inizio del segmento: punto iniziale o metà tra i due controlli
+    inner_start = segment > 0
+    basis[rows[inner_start], segment[inner_start] - 1] += w0[inner_start] / 2
+    basis[rows[inner_start], segment[inner_start]] += w0[inner_start] / 2
+
+    basis[rows, segment] += w1
+
+    # Fine del segmento: punto finale o metà tra i due controlli
+    inner_end = segment < count - 1
+    basis[rows[inner_end], segment[inner_end]] += w2[inner_end] / 2
+    basis[rows[inner_end], segment[inner_end] + 1] += w2[inner_end] / 2
+
+    return basis, a, b, segment, t
+
+
+def _segment_controls(start, controls, end, segment):
+    """Punti (inizio, controllo, fine) del segmento quadratico di ogni campione"""
+    padded = np.vstack([start, controls, end])
+    mids = (padded[1:-2] + padded[2:-1]) / 2
+    starts = np.vstack([start, mids])
+    ends = np.vstack([mids, end])
+    return starts[segment], controls[segment], ends[segment]
+
+
+def _polyline_distance(points, polyline):
+    """
+    Distanza di ogni punto dalla spezzata più vicina.
+
+    Args:
+        points: Array (M, 2)
+        polyline: Array (N, 2) di vertici consecutivi
+
+    Returns:
+        Array (M,) delle distanze
+    """
+    a = polyline[:-1]
+    edge = polyline[1:] - a
+    length_sq = (edge * edge).sum(axis=1)
+    offset = points[:, None, :] - a[None, :, :]
+    t = np.divide((offset * edge).sum(axis=2), length_sq, out=np.zeros((len(points), len(a))), where=length_sq > 0)
+    t = np.clip(t, 0, 1)
+    nearest = a[None, :, :] + t[:, :, None] * edge[None, :, :]
+    return np.sqrt(((points[:, None, :] - nearest) ** 2).sum(axis=2)).min(axis=1)
+
+
+def spline_error(run, controls):
+    """
+    Distanza massima tra una sequenza di vertici e la B-spline che la approssima,
+    nei due versi: ogni segmento quadratico viene valutato in punti uniformi
+    e confrontato con la spezzata, vertici e punti medi della spezzata
+    vengono confrontati con la curva valutata.
+
+    Args:
+        run: Array (N, 2) di vertici, estremi compresi
+        controls: Array (count, 2) dei punti fuori curva
+
+    Returns:
+        Distanza massima
+    """
+    count = len(controls)
+    t = np.linspace(0, 1, CHECK_SAMPLES + 1)
+    segment = np.repeat(np.arange(count), len(t))
+    tt = np.tile(t, count)[:, None]
+    p0, p1, p2 = _segment_controls(run[0], controls, run[-1], segment)
+    curve = (1 - tt) ** 2 * p0 + 2 * tt * (1 - tt) * p1 + tt ** 2 * p2
+
+    midpoints = (run[:-1] + run[1:]) / 2
+    to_polyline = _polyline_distance(curve, run).max()
+    to_curve = _polyline_distance(np.vstack([run, midpoints]), curve).max()
+    return max(to_polyline, to_curve)
+
+
+def fit_quadratic_spline(run, count, max_error):
+    """
+    Approssima una sequenza di vertici con una B-spline quadratica
+    con estremi fissi e count punti fuori curva (minimi quadrati).
+
+    Args:
+        run: Array (N, 2) di vertici, estremi compresi
+        count: Numero di punti fuori curva
+        max_error: Distanza massima ammessa
+
+    Returns:
+        Array (count, 2) dei punti fuori curva, oppure None se l'errore è troppo alto,
+        se un segmento resta senza campioni o se un punto di controllo esce
+        dal rettangolo della sequenza (allargato di max_error)
+    """
+    start, end = run[0], run[-1]
+
+    # Campioni: vertici interni e punti medi dei lati
+    samples = np.empty((2 * len(run) - 3, 2))
+    samples[0::2] = (run[:-1] + run[1:]) / 2
+    samples[1::2] = run[1:-1]
+
+    lengths = np.linalg.norm(np.diff(run, axis=0), axis=1)
+    total = lengths.sum()
+    if total == 0:
+        return None
+    cumulative = np.concatenate([[0.0], np.cumsum(lengths)])
+    u = np.empty(len(samples))
+    u[0::2] = (cumulative[:-1] + lengths / 2) / total
+    u[1::2] = cumulative[1:-1] / total
+
+    for _ in range(REFINE_ITERATIONS + 1):
+        basis, a, b, segment, t = _spline_basis(u, count)
+        target = samples - a[:, None] * start - b[:, None] * end
+        controls = np.linalg.lstsq(basis, target, rcond=None)[0]
+
+        # Riproietta i campioni sulla curva (un passo di Newton per campione)
+        p0, p1, p2 = _segment_controls(start, controls, end, segment)
+        tt = t[:, None]
+        point = (1 - tt) ** 2 * p0 + 2 * tt * (1 - tt) * p1 + tt ** 2 * p2
+        first = 2 * ((1 - tt) * (p1 - p0) + tt * (p2 - p1))
+        second = 2 * (p2 - 2 * p1 + p0)
+        delta = point - samples
+        numerator = (delta * first).sum(axis=1)
+        denominator = (first * first).sum(axis=1) + (delta * second).sum(axis=1)
+        step = np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 1e-12)
+        t_new = np.clip(t - step, 0, 1)
+        u = np.clip((segment + t_new) / count, 0, 1)
+
+    # Un segmento senza campioni ha i punti di controllo liberi:
+    # i minimi quadrati possono portarli lontanissimi dal contorno
+    segment = _spline_basis(u, count)[3]
+    if np.bincount(segment, minlength=count).min() == 0:
+        return None
+    low = run.min(axis=0) - max_error
+    high = run.max(axis=0) + max_error
+    if not np.isfinite(controls).all() or (controls < low).any() or (controls > high).any():
+        return None
+
+    # Errore misurato sull'intera curva, non solo nei campioni
+    if spline_error(run, controls) > max_error:
+        return None
+    return controls
+
+
+def _line_error(run):
+    """Distanza massima dei vertici interni dal segmento tra gli estremi"""
+    if len(run) <= 2:
+        return 0.0
+    return _polyline_distance(run[1:-1], run[[0, -1]]).max()
+
+
+def fit_run(run, max_error=DEFAULT_FIT_ERROR):
+    """
+    Approssima una sequenza di vertici tra due angoli.
+
+    Args:
+        run: Array (N, 2) di vertici, estremi compresi
+        max_error: Distanza massima ammessa
+
+    Returns:
+        Tuple (points, on_curve) con i punti successivi al primo, fino all'ultimo compreso
+    """
+    if len(run) <= 2 or _line_error(run) <= max_error:
+        return [tuple(run[-1])], [True]
+
+    # Meno punti fuori curva possibile: conviene solo se risparmia vertici
+    for count in range(1, min(MAX_CONTROLS, len(run) - 2) + 1):
+        controls = fit_quadratic_spline(run, count, max_error)
+        if controls is not None:
+            return [tuple(p) for p in controls] + [tuple(run[-1])], [False] * count + [True]
+
+    if len(run) <= MAX_CONTROLS + 2:
+        return [tuple(p) for p in run[1:]], [True] * (len(run) - 1)
+
+    # Sequenza troppo lunga: si divide a metà e si approssimano le due parti
+    middle = len(run) // 2
+    first_points, first_on = fit_run(run[:middle + 1], max_error)
+    second_points, second_on = fit_run(run[middle:], max_error)
+    return first_points + second_points, first_on + second_on
+
+
+def fit_contour(contour, max_error=DEFAULT_FIT_ERROR, corner_angle=CORNER_ANGLE):
+    """
+    Converte un contorno poligonale in un contorno quadratico TrueType.
+
+    Args:
+        contour: Lista di tuple (x, y) o array (N, 2), chiuso o aperto
+        max_error: Distanza massima ammessa tra poligono e curva
+        corner_angle: Soglia in gradi per gli angoli
+
+    Returns:
+        Tuple (points, on_curve) senza ripetere il punto iniziale
+    """
+    points = _open_ring(contour)
+    if len(points) < 3:
+        return [tuple(p) for p in points], [True] * len(points)
+
+    corners = np.nonzero(find_corners(points, corner_angle))[0]
+    if len(corners) == 0:
+        # Contorno senza angoli: si parte dal vertice più lontano dal centro
+        center = points.mean(axis=0)
+        corners = np.array([int(np.argmax(np.linalg.norm(points - center, axis=1)))])
+
+    n = len(points)
+    result_points = [tuple(points[corners[0]])]
+    on_curve = [True]
+
+    for k, start in enumerate(corners):
+        stop = corners[(k + 1) % len(corners)]
+        if stop <= start:
+            stop += n
+        run = points[np.arange(start, stop + 1) % n]
+
+        # Un solo angolo: il contorno chiuso viene diviso a metà
+        if len(corners) == 1:
+            middle = len(run) // 2
+            halves = [run[:middle + 1], run[middle:]]
+        else:
+            halves = [run]
+
+        for half in halves:
+            run_points, run_on = fit_run(half, max_error)
+            result_points.extend(run_points)
+            on_curve.extend(run_on)
+
+    # L'ultimo punto è il primo angolo
+    result_points.pop()
+    on_curve.pop()
+
+    return result_points, on_curve
+
+
+def fit_contours(contours, max_error=DEFAULT_FIT_ERROR, corner_angle=CORNER_ANGLE):
+    """
+    Converte tutti i contorni poligonali di un glifo in contorni quadratici.
+
+    Args:
+        contours: Lista di contorni (liste di tuple o array)
+        max_error: Distanza massima ammessa tra poligono e curva
+        corner_angle: Soglia in gradi per gli angoli
+
+    Returns:
+        Lista di tuple (points, on_curve)
+    """
+    fitted = []
+    for contour in contours:
+        if contour is None or len(contour) < 3:
+            continue
+        points, on_curve = fit_contour(contour, max_error, corner_angle)
+        if len(points) >= 3 or not all(on_curve):
+            fitted.append((points, on_curve))
+    return fitted
@@ -0,0 +1,605 @@
+"""
+Modulo per il mixaggio dei glifi mantenendo le curve originali.
+Le curve sorgente vengono divise esattamente sulle linee di taglio
+(de Casteljau al parametro t risolto) e ricomposte cella per cella;
+i pezzi delle celle vengono poi riuniti attraverso le linee di taglio.
+Il risultato conserva il numero di avvolgimento dei contorni sorgente
+(regola nonzero), senza passare per le operazioni booleane di Shapely.
+"""
+
+import traceback
+
+import numpy as np
+import shapely
+from fontTools.cu2qu import curve_to_quadratic
+
+from bezier_utils import (
+    DEFAULT_FLATTEN_TOLERANCE, flatten_curves,
+    bezier_point, split_bezier, axis_crossings
+)
+from font_utils import flatten_quadratic_contours
+from geometry_utils import normalization_transform
+from mix_plan import MixPlan
+from glyph_outline import GlyphOutline
+
+# Distanza sotto la quale un tratto è considerato giacente su una linea di taglio
+BOUNDARY_EPS = 1e-6
+
+# Margine minimo delle celle esterne oltre il bound dei contorni
+CELL_MARGIN = 1.0
+
+
+def transform_segments(contours, scale, dx, dy):
+    """
+    Applica la trasformazione x' = x * scale + dx, y' = y * scale + dy
+    ai punti di controllo di tutti i segmenti.
+    """
+    offset = np.array([dx, dy])
+    return [[segment * scale + offset for segment in contour] for contour in contours]
+
+
+def flatten_segment_contour(segments, tolerance=DEFAULT_FLATTEN_TOLERANCE):
+    """
+    Approssima un contorno di segmenti di Bézier con un anello chiuso.
+
+    Returns:
+        Array NumPy (N, 2) con il primo punto ripetuto alla fine
+    """
+    pieces = [segments[0][:1]]
+    by_degree = {}
+    for i, segment in enumerate(segments):
+        by_degree.setdefault(len(segment), []).append(i)
+
+    flattened = [None] * len(segments)
+    for size, indices in by_degree.items():
+        if size == 2:
+            for i in indices:
+                flattened[i] = segments[i][1:]
+            continue
+        points, offsets = flatten_curves(np.array([segments[i] for i in indices]), tolerance)
+        for k, i in enumerate(indices):
+            flattened[i] = points[offsets[k]:offsets[k + 1]]
+
+    pieces.extend(flattened)
+    return np.concatenate(pieces)
+
+
+def _signed_area(ring):
+    """Area con segno di un anello (positiva se antiorario)"""
+    x = ring[:, 0]
+    y = ring[:, 1]
+    return 0.5 * float(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]))
+
+
+def winding_number(rings, x, y):
+    """
+    Numero di avvolgimento di un punto rispetto a un insieme di anelli chiusi.
+
+    Args:
+        rings: Lista di array (N, 2) con il primo punto ripetuto alla fine
+        x, y: Coordinate del punto
+
+    Returns:
+        Numero di avvolgimento (intero con segno)
+    """
+    total = 0
+    for ring in rings:
+        x0, y0 = ring[:-1, 0], ring[:-1, 1]
+        x1, y1 = ring[1:, 0], ring[1:, 1]
+        side = (x1 - x0) * (y - y0) - (x - x0) * (y1 - y0)
+        upward = (y0 <= y) & (y1 > y) & (side > 0)
+        downward = (y1 <= y) & (y0 > y) & (side < 0)
+        total += int(upward.sum()) - int(downward.sum())
+    return total
+
+
+def _reverse_contour(segments):
+    """Inverte il verso di percorrenza di un contorno di segmenti"""
+    return [segment[::-1] for segment in reversed(segments)]
+
+
+def orient_contours(contours, tolerance=DEFAULT_FLATTEN_TOLERANCE):
+    """
+    Porta i contorni di un glifo alla convenzione con esterni antiorari.
+    Il verso viene invertito per tutti i contorni insieme (TrueType usa
+    esterni orari, CFF antiorari), così il numero di avvolgimento
+    cambia solo di segno e contorni sovrapposti restano un'unione.
+
+    Args:
+        contours: Lista di contorni (liste di segmenti)
+        tolerance: Tolleranza per l'appiattimento usato nella classificazione
+
+    Returns:
+        Lista di tuple (segments, ccw, ring) con il contorno orientato,
+        il suo verso e l'anello approssimato
+    """
+    rings = [flatten_segment_contour(segments, tolerance) for segments in contours]
+    valid = [i for i, ring in enumerate(rings) if len(ring) >= 4]
+    if not valid:
+        return []
+
+    areas = {i: _signed_area(rings[i]) for i in valid}
+    largest = max(valid, key=lambda i: abs(areas[i]))
+    flip = areas[largest] < 0
+
+    oriented = []
+    for i in valid:
+        segments, ring, area = contours[i], rings[i], areas[i]
+        if flip:
+            segments = _reverse_contour(segments)
+            ring = ring[::-1]
+            area = -area
+        oriented.append((segments, area > 0, ring))
+
+    return oriented
+
+
+def split_at_cuts(segments, x_cuts, y_cuts):
+    """
+    Divide i segmenti di un contorno su tutte le linee di taglio.
+    I punti di divisione vengono portati esattamente sulla linea.
+
+    Args:
+        segments: Lista di segmenti del contorno
+        x_cuts: Coordinate x dei tagli verticali
+        y_cuts: Coordinate y dei tagli orizzontali
+
+    Returns:
+        Lista di segmenti, nessuno dei quali attraversa una linea di taglio
+    """
+    result = []
+    for segment in segments:
+        crossings = []
+        for axis, cuts in ((0, x_cuts), (1, y_cuts)):
+            for value in cuts:
+                crossings.extend((t, axis, value) for t in axis_crossings(segment, axis, value))
+
+        if not crossings:
+            result.append(segment)
+            continue
+
+        crossings.sort()
+        ts = []
+        snaps = []
+        for t, axis, value in crossings:
+            # Attraversamento di due tagli nello stesso punto (angolo di una cella)
+            if ts and t - ts[-1] < 1e-9:
+                snaps[-1].append((axis, value))
+            else:
+                ts.append(t)
+                snaps.append([(axis, value)])
+
+        pieces = split_bezier(segment, ts)
+        for k, snap in enumerate(snaps):
+            for axis, value in snap:
+                pieces[k][-1, axis] = value
+                pieces[k + 1][0, axis] = value
+        result.extend(pieces)
+
+    return result
+
+
+def _cell_of(point, x_cuts, y_cuts, cols):
+    """
+    Indice della cella che contiene un punto, oppure -1 se il punto
+    giace su una linea di taglio.
+    """
+    x, y = point
+    if any(abs(x - c) < BOUNDARY_EPS for c in x_cuts) or any(abs(y - c) < BOUNDARY_EPS for c in y_cuts):
+        return -1
+    row = int(np.searchsorted(y_cuts, y))
+    col = int(np.searchsorted(x_cuts, x))
+    return row * cols + col
+
+
+def _perimeter_position(point, rect):
+    """
+    Posizione di un punto del bordo lungo il perimetro del rettangolo,
+    misurata in senso antiorario dall'angolo in basso a sinistra.
+    """
+    x0, y0, x1, y1 = rect
+    w = x1 - x0
+    h = y1 - y0
+    x, y = point
+    distances = [abs(y - y0), abs(x - x1), abs(y - y1), abs(x - x0)]
+    edge = int(np.argmin(distances))
+    if edge == 0:
+        return min(max(x - x0, 0), w)
+    if edge == 1:
+        return w + min(max(y - y0, 0), h)
+    if edge == 2:
+        return w + h + min(max(x1 - x, 0), w)
+    return 2 * w + h + min(max(y1 - y, 0), h)
+
+
+def _boundary_path(start, end, rect, ccw):
+    """
+    Segmenti rettilinei lungo il bordo del rettangolo da start a end,
+    nel verso del contorno, passando per gli angoli intermedi.
+    """
+    x0, y0, x1, y1 = rect
+    w = x1 - x0
+    h = y1 - y0
+    perimeter = 2 * (w + h)
+    corners = [(0.0, (x0, y0)), (w, (x1, y0)), (w + h, (x1, y1)), (2 * w + h, (x0, y1))]
+
+    s_start = _perimeter_position(start, rect)
+    s_end = _perimeter_position(end, rect)
+    sign = 1 if ccw else -1
+    distance = (sign * (s_end - s_start)) % perimeter
+
+    path = [np.asarray(start, dtype=np.float64)]
+    for d, corner in sorted(((sign * (s - s_start)) % perimeter, corner) for s, corner in corners):
+        if 0 < d < distance:
+            path.append(np.array(corner, dtype=np.float64))
+    path.append(np.asarray(end, dtype=np.float64))
+
+    return [
+        np.array([a, b]) for a, b in zip(path[:-1], path[1:])
+        if not np.array_equal(a, b)
+    ]
+
+
+def _rect_loop(rect, ccw):
+    """Contorno rettangolare di una cella, nel verso richiesto"""
+    x0, y0, x1, y1 = rect
+    corners = [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+    if not ccw:
+        corners = corners[::-1]
+    corners = np.array(corners, dtype=np.float64)
+    return [np.array([corners[i], corners[(i + 1) % 4]]) for i in range(4)]
+
+
+def _reference_point(rect, ring):
+    """
+    Punto interno alla cella il più lontano possibile dal contorno,
+    dove il numero di avvolgimento è calcolabile senza ambiguità.
+    """
+    x0, y0, x1, y1 = rect
+    fractions = (np.arange(7) + 0.5) / 7
+    xs, ys = np.meshgrid(x0 + (x1 - x0) * fractions, y0 + (y1 - y0) * fractions)
+    candidates = shapely.points(xs.ravel(), ys.ravel())
+    distances = shapely.distance(shapely.linestrings(ring), candidates)
+    best = int(np.argmax(distances))
+    return xs.ravel()[best], ys.ravel()[best]
+
+
+def clip_contour_to_cell(pieces, cells, cell, rect, ccw, ring, tolerance=DEFAULT_FLATTEN_TOLERANCE):
+    """
+    Ritaglia un contorno già diviso sulle linee di taglio a una cella.
+    I tratti interni alla cella formano catene che vengono chiuse
+    percorrendo il bordo della cella nel verso del contorno.
+    Il numero di avvolgimento del risultato viene poi confrontato con
+    quello del contorno originale in un punto della cella: la differenza,
+    possibile solo per contorni che si autointersecano, viene compensata
+    con il rettangolo della cella.
+
+    Args:
+        pieces: Segmenti del contorno divisi sui tagli
+        cells: Indice di cella di ogni segmento (-1 se giace su un taglio)
+        cell: Indice della cella da ritagliare
+        rect: Rettangolo (x0, y0, x1, y1) della cella
+        ccw: True se il contorno è antiorario (esterno)
+        ring: Anello approssimato del contorno
+        tolerance: Tolleranza di appiattimento per il confronto
+
+    Returns:
+        Lista di contorni chiusi (liste di segmenti)
+    """
+    inside = [c == cell for c in cells]
+
+    if all(inside):
+        return [pieces]
+
+    loops = []
+    if any(inside):
+        loops = _close_chains(pieces, inside, rect, ccw)
+
+    # Correzione del numero di avvolgimento nella cella
+    x, y = _reference_point(rect, ring)
+    expected = winding_number([ring], x, y)
+    actual = winding_number([flatten_segment_contour(loop, tolerance) for loop in loops], x, y)
+    difference = expected - actual
+    for _ in range(abs(difference)):
+        loops.append(_rect_loop(rect, difference > 0))
+
+    return loops
+
+
+def _close_chains(pieces, inside, rect, ccw):
+    """
+    Raccoglie le catene di segmenti interni alla cella e le chiude
+    lungo il bordo, collegando ogni uscita alla prossima entrata
+    nel verso del contorno.
+    """
+    n = len(pieces)
+    first = next(i for i in range(n) if inside[i] and not inside[i - 1])
+    chains = []
+    current = None
+    for k in range(n):
+        i = (first + k) % n
+        if inside[i]:
+            if current is None:
+                current = []
+                chains.append(current)
+            current.append(pieces[i])
+        else:
+            current = None
+
+    x0, y0, x1, y1 = rect
+    perimeter = 2 * ((x1 - x0) + (y1 - y0))
+    sign = 1 if ccw else -1
+    starts = [_perimeter_position(chain[0][0], rect) for chain in chains]
+
+    loops = []
+    visited = set()
+    for first_chain in range(len(chains)):
+        if first_chain in visited:
+            continue
+
+        loop = []
+        c = first_chain
+        while True:
+            visited.add(c)
+            loop.extend(chains[c])
+            exit_point = chains[c][-1][-1]
+            s_exit = _perimeter_position(exit_point, rect)
+
+            # Prossima catena che entra nella cella lungo il bordo;
+            # con contorni autointersecanti si chiude comunque il giro
+            candidates = [j for j in range(len(chains)) if j == first_chain or j not in visited]
+            following = min(
+                candidates,
+                key=lambda j: (sign * (starts[j] - s_exit)) % perimeter
+            )
+            loop.extend(_boundary_path(exit_point, chains[following][0][0], rect, ccw))
+
+            if following == first_chain:
+                break
+            c = following
+
+        loops.append(loop)
+
+    return loops
+
+
+def _cut_line_of(segment, x_cuts, y_cuts):
+    """
+    Linea di taglio (asse, valore) su cui giace un tratto rettilineo,
+    oppure None. I punti sui tagli sono portati esattamente sulla linea,
+    quindi il confronto è esatto.
+    """
+    if len(segment) != 2:
+        return None
+    for axis, cuts in ((0, x_cuts), (1, y_cuts)):
+        value = segment[0][axis]
+        if segment[1][axis] == value and value in cuts:
+            return axis, value
+    return None
+
+
+def merge_cut_edges(loops, x_cuts, y_cuts):
+    """
+    Unisce i contorni ritagliati nelle celle attraverso le linee di taglio.
+    Su ogni linea i tratti di bordo di verso opposto (uno per lato del taglio)
+    si annullano; i tratti rimasti e i segmenti curvi vengono poi concatenati
+    per estremi coincidenti. Il numero di avvolgimento non cambia e ogni glifo
+    torna ad avere circa i contorni dei glifi sorgente invece di uno per cella.
+
+    Args:
+        loops: Contorni chiusi (liste di segmenti) di tutte le celle
+        x_cuts: Coordinate x dei tagli verticali
+        y_cuts: Coordinate y dei tagli orizzontali
+
+    Returns:
+        Lista di contorni chiusi (liste di segmenti)
+    """
+    edges = []
+    lines = {}
+    for loop in loops:
+        for segment in loop:
+            line = _cut_line_of(segment, x_cuts, y_cuts)
+            if line is None:
+                edges.append(segment)
+            else:
+                lines.setdefault(line, []).append(segment)
+
+    # Copertura con segno di ogni intervallo della linea: i tratti
+    # delle due celle adiacenti hanno verso opposto e si annullano
+    for (axis, value), segments in lines.items():
+        other = 1 - axis
+        stops = sorted({float(segment[k][other]) for segment in segments for k in (0, 1)})
+        coverage = np.zeros(len(stops) - 1, dtype=np.int64)
+        for segment in segments:
+            a, b = float(segment[0][other]), float(segment[1][other])
+            lo, hi = np.searchsorted(stops, min(a, b)), np.searchsorted(stops, max(a, b))
+            coverage[lo:hi] += 1 if b > a else -1
+
+        k = 0
+        while k < len(coverage):
+            end = k + 1
+            while end < len(coverage) and coverage[end] == coverage[k]:
+                end += 1
+            if coverage[k]:
+                start_point = np.empty(2)
+                end_point = np.empty(2)
+                start_point[axis] = end_point[axis] = value
+                start_point[other], end_point[other] = stops[k], stops[end]
+                if coverage[k] < 0:
+                    start_point, end_point = end_point, start_point
+                edges.extend(np.array([start_point, end_point]) for _ in range(abs(int(coverage[k]))))
+            k = end
+
+    outgoing = {}
+    balance = {}
+    for idx, segment in enumerate(edges):
+        start, end = tuple(segment[0]), tuple(segment[-1])
+        outgoing.setdefault(start, []).append(idx)
+        balance[start] = balance.get(start, 0) + 1
+        balance[end] = balance.get(end, 0) - 1
+    if any(balance.values()):
+        print("Contorni non concatenabili sui tagli, mantenuti separati per cella")
+        return loops
+
+    merged = []
+    used = [False] * len(edges)
+    for first in range(len(edges)):
+        if used[first]:
+            continue
+        origin = tuple(edges[first][0])
+        loop = []
+        idx = first
+        while True:
+            used[idx] = True
+            loop.append(edges[idx])
+            end = tuple(edges[idx][-1])
+            if end == origin:
+                break
+            idx = next(j for j in outgoing[end] if not used[j])
+        merged.append(loop)
+
+    return merged
+
+
+def loop_to_quadratic(segments, max_err=DEFAULT_FLATTEN_TOLERANCE):
+    """
+    Converte un contorno di segmenti in un contorno quadratico TrueType.
+    Le cubiche vengono convertite in quadratiche con cu2qu.
+
+    Returns:
+        Tuple (points, on_curve) senza ripetere il punto iniziale
+    """
+    points = [tuple(segments[0][0])]
+    on_curve = [True]
+
+    for segment in segments:
+        if len(segment) == 2:
+            points.append(tuple(segment[1]))
+            on_curve.append(True)
+        elif len(segment) == 3:
+            points.extend([tuple(segment[1]), tuple(segment[2])])
+            on_curve.extend([False, True])
+        else:
+            quadratic = curve_to_quadratic([tuple(p) for p in segment], max_err)
+            points.extend(tuple(p) for p in quadratic[1:])
+            on_curve.extend([False] * (len(quadratic) - 2) + [True])
+
+    # L'ultimo punto coincide con il primo
+    if len(points) > 1 and np.allclose(points[-1], points[0]) and on_curve[-1]:
+        points.pop()
+        on_curve.pop()
+
+    return points, on_curve
+
+
+def flatten_curve_contours(curve_contours, tolerance=DEFAULT_FLATTEN_TOLERANCE):
+    """
+    Approssima contorni quadratici con spezzate, per le anteprime.
+
+    Returns:
+        GlyphOutline con i contorni approssimati
+    """
+    if not curve_contours:
+        return GlyphOutline()
+    return flatten_quadratic_contours(
+        [points for points, _ in curve_contours],
+        [on for _, on in curve_contours],
+        tolerance
+    )
+
+
+def assemble_letter_curves(session, glyph_name, h_cuts=None, v_cuts=None, normalize=True,
+                           cut_method="horizontal", tolerance=DEFAULT_FLATTEN_TOLERANCE, plan=None):
+    """
+    Assembla un glifo da più font mantenendo le curve originali.
+    Usa la stessa griglia e la stessa assegnazione dei font
+    di mix_fonts_deterministic.
+
+    Args:
+        session: FontSession con i font sorgente già aperti
+        glyph_name: Nome del glifo da assemblare (es. "A")
+        h_cuts: Punti di taglio orizzontali (0-1 normalizzati)
+        v_cuts: Punti di taglio verticali (0-1 normalizzati)
+        normalize: Se True, normalizza le dimensioni dei glifi
+        cut_method: Metodo di taglio ("horizontal", "checkerboard")
+        tolerance: Errore massimo per classificazione e conversione in quadratiche
+        plan: MixPlan da riusare; se indicato sostituisce h_cuts e v_cuts
+
+    Returns:
+        Lista di contorni quadratici (points, on_curve), oppure None
+    """
+    print(f"\n=== Assemblaggio lettera '{glyph_name}' con curve, {len(session)} font ===")
+
+    sources = []
+    for i, source in enumerate(session):
+        try:
+            segments = source.get_segments(glyph_name)
+            if not segments:
+                print(f"  Font {i+1}: nessun contorno per '{glyph_name}'")
+                continue
+
+            if normalize:
+                transform = normalization_transform(source.get_contours(glyph_name), source.cap_height)
+                if transform is None:
+                    continue
+                segments = transform_segments(segments, *transform)
+
+            sources.append(orient_contours(segments, tolerance))
+        except Exception as e:
+            print(f"Errore nel leggere font {source.path}: {str(e)}")
+            traceback.print_exc()
+
+    sources = [s for s in sources if s]
+    if not sources:
+        print(f"Nessun contorno valido per il glifo '{glyph_name}'")
+        return None
+
+    # Spazio totale: bound di tutti i contorni validi
+    points = np.concatenate([ring for source in sources for _, _, ring in source])
+    min_x, min_y = points.min(axis=0)
+    max_x, max_y = points.max(axis=0)
+
+    if len(sources) < 2:
+        x_cuts, y_cuts = [], []
+        font_assignments = [[0]]
+    else:
+        # Stessa griglia e stessa assegnazione del mixaggio con i poligoni
+        if plan is None:
+            plan = MixPlan(h_cuts, v_cuts)
+        plan_x_edges, plan_y_edges = plan.edges(plan.frame(glyph_name, (min_x, min_y, max_x, max_y)))
+        x_cuts, y_cuts = plan_x_edges[1:-1].tolist(), plan_y_edges[1:-1].tolist()
+        font_assignments = plan.layout(len(sources)).assignment.tolist()
+
+    rows = len(y_cuts) + 1
+    cols = len(x_cuts) + 1
+    margin = max(CELL_MARGIN, 2 * tolerance)
+    y_edges = [min_y - margin] + list(y_cuts) + [max_y + margin]
+    x_edges = [min_x - margin] + list(x_cuts) + [max_x + margin]
+
+    print(f"Griglia {rows}x{cols}, tagli y={y_cuts}, tagli x={x_cuts}")
+
+    loops = []
+    for font_idx, source in enumerate(sources):
+        cells = [
+            (i, j) for i in range(rows) for j in range(cols)
+            if font_assignments[i][j] == font_idx
+        ]
+        if not cells:
+            continue
+
+        for segments, ccw, ring in source:
+            pieces = split_at_cuts(segments, x_cuts, y_cuts)
+            piece_cells = [_cell_of(bezier_point(p, 0.5), x_cuts, y_cuts, cols) for p in pieces]
+
+            for i, j in cells:
+                rect = (x_edges[j], y_edges[i], x_edges[j + 1], y_edges[i + 1])
+                loops.extend(clip_contour_to_cell(pieces, piece_cells, i * cols + j, rect, ccw, ring, tolerance))
+
+    result = []
+    for loop in merge_cut_edges(loops, x_cuts, y_cuts):
+        points, on_curve = loop_to_quadratic(loop, tolerance)
+        if len(points) >= 3:
+            result.append((points, on_curve))
+
+    print(f"Mixaggio con curve completato per '{glyph_name}': {len(result)} contorni")
+    return result
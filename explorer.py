@@ -0,0 +1,253 @@
+"""
+Modulo per l'esplorazione combinatoria di una cartella di font.
+Genera tutte le combinazioni di N font (coppie, terne...) per scegliere
+i candidati migliori. Tutte le combinazioni condividono gli stessi font
+aperti e la stessa cache dei pezzi: ogni glifo sorgente viene letto e
+normalizzato una sola volta. La griglia di ogni lettera viene posta sul
+riquadro comune a tutti i font della cartella, così la fascia ritagliata
+di un font in una posizione è la stessa in tutte le combinazioni e viene
+calcolata una volta sola.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import traceback
+from itertools import combinations
+from math import comb
+
+from font_mixer import mix_fonts, DEFAULT_CHARSET
+from font_session import SourcePool
+from geometry_utils import normalization_transform
+from glyph_outline import GlyphOutline
+from outline_cache import OutlineCache
+from piece_cache import PieceCache
+from result_cache import ResultCache
+from bezier_utils import DEFAULT_FLATTEN_TOLERANCE
+from cancellation import CancelToken, GenerationCancelled
+
+# Nome del file indice scritto nella cartella di uscita
+INDEX_FILE = "index.json"
+
+# Estensioni dei font considerati nella cartella
+FONT_EXTENSIONS = (".ttf", ".otf")
+
+
+def list_fonts(font_dir):
+    """Font della cartella, in ordine alfabetico"""
+    return [
+        os.path.join(font_dir, name) for name in sorted(os.listdir(font_dir))
+        if name.lower().endswith(FONT_EXTENSIONS)
+    ]
+
+
+def combination_name(font_paths):
+    """Nome del font di una combinazione, dai nomi dei file sorgente"""
+    stems = [os.path.splitext(os.path.basename(path))[0] for path in font_paths]
+    return "Mix_" + "_".join(re.sub(r"[^A-Za-z0-9]+", "", stem) or "Font" for stem in stems)
+
+
+def letter_frames(pool, font_paths, letters, normalize=True):
+    """
+    Riquadro comune di ogni lettera: unione dei rettangoli di ingombro
+    dei glifi (normalizzati se richiesto) di tutti i font.
+
+    Returns:
+        Dizionario {lettera: (min_x, min_y, max_x, max_y)}
+    """
+    frames = {}
+    for letter in letters:
+        boxes = []
+        for path in font_paths:
+            source = pool.get(path)
+            try:
+                outline = GlyphOutline.from_contours(source.get_contours(letter))
+                if normalize:
+                    transform = normalization_transform(outline, source.cap_height)
+                    if transform is None:
+                        continue
+                    outline = outline.transform(*transform)
+            except Exception as e:
+                print(f"Errore nel leggere '{letter}' da {source.name}: {str(e)}")
+                continue
+            if outline.bounds is not None:
+                boxes.append(outline.bounds)
+        if boxes:
+            boxes = list(zip(*boxes))
+            frames[letter] = (min(boxes[0]), min(boxes[1]), max(boxes[2]), max(boxes[3]))
+    return frames
+
+
+def explore_fonts(font_dir, size=2, output_dir=os.path.join("output", "combinazioni"),
+                  cut_method="equidistante", h_cuts=None, v_cuts=None, normalize=True,
+                  use_vertical_cuts=False, charset=DEFAULT_CHARSET,
+                  flatten_tolerance=DEFAULT_FLATTEN_TOLERANCE, preserve_curves=False,
+                  fit_error=None, clip_backend="shapely", shared_frames=True, seed=None,
+                  cancel_token=None, progress=None):
+    """
+    Genera tutte le combinazioni di size font della cartella.
+
+    Le combinazioni sono generate in ordine lessicografico, così che quelle
+    vicine condividano i primi font; i font restano aperti e i pezzi
+    ritagliati restano in cache per tutta l'esplorazione.
+
+    Con i riquadri comuni (shared_frames) i tagli di una lettera cadono
+    negli stessi punti in tutte le combinazioni; i riquadri vengono scritti
+    nell'indice e mix_fonts(frames=...) riproduce esattamente ogni combinazione.
+    Senza, ogni combinazione è identica a un mix_fonts dei suoi font
+    ma le fasce si riusano solo quando i riquadri coincidono.
+
+    Args:
+        font_dir: Cartella con i font sorgente
+        size: Numero di font di ogni combinazione (2 = coppie, 3 = terne...)
+        output_dir: Cartella dei font generati e dell'indice
+        cut_method: "casuale", "equidistante" o "personalizzato"
+        h_cuts: Tagli orizzontali personalizzati (0-1)
+        v_cuts: Tagli verticali personalizzati (0-1)
+        normalize: Se True, normalizza le dimensioni dei glifi
+        use_vertical_cuts: Se True, mixa a scacchiera con i tagli verticali
+        charset: Caratteri da generare
+        flatten_tolerance: Tolleranza di appiattimento delle curve
+        preserve_curves: Se True, mantiene le curve originali nei glifi
+        fit_error: Se indicato, comprime i contorni poligonali in curve
+        clip_backend: Motore di ritaglio dei poligoni
+        shared_frames: Se True, usa per ogni lettera il riquadro comune a tutti i font
+            (ignorato con i tagli casuali, che cambiano a ogni lettera)
+        seed: Seme dei tagli casuali comune a tutte le combinazioni (None = uno nuovo per ognuna)
+        cancel_token: CancelToken controllato tra una combinazione e l'altra
+        progress: Funzione progress(fatte, totale, nome), opzionale
+
+    Returns:
+        Dizionario dell'indice (scritto anche in output_dir/index.json)
+
+    Raises:
+        ValueError: se la cartella contiene meno di size font
+    """
+    fonts = list_fonts(font_dir)
+    size = int(size)
+    if size < 2:
+        raise ValueError("Ogni combinazione deve avere almeno 2 font")
+    if len(fonts) < size:
+        raise ValueError(f"Servono almeno {size} font in '{font_dir}', trovati {len(fonts)}")
+
+    cancel_token = cancel_token if cancel_token is not None else CancelToken()
+    progress = progress or (lambda done, total, name: None)
+    letters = list(dict.fromkeys(charset))
+    total = comb(len(fonts), size)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Un glifo normalizzato per font e lettera, più le fasce di ogni font
+    # in ogni posizione: la cache deve contenerli tutti senza eliminarne
+    rows = size * 2 if use_vertical_cuts else size
+    piece_cache = PieceCache(max_entries=max(5000, len(fonts) * len(letters) * (rows + 1) * 4))
+    pool = SourcePool(OutlineCache(), flatten_tolerance)
+    result_cache = ResultCache(outline_cache=pool.cache)
+
+    entries = []
+    frames = None
+    start = time.perf_counter()
+    try:
+        if shared_frames and cut_method != "casuale":
+            frames = letter_frames(pool, fonts, letters, normalize)
+
+        for done, combo in enumerate(combinations(fonts, size), 1):
+            cancel_token.check()
+            name = combination_name(combo)
+            entry = {
+                "name": name,
+                "file": f"{name}.ttf",
+                "fonts": [os.path.basename(path) for path in combo],
+                "status": "ok",
+                "seed": None,
+                "letters": 0,
+                "bytes": 0,
+                "error": None,
+            }
+            try:
+                result = mix_fonts(
+                    list(combo), cut_method, h_cuts, v_cuts, normalize, use_vertical_cuts,
+                    font_name=name, charset=letters, flatten_tolerance=flatten_tolerance,
+                    preserve_curves=preserve_curves, fit_error=fit_error, clip_backend=clip_backend,
+                    piece_cache=piece_cache, cancel_token=cancel_token, source_pool=pool,
+                    frames=frames, seed=seed, result_cache=result_cache, output_path=os.path.join(output_dir, entry["file"]),
+                )
+                entry["file"] = os.path.basename(result.output_path)
+                entry["seed"] = result.seed
+                entry["letters"] = len(result.letters)
+                entry["bytes"] = len(result.font_data)
+            except GenerationCancelled:
+                raise
+            except Exception as e:
+                # Una combinazione non riuscita non ferma l'esplorazione
+                print(f"Errore nella combinazione {name}: {str(e)}")
+                traceback.print_exc()
+                entry["status"] = "error"
+                entry["error"] = str(e)
+            entries.append(entry)
+            progress(done, total, name)
+    finally:
+        pool.close()
+
+    index = {
+        "font_dir": os.path.abspath(font_dir),
+        "size": size,
+        "cut_method": cut_method,
+        "charset": "".join(letters),
+        "frames": frames,
+        "combinations": entries,
+        "seconds": round(time.perf_counter() - start, 3),
+        "piece_cache": piece_cache.stats(),
+        "result_cache": result_cache.stats(),
+    }
+    with open(os.path.join(output_dir, INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    return index
+
+
+def main(argv=None):
+    """
+    Entry point dell'esplorazione da riga di comando.
+
+    Returns:
+        Codice di uscita: 0 se tutte le combinazioni sono riuscite, 1 altrimenti,
+        2 se i parametri non sono validi
+    """
+    parser = argparse.ArgumentParser(description="Genera tutte le combinazioni dei font di una cartella")
+    parser.add_argument("font_dir", help="Cartella con i font sorgente")
+    parser.add_argument("--size", type=int, default=2, help="Font per combinazione (2 = coppie, 3 = terne)")
+    parser.add_argument("--output", default=os.path.join("output", "combinazioni"), help="Cartella di uscita")
+    parser.add_argument("--cut-method", default="equidistante",
+                        choices=["casuale", "equidistante", "personalizzato"], help="Metodo di taglio")
+    parser.add_argument("--h-cuts", type=float, nargs="+", help="Tagli orizzontali personalizzati (0-1)")
+    parser.add_argument("--v-cuts", type=float, nargs="+", help="Tagli verticali personalizzati (0-1)")
+    parser.add_argument("--vertical", action="store_true", help="Usa anche i tagli verticali")
+    parser.add_argument("--seed", type=int, help="Seme dei tagli casuali")
+    parser.add_argument("--charset", default=DEFAULT_CHARSET, help="Caratteri da generare")
+    parser.add_argument("--own-frames", action="store_true",
+                        help="Griglia sul riquadro di ogni combinazione (identica a una generazione singola)")
+    args = parser.parse_args(argv)
+
+    def report(done, total, name):
+        print(f"Combinazione {done}/{total}: {name}", file=sys.stderr)
+
+    try:
+        index = explore_fonts(
+            args.font_dir, args.size, args.output, args.cut_method, args.h_cuts, args.v_cuts,
+            use_vertical_cuts=args.vertical, charset=args.charset,
+            shared_frames=not args.own_frames, seed=args.seed, progress=report,
+        )
+    except (OSError, ValueError) as e:
+        print(f"Esplorazione non valida: {str(e)}", file=sys.stderr)
+        return 2
+
+    failed = sum(1 for entry in index["combinations"] if entry["status"] != "ok")
+    print(f"Combinazioni generate: {len(index['combinations']) - failed}/{len(index['combinations'])} "
+          f"in {index['seconds']:.1f} s, indice in {os.path.join(args.output, INDEX_FILE)}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
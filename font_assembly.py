@@ -3,6 +3,7 @@ Modulo per l'assemblaggio e la creazione di font.
 Gestisce la creazione di un font TTF completo a partire dai contorni dei glifi.
 """
 
+import io
 import os
 import time
 import traceback
@@ -13,21 +14,29 @@ from fontTools.ttLib.tables.O_S_2f_2 import Panose
 from fontTools.ttLib.tables._n_a_m_e import NameRecord
 from fontTools.ttLib.tables._c_m_a_p import cmap_format_4
 
-from font_utils import contours_to_glyph
+from font_utils import contours_to_glyph, curve_contours_to_glyph
+from curve_fitting import fit_contours
 from geometry_utils import polygon_to_contours
+from glyph_outline import GlyphOutline
 
 
-def create_alphabet_font(letters_dict, output_path, font_name="MixedFont"):
+def build_alphabet_font(letters_dict, font_name="MixedFont", curves_dict=None, fit_error=None):
     """
-    Crea un font TTF con le lettere specificate.
+    Costruisce in memoria un font TTF con le lettere specificate.
     
     Args:
-        letters_dict: { 'A': [contorni], 'B': [contorni], ... }
-        output_path: percorso dove salvare il file TTF
+        letters_dict: { 'A': GlyphOutline, 'B': GlyphOutline, ... }
         font_name: nome del font
+        curves_dict: { 'A': [(punti, on_curve)], ... } contorni quadratici
+            da usare al posto dei poligoni, se presenti
+        fit_error: Se indicato, i contorni poligonali vengono compressi in curve
+            quadratiche con questo errore massimo (unità del font)
         
     Returns:
-        Tuple (success, result) con success=True/False e result=path/error_message
+        Oggetto TTFont non ancora salvato
+        
+    Raises:
+        Exception: se la costruzione non riesce (l'errore viene prima stampato)
     """
     try:
         new_font = TTFont()
@@ -223,19 +232,24 @@ def create_alphabet_font(letters_dict, output_path, font_name="MixedFont"):
         
         # =============== LETTERE
         for letter, contours in letters_dict.items():
+            contours = GlyphOutline.from_contours(contours)
             if not contours:
                 # Crea un glifo vuoto se non ci sono contorni
                 g = TTGlyphPen(None).glyph()
                 new_font["hmtx"].metrics[letter] = (500, 0)
             else:
-                # Converti i contorni in glifo
-                g = contours_to_glyph(contours)
+                # Converti i contorni in glifo, con le curve se disponibili
+                if curves_dict and curves_dict.get(letter):
+                    g = curve_contours_to_glyph(curves_dict[letter])
+                elif fit_error:
+                    g = curve_contours_to_glyph(fit_contours(contours, fit_error))
+                else:
+                    g = contours_to_glyph(contours)
             
                 # Calcolo avanzamento corretto
-                all_points = [pt for c in contours for pt in c]
-                if all_points:
-                    max_x = max(p[0] for p in all_points)
-                    min_x = min(p[0] for p in all_points)
+                bounds = contours.bounds
+                if bounds:
+                    min_x, _, max_x, _ = bounds
                     width = max_x - min_x
                     
                     # Larghezza avanzamento con padding del 20%
@@ -315,10 +329,36 @@ def create_alphabet_font(letters_dict, output_path, font_name="MixedFont"):
         head_table.yMin = min(all_ymin) if all_ymin else 0
         head_table.yMax = max(all_ymax) if all_ymax else 0
         
-        # =============== SALVA IL FONT CON GESTIONE DEGLI ERRORI
+        return new_font
+        
+    except Exception as e:
+        print(f"Errore nella creazione del font: {str(e)}")
+        traceback.print_exc()
+        raise
+
+
+def font_to_bytes(font):
+    """Compila un TTFont e ne restituisce il contenuto binario"""
+    buffer = io.BytesIO()
+    font.save(buffer)
+    return buffer.getvalue()
+
+
+def write_font_file(font_data, output_path):
+    """
+    Scrive su disco il contenuto binario di un font, con più tentativi
+    (e nomi alternativi) se il file è bloccato.
+    
+    Args:
+        font_data: Contenuto del file (bytes)
+        output_path: percorso dove salvare il file TTF
         
+    Returns:
+        Tuple (success, result) con success=True/False e result=path/error_message
+    """
+    try:
         # Assicuriamoci che la cartella esista
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
         
         # Prova a salvare con diversi tentativi
         max_attempts = 3
@@ -329,11 +369,13 @@ def create_alphabet_font(letters_dict, output_path, font_name="MixedFont"):
                     name_parts = os.path.splitext(output_path)
                     new_path = f"{name_parts[0]}_{attempt+1}{name_parts[1]}"
                     print(f"Tentativo {attempt+1}: Salvataggio come {new_path}")
-                    new_font.save(new_path)
+                    with open(new_path, "wb") as f:
+                        f.write(font_data)
                     print(f"Font salvato in '{new_path}'")
                     return True, new_path
                 else:
-                    new_font.save(output_path)
+                    with open(output_path, "wb") as f:
+                        f.write(font_data)
                     print(f"Font salvato in '{output_path}'")
                     return True, output_path
                     
@@ -349,6 +391,30 @@ def create_alphabet_font(letters_dict, output_path, font_name="MixedFont"):
         return True, output_path
         
     except Exception as e:
-        print(f"Errore nella creazione del font: {str(e)}")
+        print(f"Errore nel salvataggio del font: {str(e)}")
         traceback.print_exc()
-        return False, str(e)
\ No newline at end of file
+        return False, str(e)
+
+
+def create_alphabet_font(letters_dict, output_path, font_name="MixedFont", curves_dict=None, fit_error=None):
+    """
+    Crea un font TTF con le lettere specificate.
+    
+    Args:
+        letters_dict: { 'A': GlyphOutline, 'B': GlyphOutline, ... }
+        output_path: percorso dove salvare il file TTF
+        font_name: nome del font
+        curves_dict: { 'A': [(punti, on_curve)], ... } contorni quadratici
+            da usare al posto dei poligoni, se presenti
+        fit_error: Se indicato, i contorni poligonali vengono compressi in curve
+            quadratiche con questo errore massimo (unità del font)
+        
+    Returns:
+        Tuple (success, result) con success=True/False e result=path/error_message
+    """
+    try:
+        font_data = font_to_bytes(build_alphabet_font(letters_dict, font_name, curves_dict, fit_error))
+    except Exception as e:
+        # L'errore è già stato stampato da build_alphabet_font
+        return False, str(e)
+    return write_font_file(font_data, output_path)
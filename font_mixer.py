@@ -0,0 +1,372 @@
+"""
+Modulo con l'API di generazione senza interfaccia grafica.
+mix_fonts sceglie i tagli, assembla le lettere e costruisce il font
+restituendo i byte del TTF e i contorni dei glifi; l'avanzamento viene
+comunicato con funzioni di callback. I tagli casuali derivano da un seme
+esplicito, quindi ogni generazione può essere riprodotta e messa in cache.
+Non importa PyQt: può essere usato da script e server di build, la GUI
+lo avvolge in FontGeneratorThread.
+"""
+
+import os
+import time
+import random
+import traceback
+from string import ascii_uppercase
+
+from geometry_utils import DEFAULT_CLIP_BACKEND
+from font_assembly import build_alphabet_font, font_to_bytes, write_font_file
+from font_session import FontSession
+from outline_cache import OutlineCache
+from bezier_utils import DEFAULT_FLATTEN_TOLERANCE
+from parallel_assembly import assemble_letter, assemble_letters_parallel
+from mix_plan import MixPlan
+from glyph_outline import GlyphOutline
+from cancellation import CancelToken
+
+# Caratteri generati se non ne vengono indicati altri
+DEFAULT_CHARSET = ascii_uppercase
+
+
+class MixResult:
+    """
+    Risultato di una generazione: byte del font, contorni delle lettere
+    (GlyphOutline, nell'ordine del set di caratteri), curve quadratiche
+    se mantenute, percorso del file se il font è stato scritto su disco
+    e seme dei tagli casuali (None con gli altri metodi).
+    """
+    def __init__(self, font_name, font_data, letters, curves, output_path=None, seed=None, cached=False):
+        self.font_name = font_name
+        self.font_data = font_data
+        self.letters = letters
+        self.curves = curves
+        self.output_path = output_path
+        self.seed = seed
+        self.cached = cached  # True se il font viene dalla cache dei risultati
+
+    def __repr__(self):
+        return f"MixResult({self.font_name}, {len(self.letters)} lettere, {len(self.font_data)} byte)"
+
+    def save(self, output_path):
+        """
+        Scrive il font su disco.
+
+        Returns:
+            Percorso effettivo del file (può cambiare se il file è bloccato)
+
+        Raises:
+            OSError: se il file non può essere scritto
+        """
+        success, result = write_font_file(self.font_data, output_path)
+        if not success:
+            raise OSError(result)
+        self.output_path = result
+        return result
+
+
+def new_seed():
+    """Seme per una nuova generazione casuale"""
+    return random.SystemRandom().randrange(1 << 32)
+
+
+def random_cuts(seed, glyph_name, num_fonts, use_vertical_cuts=False):
+    """
+    Tagli casuali di una lettera, derivati solo dal seme e dal glifo:
+    non dipendono dall'ordine delle lettere né dal generatore globale,
+    quindi sono gli stessi in ogni processo e in ogni esecuzione.
+
+    Args:
+        seed: Seme della generazione
+        glyph_name: Lettera (stringa vuota per i tagli globali)
+        num_fonts: Numero di font da mixare
+        use_vertical_cuts: Se True, estrae anche i tagli verticali
+
+    Returns:
+        Tuple (tagli orizzontali, tagli verticali), ordinati, tra 0.2 e 0.8
+    """
+    rng = random.Random(f"{seed}:{glyph_name}")
+    h_cut_points = sorted(rng.uniform(0.2, 0.8) for _ in range(num_fonts - 1))
+    v_cut_points = sorted(rng.uniform(0.2, 0.8) for _ in range(num_fonts - 1)) if use_vertical_cuts else []
+    return h_cut_points, v_cut_points
+
+
+def choose_cuts(cut_method, num_fonts, h_cuts=None, v_cuts=None, use_vertical_cuts=False, seed=None):
+    """
+    Punti di taglio globali del metodo scelto.
+
+    Args:
+        cut_method: "casuale", "equidistante" o "personalizzato"
+        num_fonts: Numero di font da mixare
+        h_cuts: Tagli orizzontali personalizzati (0-1)
+        v_cuts: Tagli verticali personalizzati (0-1)
+        use_vertical_cuts: Se True, usa anche i tagli verticali
+        seed: Seme dei tagli casuali (se None ne viene estratto uno nuovo)
+
+    Returns:
+        Tuple (nome del metodo, tagli orizzontali, tagli verticali)
+    """
+    if cut_method == "casuale":
+        h_cut_points, v_cut_points = random_cuts(
+            new_seed() if seed is None else seed, "", num_fonts, use_vertical_cuts
+        )
+        return "random", h_cut_points, v_cut_points
+
+    if cut_method == "equidistante":
+        h_cut_points = [float(i+1)/num_fonts for i in range(num_fonts - 1)]
+        return "equal", h_cut_points, h_cut_points.copy() if use_vertical_cuts else []
+
+    # personalizzato
+    h_cut_points = h_cuts[:num_fonts-1] if h_cuts else [0.5] * (num_fonts - 1)
+    v_cut_points = v_cuts[:num_fonts-1] if use_vertical_cuts and v_cuts else []
+    return "custom", h_cut_points, v_cut_points
+
+
+def mix_fonts(font_paths, cut_method="equidistante", h_cuts=None, v_cuts=None, normalize=True,
+              use_vertical_cuts=False, font_name="MixedFont", charset=DEFAULT_CHARSET,
+              flatten_tolerance=DEFAULT_FLATTEN_TOLERANCE, preserve_curves=False, fit_error=None,
+              clip_backend=DEFAULT_CLIP_BACKEND, workers=1, piece_cache=None, cancel_token=None,
+              priority_letters=None, output_path=None, progress=None, on_letter=None, source_pool=None,
+              frames=None, seed=None, result_cache=None):
+    """
+    Genera un font ibrido dai font indicati.
+
+    Args:
+        font_paths: Percorsi dei font sorgente (almeno due)
+        cut_method: "casuale", "equidistante" o "personalizzato"
+        h_cuts: Tagli orizzontali personalizzati (0-1)
+        v_cuts: Tagli verticali personalizzati (0-1)
+        normalize: Se True, normalizza le dimensioni dei glifi
+        use_vertical_cuts: Se True, mixa a scacchiera con i tagli verticali
+        font_name: Nome del font generato
+        charset: Caratteri da generare
+        flatten_tolerance: Tolleranza di appiattimento delle curve (unità font)
+        preserve_curves: Se True, mantiene le curve originali nei glifi
+        fit_error: Se indicato, comprime i contorni poligonali in curve
+        clip_backend: Motore di ritaglio dei poligoni ("shapely" o "numpy")
+        workers: Processi per l'assemblaggio delle lettere (1 = nel thread chiamante)
+        piece_cache: PieceCache riusata tra generazioni (solo con workers=1)
+        cancel_token: CancelToken controllato tra le lettere e tra le fasi
+        priority_letters: Lettere da assemblare per prime
+        output_path: Se indicato, il font viene anche scritto su questo file
+        progress: Funzione progress(percentuale, messaggio), opzionale
+        on_letter: Funzione on_letter(lettera, contorni) chiamata per ogni lettera pronta
+        source_pool: SourcePool con i font già letti da generazioni precedenti
+            (deve avere la stessa tolleranza di appiattimento)
+        frames: Riquadro fisso della griglia per lettera {lettera: (min_x, min_y, max_x, max_y)},
+            nello spazio normalizzato; ignorato con i tagli casuali
+        seed: Seme dei tagli casuali; se None ne viene estratto uno nuovo,
+            restituito in MixResult.seed per riprodurre la generazione
+        result_cache: ResultCache da cui restituire un font già generato
+            con gli stessi font e parametri
+
+    Returns:
+        MixResult
+
+    Raises:
+        ValueError: se i font sono meno di due
+        GenerationCancelled: se la generazione viene annullata
+        RuntimeError, OSError: se il font non può essere creato o scritto
+    """
+    num_fonts = len(font_paths)
+    if num_fonts < 2:
+        raise ValueError("Servono almeno 2 font")
+    if source_pool is not None and source_pool.tolerance != flatten_tolerance:
+        raise ValueError("Il gruppo di font ha una tolleranza di appiattimento diversa")
+
+    cancel_token = cancel_token if cancel_token is not None else CancelToken()
+    progress = progress or (lambda value, message: None)
+    workers = max(1, int(workers))
+    letters = list(dict.fromkeys(charset))
+
+    progress(5, "Inizializzazione...")
+
+    # Il seme viene fissato qui: lo stesso seme dà gli stessi tagli per ogni lettera
+    if cut_method == "casuale":
+        seed = new_seed() if seed is None else seed
+        print(f"Seme dei tagli casuali: {seed}")
+    else:
+        seed = None
+
+    # Scelta del metodo di taglio
+    cut_method_name, h_cut_points, v_cut_points = choose_cuts(
+        cut_method, num_fonts, h_cuts, v_cuts, use_vertical_cuts, seed
+    )
+
+    # Scelta del metodo di mixaggio
+    mix_method = "checkerboard" if use_vertical_cuts else "horizontal"
+
+    # Con tagli fissi griglia e assegnazione dei font sono le stesse
+    # per tutte le lettere: il piano viene costruito una volta sola
+    plan = None
+    if cut_method_name != "random":
+        plan = MixPlan(h_cut_points, v_cut_points, frames=frames)
+
+    # Un font già generato con gli stessi sorgenti e parametri viene restituito subito
+    cache_key = None
+    if result_cache is not None:
+        params = {
+            "cut_method": cut_method_name,
+            "seed": seed,
+            "h_cuts": h_cut_points if seed is None else None,
+            "v_cuts": v_cut_points if seed is None else None,
+            "charset": "".join(letters),
+            "normalize": normalize,
+            "use_vertical_cuts": use_vertical_cuts,
+            "font_name": font_name,
+            "flatten_tolerance": flatten_tolerance,
+            "preserve_curves": preserve_curves,
+            "fit_error": fit_error,
+            "clip_backend": clip_backend,
+            "frames": plan.frames if plan is not None else None,
+        }
+        try:
+            cache_key = result_cache.key(font_paths, params)
+            cached = result_cache.load(cache_key)
+        except OSError as e:
+            print(f"Cache dei risultati non disponibile: {str(e)}")
+            cached = None
+        if cached is not None:
+            print(f"Font già generato con gli stessi parametri: {result_cache.stats()}")
+            font_data, letters_dict, curves_dict = cached
+            if on_letter is not None:
+                for letter, contours in letters_dict.items():
+                    on_letter(letter, contours)
+            result = MixResult(font_name, font_data, letters_dict, curves_dict, seed=seed, cached=True)
+            return _finish(result, output_path, cancel_token, progress)
+
+    # Punti di taglio di ogni lettera, decisi qui per non dipendere
+    # dall'ordine in cui i processi completano le lettere
+    tasks = []
+    for letter in letters:
+        # Decidi se usare parametri diversi per ogni lettera (per varietà)
+        if cut_method_name == "random":
+            # Tagli propri di ogni lettera, derivati dal seme e dal glifo
+            letter_h_cuts, letter_v_cuts = random_cuts(seed, letter, num_fonts, use_vertical_cuts)
+        else:
+            # Usa i punti di taglio globali
+            letter_h_cuts = h_cut_points
+            letter_v_cuts = v_cut_points
+
+        tasks.append((
+            letter, letter_h_cuts, letter_v_cuts, normalize, mix_method,
+            clip_backend, preserve_curves, flatten_tolerance, plan
+        ))
+
+    # Le lettere indicate vengono assemblate per prime
+    # (i tagli casuali sono già stati estratti nell'ordine dei caratteri)
+    if priority_letters:
+        first = set(priority_letters)
+        tasks.sort(key=lambda task: task[0] not in first)
+
+    # Debug: mostra i valori usati per il mixaggio
+    print(f"\nMetodo di mixaggio: {mix_method}")
+    if plan is not None:
+        print(f"- {plan}")
+    else:
+        for task in tasks:
+            print(f"- Lettera {task[0]}: tagli orizzontali {task[1]}, tagli verticali {task[2]}")
+
+    letters_dict = {}
+    curves_dict = {}
+    failed_letters = []
+
+    def store_letter(letter, contours, curves):
+        letters_dict[letter] = contours
+        if curves is not None:
+            curves_dict[letter] = curves
+        if on_letter is not None:
+            on_letter(letter, contours)
+
+    cancel_token.check()
+
+    # Apre ogni font sorgente una sola volta per tutta la generazione
+    if source_pool is not None:
+        session = source_pool.session(font_paths)
+    else:
+        session = FontSession(font_paths, OutlineCache(), flatten_tolerance)
+    with session:
+        if workers > 1:
+            # I glifi vengono letti qui una volta sola e inviati ai processi
+            progress(5, "Lettura dei glifi sorgente...")
+            session.preload(letters, segments=preserve_curves)
+            cancel_token.check()
+
+            results = assemble_letters_parallel(session, tasks, workers)
+            for done, (letter, contours, curves, error) in enumerate(results, 1):
+                if cancel_token.cancelled:
+                    # Chiude il gruppo di processi: le lettere non avviate vengono annullate
+                    results.close()
+                    cancel_token.check()
+                if error:
+                    print(f"Errore nell'elaborazione della lettera {letter}: {error}")
+                    failed_letters.append(letter)
+                store_letter(letter, contours, curves)
+                progress(5 + int(85 * (done / len(letters))), f"Lettera {letter} completata ({done}/{len(letters)})")
+        else:
+            # Processa ogni lettera
+            for i, task in enumerate(tasks):
+                cancel_token.check()
+                letter = task[0]
+                progress(5 + int(85 * (i / len(letters))), f"Elaborazione lettera {letter}...")
+
+                try:
+                    contours, curves = assemble_letter(session, *task, piece_cache=piece_cache)
+                    store_letter(letter, contours, curves)
+                except Exception as e:
+                    print(f"Errore nell'elaborazione della lettera {letter}: {str(e)}")
+                    traceback.print_exc()
+                    # Se c'è un errore, metti un contorno vuoto
+                    store_letter(letter, GlyphOutline(), None)
+                    failed_letters.append(letter)
+
+    # Lettere nell'ordine dei caratteri, non in quello di completamento
+    letters_dict = {letter: letters_dict[letter] for letter in letters}
+    curves_dict = {letter: curves_dict[letter] for letter in letters if letter in curves_dict}
+
+    if piece_cache is not None:
+        print(f"Cache dei pezzi: {piece_cache.stats()}")
+
+    cancel_token.check()
+    progress(90, "Creazione del font...")
+
+    try:
+        font = build_alphabet_font(letters_dict, font_name, curves_dict if preserve_curves else None, fit_error)
+        font_data = font_to_bytes(font)
+    except Exception as e:
+        raise RuntimeError(str(e)) from e
+
+    result = MixResult(font_name, font_data, letters_dict, curves_dict, seed=seed)
+    if failed_letters:
+        # Un errore può essere passeggero: il font incompleto non va in cache
+        print(f"Lettere non assemblate: {', '.join(failed_letters)}; il font non viene messo in cache")
+    elif cache_key is not None:
+        result_cache.store(cache_key, font_data, letters_dict, curves_dict if preserve_curves else None)
+
+    return _finish(result, output_path, cancel_token, progress)
+
+
+def _finish(result, output_path, cancel_token, progress):
+    """Scrive il font se richiesto e conclude la generazione"""
+    # Una generazione già annullata non scrive il font
+    cancel_token.check()
+    if output_path:
+        try:
+            result.save(output_path)
+        except OSError as e:
+            # Se c'è un errore di permesso, prova con un nome alternativo
+            if "Permission denied" not in str(e):
+                raise
+            name_parts = os.path.splitext(output_path)
+            result.save(f"{name_parts[0]}_{int(time.time())}{name_parts[1]}")
+
+    # Una generazione annullata durante la scrittura non restituisce risultati
+    # e non lascia su disco il file appena scritto
+    if cancel_token.cancelled and result.output_path:
+        try:
+            os.remove(result.output_path)
+        except OSError as e:
+            print(f"Impossibile eliminare il font annullato {result.output_path}: {str(e)}")
+        result.output_path = None
+    cancel_token.check()
+    progress(100, "Completato!")
+    return result
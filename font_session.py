@@ -0,0 +1,259 @@
+"""
+Modulo per la gestione dei font sorgente durante una generazione.
+Apre ogni font una sola volta e mantiene disponibili glifi, cmap e metriche.
+"""
+
+import os
+import traceback
+from fontTools.ttLib import TTFont
+
+from font_utils import get_glyph_contours, get_glyph_segments, get_cap_height, flatten_params
+from bezier_utils import DEFAULT_FLATTEN_TOLERANCE
+
+
+class SourceFont:
+    """
+    Font sorgente aperto una sola volta per l'intera generazione.
+    Le tabelle vengono caricate su richiesta (lazy) alla prima lettura;
+    con una cache dei contorni il font non viene aperto se tutti i glifi sono in cache.
+    """
+    def __init__(self, path, cache=None, tolerance=DEFAULT_FLATTEN_TOLERANCE):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.cache = cache
+        self.tolerance = tolerance
+        self._font = None
+        self._cmap = None
+        self._contours = {}
+        self._segments = {}
+        self._font_metrics = None
+        self._identity = None
+
+    @property
+    def font(self):
+        """Oggetto TTFont, aperto al primo accesso"""
+        if self._font is None:
+            print(f"Apertura font: {self.name}")
+            self._font = TTFont(self.path, lazy=True)
+        return self._font
+
+    @property
+    def glyph_set(self):
+        """Glyph set del font"""
+        return self.font.getGlyphSet()
+
+    @property
+    def cmap(self):
+        """Mappa codepoint -> nome glifo"""
+        if self._cmap is None:
+            self._cmap = self.font.getBestCmap() or {}
+        return self._cmap
+
+    @property
+    def font_metrics(self):
+        """
+        Metriche del font usate dalla normalizzazione, lette una sola volta;
+        con la cache dei contorni vengono dall'indice e il font non viene aperto.
+        """
+        if self._font_metrics is None:
+            metrics = self.cache.load_metrics(self.path) if self.cache is not None else None
+            if metrics is None:
+                metrics = {
+                    "cap_height": get_cap_height(self.font),
+                    "units_per_em": self.font["head"].unitsPerEm,
+                }
+                if self.cache is not None:
+                    self.cache.store_metrics(self.path, metrics)
+            self._font_metrics = metrics
+        return self._font_metrics
+
+    @property
+    def units_per_em(self):
+        """Unità per em dalla tabella head"""
+        return self.font_metrics["units_per_em"]
+
+    @property
+    def identity(self):
+        """Percorso, data di modifica e dimensione del file: cambia se il font viene sostituito"""
+        if self._identity is None:
+            stat = os.stat(self.path)
+            self._identity = (self.path, stat.st_mtime_ns, stat.st_size)
+        return self._identity
+
+    @property
+    def cap_height(self):
+        """Altezza delle maiuscole dalle metriche del font"""
+        return self.font_metrics["cap_height"]
+
+    @property
+    def metrics(self):
+        """Metriche orizzontali {glifo: (advance, lsb)}"""
+        return self.font["hmtx"].metrics
+
+    def glyph_name_for(self, char):
+        """
+        Risolve il nome del glifo per un carattere usando la cmap.
+        Se il carattere non è mappato restituisce il nome così com'è.
+        """
+        if len(char) == 1:
+            glyph_name = self.cmap.get(ord(char))
+            if glyph_name:
+                return glyph_name
+        return char
+
+    def get_contours(self, char):
+        """
+        Restituisce i contorni (GlyphOutline) del glifo associato al carattere.
+        I contorni estratti vengono memorizzati per le richieste successive.
+        """
+        if char not in self._contours:
+            contours = None
+            params = flatten_params(self.tolerance)
+            if self.cache is not None:
+                contours = self.cache.load(self.path, char, params)
+            if contours is None:
+                glyph_name = self.glyph_name_for(char)
+                contours = get_glyph_contours(self.font, glyph_name, self.tolerance)
+                if self.cache is not None:
+                    self.cache.store(self.path, char, params, contours)
+            self._contours[char] = contours
+        return self._contours[char]
+
+    def get_segments(self, char):
+        """
+        Restituisce i contorni del glifo come segmenti di Bézier non approssimati.
+        Usati dal mixaggio che mantiene le curve.
+        """
+        if char not in self._segments:
+            self._segments[char] = get_glyph_segments(self.font, self.glyph_name_for(char))
+        return self._segments[char]
+
+    def preload(self, chars, segments=False):
+        """
+        Legge in anticipo i contorni (e se richiesto i segmenti) dei caratteri indicati,
+        così la sorgente può essere inviata ad altri processi già pronta.
+        """
+        self.font_metrics
+        for char in chars:
+            self.get_contours(char)
+            if segments:
+                self.get_segments(char)
+
+    def __getstate__(self):
+        # Il file aperto resta nel processo che lo ha aperto; nei processi
+        # di lavoro la cache su disco non viene scritta in concorrenza
+        state = self.__dict__.copy()
+        state["_font"] = None
+        state["cache"] = None
+        return state
+
+    def close(self):
+        """Chiude il file del font se aperto"""
+        if self._font is not None:
+            self._font.close()
+            self._font = None
+
+
+class FontSession:
+    """
+    Sessione di lavoro su un insieme di font sorgente.
+    Sostituisce i percorsi ai font nelle funzioni di assemblaggio:
+    ogni font viene letto una sola volta per tutta la generazione.
+    """
+    def __init__(self, font_paths, cache=None, tolerance=DEFAULT_FLATTEN_TOLERANCE, pool=None):
+        """
+        Args:
+            font_paths: Percorsi dei font sorgente
+            cache: OutlineCache su disco (opzionale)
+            tolerance: Tolleranza di appiattimento delle curve
+            pool: SourcePool da cui prendere i font già aperti; in questo caso
+                cache e tolleranza sono quelle del gruppo e i font non vengono chiusi
+        """
+        self.pool = pool
+        if pool is not None:
+            cache, tolerance = pool.cache, pool.tolerance
+        self.cache = cache
+        self.tolerance = tolerance
+        if pool is not None:
+            self.fonts = [pool.get(path) for path in font_paths]
+        else:
+            self.fonts = [SourceFont(path, cache, tolerance) for path in font_paths]
+
+    def __len__(self):
+        return len(self.fonts)
+
+    def __iter__(self):
+        return iter(self.fonts)
+
+    def __getitem__(self, index):
+        return self.fonts[index]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+        return False
+
+    @property
+    def font_paths(self):
+        """Percorsi dei font della sessione"""
+        return [source.path for source in self.fonts]
+
+    def preload(self, chars, segments=False):
+        """Legge in anticipo i glifi dei caratteri indicati da tutti i font"""
+        for source in self.fonts:
+            source.preload(chars, segments)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["cache"] = None
+        return state
+
+    def close(self):
+        """Chiude tutti i font aperti dalla sessione (non quelli di un SourcePool)"""
+        if self.pool is not None:
+            return
+        for source in self.fonts:
+            try:
+                source.close()
+            except Exception as e:
+                print(f"Errore nella chiusura del font {source.name}: {str(e)}")
+                traceback.print_exc()
+
+
+class SourcePool:
+    """
+    Font sorgente condivisi da più generazioni nello stesso processo
+    (ad esempio i lavori di un batch): ogni file viene aperto e letto
+    una sola volta, e contorni e metriche restano in memoria tra una
+    generazione e l'altra. Le sessioni create dal gruppo non chiudono i font.
+    """
+    def __init__(self, cache=None, tolerance=DEFAULT_FLATTEN_TOLERANCE):
+        self.cache = cache
+        self.tolerance = tolerance
+        self.fonts = {}
+
+    def __len__(self):
+        return len(self.fonts)
+
+    def get(self, path):
+        """SourceFont del percorso, creato alla prima richiesta"""
+        key = os.path.abspath(path)
+        if key not in self.fonts:
+            self.fonts[key] = SourceFont(path, self.cache, self.tolerance)
+        return self.fonts[key]
+
+    def session(self, font_paths):
+        """FontSession con i font del gruppo"""
+        return FontSession(font_paths, pool=self)
+
+    def close(self):
+        """Chiude tutti i font del gruppo"""
+        for source in self.fonts.values():
+            try:
+                source.close()
+            except Exception as e:
+                print(f"Errore nella chiusura del font {source.name}: {str(e)}")
+                traceback.print_exc()
+        self.fonts.clear()
@@ -4,11 +4,31 @@ Contiene funzioni per estrarre contorni dai glifi e normalizzarli.
 """
 
 import traceback
+import numpy as np
 from fontTools.ttLib import TTFont
 from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.pens.basePen import BasePen
 from shapely.ops import unary_union
 
-def get_glyph_contours(font: TTFont, glyph_name: str):
+from bezier_utils import DEFAULT_FLATTEN_TOLERANCE, flatten_curves
+from glyph_outline import GlyphOutline
+
+# Rapporto tipico tra x-height e cap height, se il font non indica la seconda
+X_HEIGHT_RATIO = 0.7
+
+# Frazione tipica dell'altezza tra ascendente e discendente occupata dalle maiuscole
+CAP_HEIGHT_RATIO = 0.7
+
+
+def flatten_params(tolerance=DEFAULT_FLATTEN_TOLERANCE):
+    """
+    Restituisce i parametri di appiattimento delle curve.
+    Usati come parte della chiave della cache dei contorni.
+    """
+    return {"tolerance": float(tolerance)}
+
+
+def get_glyph_contours(font: TTFont, glyph_name: str, tolerance=DEFAULT_FLATTEN_TOLERANCE):
     """
     Estrae i contorni di un glifo da un font TTF o OTF.
     Gestisce in modo corretto sia font TrueType che OpenType/CFF.
@@ -16,111 +36,184 @@ def get_glyph_contours(font: TTFont, glyph_name: str):
     Args:
         font: oggetto TTFont
         glyph_name: nome del glifo (es. "A")
+        tolerance: deviazione massima ammessa nell'approssimazione delle curve
         
     Returns:
-        Lista di contorni, dove ogni contorno è una lista di tuple (x, y)
+        GlyphOutline con i contorni del glifo
     """
     try:
         # Verifica se è un font CFF (OpenType)
         is_cff = "CFF " in font or "CFF" in font
         
         if is_cff:
-            return get_cff_glyph_contours(font, glyph_name)
+            return get_cff_glyph_contours(font, glyph_name, tolerance)
         elif "glyf" in font:
-            return get_ttf_glyph_contours(font, glyph_name)
+            return get_ttf_glyph_contours(font, glyph_name, tolerance)
         else:
             print(f"Tipo di font non supportato: {list(font.keys())}")
-            return []
+            return GlyphOutline()
             
     except Exception as e:
         print(f"Errore nella lettura dei contorni: {str(e)}")
         traceback.print_exc()
-        return []
+        return GlyphOutline()
 
 
-def get_ttf_glyph_contours(font: TTFont, glyph_name: str):
+def get_ttf_glyph_contours(font: TTFont, glyph_name: str, tolerance=DEFAULT_FLATTEN_TOLERANCE):
     """
     Estrae i contorni di un glifo da un font TrueType.
-    Gestisce correttamente i glifi compositi.
+    Gestisce correttamente i glifi compositi, i punti fuori curva
+    e i punti sulla curva impliciti tra due punti fuori curva.
+    Le quadratiche di tutto il glifo vengono appiattite in blocco.
     
     Args:
         font: oggetto TTFont
         glyph_name: nome del glifo (es. "A")
+        tolerance: deviazione massima ammessa, in unità del font
         
     Returns:
-        Lista di contorni, dove ogni contorno è una lista di tuple (x, y)
+        GlyphOutline con i contorni del glifo
     """
     try:
         glyf_table = font["glyf"]
         if glyph_name not in glyf_table:
-            return []
+            return GlyphOutline()
             
         glyph = glyf_table[glyph_name]
         
-        # Gestione dei glifi compositi
-        if glyph.isComposite():
-            components = []
-            for comp in glyph.components:
-                base_contours = get_ttf_glyph_contours(font, comp.glyphName)
-                
-                # Trasforma le coordinate secondo la matrice di trasformazione
-                transformed_contours = []
-                for contour in base_contours:
-                    transformed_contour = [
-                        (x * comp.transform[0] + y * comp.transform[2] + comp.transform[4], 
-                         x * comp.transform[1] + y * comp.transform[3] + comp.transform[5])
-                        for x, y in contour
-                    ]
-                    transformed_contours.append(transformed_contour)
-                
-                components.extend(transformed_contours)
-            return components
-        
-        # Gestione dei glifi semplici
-        if not hasattr(glyph, "coordinates") or glyph.numberOfContours <= 0:
-            return []
+        # getCoordinates risolve anche i componenti dei glifi compositi
+        coordinates, end_pts, flags = glyph.getCoordinates(glyf_table)
+        if not end_pts:
+            return GlyphOutline()
         
-        coordinates = glyph.coordinates
-        end_pts = glyph.endPtsOfContours
+        coords = np.array(coordinates, dtype=np.float64).reshape(-1, 2)
+        on_curve = (np.frombuffer(bytes(flags), dtype=np.uint8) & 1).astype(bool)
         
-        contours = []
+        # Suddivide punti e flag nei singoli contorni
+        points_list = []
+        on_list = []
         start = 0
-        
         for end in end_pts:
-            points = []
-            for i in range(start, end + 1):
-                x, y = coordinates[i]
-                points.append((x, y))
-                
-            # Chiudi il contorno se necessario
-            if points and points[0] != points[-1]:
-                points.append(points[0])
-                
-            contours.append(points)
+            if end >= start:
+                points_list.append(coords[start:end + 1])
+                on_list.append(on_curve[start:end + 1])
             start = end + 1
         
-        return contours
+        return flatten_quadratic_contours(points_list, on_list, tolerance)
     
     except Exception as e:
         print(f"Errore estrazione TTF: {str(e)}")
         traceback.print_exc()
-        return []
+        return GlyphOutline()
+
+
+def flatten_quadratic_contours(points_list, on_list, tolerance=DEFAULT_FLATTEN_TOLERANCE):
+    """
+    Approssima contorni quadratici in formato TrueType con spezzate.
+    Le quadratiche di tutti i contorni vengono appiattite in blocco.
+    
+    Args:
+        points_list: Lista di array (N, 2) con i punti di ogni contorno
+        on_list: Lista di array (N,) di booleani, True per i punti sulla curva
+        tolerance: deviazione massima ammessa
+        
+    Returns:
+        GlyphOutline con i contorni chiusi
+    """
+    # Normalizza ogni contorno: punti impliciti espliciti,
+    # primo punto sulla curva e contorno chiuso
+    decoded = [
+        _decode_quadratic_contour(np.asarray(points, dtype=np.float64).reshape(-1, 2), np.asarray(on, dtype=bool))
+        for points, on in zip(points_list, on_list) if len(points)
+    ]
+    if not decoded:
+        return GlyphOutline()
+    
+    all_points = np.concatenate([points for points, _ in decoded])
+    all_on = np.concatenate([on for _, on in decoded])
+    lengths = np.array([len(points) for points, _ in decoded])
+    contour_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    
+    # Ogni punto fuori curva è il controllo di una quadratica
+    # tra il punto precedente e il successivo (entrambi sulla curva)
+    off_idx = np.nonzero(~all_on)[0]
+    ctrl = np.stack([all_points[off_idx - 1], all_points[off_idx], all_points[off_idx + 1]], axis=1)
+    curve_points, curve_offsets = flatten_curves(ctrl, tolerance)
+    
+    # Quanti punti produce ogni indice: 1 per l'inizio del contorno e per i
+    # tratti rettilinei, i punti della curva per i punti fuori curva,
+    # 0 per il punto sulla curva che chiude una quadratica (già incluso)
+    counts = np.where(all_on, 1, 0)
+    after_off = np.zeros(len(all_on), dtype=bool)
+    after_off[1:] = ~all_on[:-1]
+    after_off[contour_starts] = False
+    counts[after_off] = 0
+    counts[off_idx] = np.diff(curve_offsets)
+    
+    base = np.arange(len(all_points))
+    base[off_idx] = len(all_points) + curve_offsets[:-1]
+    
+    # Indici di raccolta nell'array combinato (punti originali + punti delle curve)
+    total = counts.sum()
+    run_starts = np.cumsum(counts) - counts
+    gather = np.repeat(base, counts) + (np.arange(total) - np.repeat(run_starts, counts))
+    flattened = np.concatenate([all_points, curve_points])[gather]
+    
+    # Offset dei singoli contorni nel risultato
+    offsets = np.zeros(len(decoded) + 1, dtype=np.int64)
+    offsets[1:] = np.add.reduceat(counts, contour_starts).cumsum()
+    return GlyphOutline(flattened, offsets)
 
 
-def get_cff_glyph_contours(font: TTFont, glyph_name: str):
+def _decode_quadratic_contour(points, on_curve):
+    """
+    Rende espliciti i punti sulla curva impliciti di un contorno TrueType.
+    Inserisce il punto medio tra due punti fuori curva consecutivi,
+    ruota il contorno in modo che inizi con un punto sulla curva e lo chiude.
+    
+    Args:
+        points: Array (N, 2) dei punti del contorno
+        on_curve: Array (N,) di booleani, True per i punti sulla curva
+        
+    Returns:
+        Tuple (points, on_curve) con il contorno chiuso
+    """
+    # Coppie consecutive (con chiusura ciclica) di punti fuori curva
+    next_on = np.roll(on_curve, -1)
+    off_off = np.nonzero(~on_curve & ~next_on)[0]
+    if len(off_off):
+        midpoints = (points[off_off] + np.roll(points, -1, axis=0)[off_off]) / 2
+        points = np.insert(points, off_off + 1, midpoints, axis=0)
+        on_curve = np.insert(on_curve, off_off + 1, True)
+    
+    # Il contorno deve iniziare con un punto sulla curva
+    first_on = int(np.argmax(on_curve))
+    points = np.roll(points, -first_on, axis=0)
+    on_curve = np.roll(on_curve, -first_on)
+    
+    # Chiude il contorno ripetendo il primo punto
+    points = np.vstack([points, points[:1]])
+    on_curve = np.append(on_curve, True)
+    return points, on_curve
+
+
+def get_cff_glyph_contours(font: TTFont, glyph_name: str, tolerance=DEFAULT_FLATTEN_TOLERANCE):
     """
     Estrae i contorni di un glifo da un font OpenType (CFF).
-    Approssima le curve di Bézier con segmenti lineari.
+    Approssima le curve di Bézier con segmenti lineari; il numero di segmenti
+    di ogni curva è scelto in base alla tolleranza.
     
     Args:
         font: oggetto TTFont
         glyph_name: nome del glifo (es. "A")
+        tolerance: deviazione massima ammessa, in unità del font
         
     Returns:
-        Lista di contorni, dove ogni contorno è una lista di tuple (x, y)
+        GlyphOutline con i contorni del glifo
     """
     try:
         from fontTools.pens.recordingPen import RecordingPen
+        from fontTools.pens.basePen import decomposeQuadraticSegment
         
         # Usa CFF o CFF2 a seconda di quale è presente
         cff_table_tag = "CFF " if "CFF " in font else "CFF"
@@ -132,107 +225,235 @@ def get_cff_glyph_contours(font: TTFont, glyph_name: str):
         
         if glyph_name not in char_strings:
             print(f"CFF: Glifo '{glyph_name}' non trovato nel font")
-            return []
+            return GlyphOutline()
         
         # Usa RecordingPen per registrare le operazioni di disegno
         pen = RecordingPen()
         char_strings[glyph_name].draw(pen)
         
-        # Estrai i contorni dal pen
-        contours = []
+        # Prima passata: raccoglie le curve di tutti i contorni del glifo.
+        # Ogni contorno è una lista di elementi: un punto (x, y) per i tratti
+        # rettilinei oppure ("cubic", i) / ("quad", i) per le curve.
+        raw_contours = []
+        cubics = []
+        quads = []
         current_contour = None
+        last_point = None
         
         for operator, operands in pen.value:
             if operator == "moveTo":
                 if current_contour:
-                    contours.append(current_contour)
-                current_contour = [tuple(operands[0])]  # Converti a tuple
+                    raw_contours.append((current_contour, False))
+                last_point = tuple(operands[0])
+                current_contour = [last_point]
                 
-            # Approssimazione curves con alta risoluzione
             elif operator == "curveTo":
                 if current_contour:
-                    p0 = current_contour[-1]
-                    p1, p2, p3 = (tuple(op) for op in operands)
-                    
-                    # Aumenta la risoluzione
-                    steps = 20
-                    for t in (i/steps for i in range(1, steps+1)):
-                        x = (1-t)**3 * p0[0] + 3*(1-t)**2*t * p1[0] + 3*(1-t)*t**2 * p2[0] + t**3 * p3[0]
-                        y = (1-t)**3 * p0[1] + 3*(1-t)**2*t * p1[1] + 3*(1-t)*t**2 * p2[1] + t**3 * p3[1]
-                        current_contour.append((x, y))
+                    cubics.append((last_point,) + tuple(tuple(op) for op in operands))
+                    current_contour.append(("cubic", len(cubics) - 1))
+                    last_point = tuple(operands[-1])
                         
-            # Approssimazione per curve quadratiche
             elif operator == "qCurveTo":
-                if current_contour and operands:
-                    p0 = current_contour[-1]
-                    control_points = operands
-                    
-                    # L'ultimo punto è il punto finale
-                    for i in range(len(control_points) - 1):
-                        p1 = tuple(control_points[i])
-                        p2 = tuple(control_points[i+1])
-                        
-                        # Approssimazione
-                        steps = 10
-                        for t in (i/steps for i in range(1, steps+1)):
-                            x = (1-t)**2 * p0[0] + 2*(1-t)*t * p1[0] + t**2 * p2[0]
-                            y = (1-t)**2 * p0[1] + 2*(1-t)*t * p1[1] + t**2 * p2[1]
-                            current_contour.append((x, y))
-                            
-                        p0 = p2  # Preparati per il prossimo segmento
+                if current_contour and len(operands) == 1:
+                    last_point = tuple(operands[0])
+                    current_contour.append(last_point)
+                elif current_contour and operands:
+                    # Scompone la sequenza in segmenti con punti impliciti
+                    for p1, p2 in decomposeQuadraticSegment(operands):
+                        quads.append((last_point, tuple(p1), tuple(p2)))
+                        current_contour.append(("quad", len(quads) - 1))
+                        last_point = tuple(p2)
                         
             elif operator == "lineTo":
                 if current_contour:
-                    current_contour.append(tuple(operands[0]))
+                    last_point = tuple(operands[0])
+                    current_contour.append(last_point)
                     
             elif operator == "closePath":
                 if current_contour is not None and current_contour:
-                    # Chiudi il contorno
-                    if current_contour[0] != current_contour[-1]:
-                        current_contour.append(current_contour[0])
-                    contours.append(current_contour)
+                    raw_contours.append((current_contour, True))
                     current_contour = None
         
         # Aggiungi l'ultimo contorno se necessario
         if current_contour is not None and current_contour:
-            contours.append(current_contour)
+            raw_contours.append((current_contour, False))
+        
+        # Seconda passata: tutte le curve del glifo valutate in blocco
+        curve_points = {
+            "cubic": flatten_curves(np.array(cubics, dtype=np.float64).reshape(-1, 4, 2), tolerance),
+            "quad": flatten_curves(np.array(quads, dtype=np.float64).reshape(-1, 3, 2), tolerance),
+        }
+        
+        contours = [
+            _assemble_contour(items, curve_points, closed)
+            for items, closed in raw_contours
+        ]
         
         # Debug
         print(f"CFF: Estratti {len(contours)} contorni per il glifo '{glyph_name}'")
         
-        return contours
+        return GlyphOutline.from_contours(contours)
     except Exception as e:
         print(f"Errore CFF: {str(e)}")
         traceback.print_exc()
+        return GlyphOutline()
+
+
+def _assemble_contour(items, curve_points, closed):
+    """
+    Ricompone un contorno dai suoi elementi dopo la valutazione delle curve.
+    
+    Args:
+        items: Lista di punti (x, y) e riferimenti ("cubic"/"quad", indice)
+        curve_points: { tipo: (points, offsets) } restituito da flatten_curves
+        closed: Se True il contorno viene chiuso sul primo punto
+        
+    Returns:
+        Array NumPy (N, 2) con i punti del contorno
+    """
+    pieces = []
+    line_points = []
+    
+    for item in items:
+        if isinstance(item[0], str):
+            if line_points:
+                pieces.append(np.array(line_points, dtype=np.float64))
+                line_points = []
+            points, offsets = curve_points[item[0]]
+            pieces.append(points[offsets[item[1]]:offsets[item[1] + 1]])
+        else:
+            line_points.append(item)
+    
+    if line_points:
+        pieces.append(np.array(line_points, dtype=np.float64))
+    
+    contour = np.concatenate(pieces)
+    
+    # Chiudi il contorno
+    if closed and not np.array_equal(contour[0], contour[-1]):
+        contour = np.vstack([contour, contour[:1]])
+    
+    return contour
+
+
+class SegmentPen(BasePen):
+    """
+    Penna che registra i contorni come liste di segmenti di Bézier.
+    Ogni segmento è un array (grado + 1, 2) di punti di controllo:
+    2 punti per le linee, 3 per le quadratiche, 4 per le cubiche.
+    """
+    def __init__(self, glyphSet=None):
+        super().__init__(glyphSet)
+        self.contours = []
+        self._segments = None
+        self._start = None
+
+    def _moveTo(self, pt):
+        self._finish()
+        self._segments = []
+        self._start = pt
+
+    def _lineTo(self, pt):
+        current = self._getCurrentPoint()
+        if current != pt:
+            self._segments.append(np.array([current, pt], dtype=np.float64))
+
+    def _qCurveToOne(self, pt1, pt2):
+        self._segments.append(np.array([self._getCurrentPoint(), pt1, pt2], dtype=np.float64))
+
+    def _curveToOne(self, pt1, pt2, pt3):
+        self._segments.append(np.array([self._getCurrentPoint(), pt1, pt2, pt3], dtype=np.float64))
+
+    def _closePath(self):
+        # Chiude il contorno con un segmento rettilineo se necessario
+        if self._segments is not None:
+            self._lineTo(self._start)
+        self._finish()
+
+    def _endPath(self):
+        self._closePath()
+
+    def _finish(self):
+        if self._segments:
+            self.contours.append(self._segments)
+        self._segments = None
+
+
+def get_glyph_segments(font: TTFont, glyph_name: str):
+    """
+    Estrae i contorni di un glifo come segmenti di Bézier non approssimati.
+    
+    Args:
+        font: oggetto TTFont
+        glyph_name: nome del glifo (es. "A")
+        
+    Returns:
+        Lista di contorni, ognuno lista di array di punti di controllo
+    """
+    try:
+        glyph_set = font.getGlyphSet()
+        if glyph_name not in glyph_set:
+            return []
+        pen = SegmentPen(glyph_set)
+        glyph_set[glyph_name].draw(pen)
+        return pen.contours
+    except Exception as e:
+        print(f"Errore nell'estrazione dei segmenti: {str(e)}")
+        traceback.print_exc()
         return []
 
 
+def get_cap_height(font):
+    """
+    Altezza delle maiuscole di un font letta dalle metriche, senza disegnare glifi.
+    Usa la cap height della tabella OS/2; se manca la ricava dalla x-height
+    o dall'ascendente e discendente (OS/2, poi hhea), infine da unitsPerEm.
+    
+    Args:
+        font: oggetto TTFont
+        
+    Returns:
+        Altezza delle maiuscole in unità del font
+    """
+    units_per_em = font["head"].unitsPerEm
+    os2 = font["OS/2"] if "OS/2" in font else None
+    
+    if os2 is not None and os2.version >= 2:
+        if getattr(os2, "sCapHeight", 0) > 0:
+            return float(os2.sCapHeight)
+        if getattr(os2, "sxHeight", 0) > 0:
+            return os2.sxHeight / X_HEIGHT_RATIO
+    
+    if os2 is not None and os2.sTypoAscender - os2.sTypoDescender > 0:
+        return (os2.sTypoAscender - os2.sTypoDescender) * CAP_HEIGHT_RATIO
+    if "hhea" in font and font["hhea"].ascent - font["hhea"].descent > 0:
+        return (font["hhea"].ascent - font["hhea"].descent) * CAP_HEIGHT_RATIO
+    return units_per_em * CAP_HEIGHT_RATIO
+
+
 def normalize_glyph_contours(contours, target_height=1000):
     """
     Normalizza i contorni per adattarli a un'altezza target.
     
     Args:
-        contours: Lista di contorni
+        contours: GlyphOutline o lista di contorni
         target_height: Altezza target per la normalizzazione
         
     Returns:
-        Lista di contorni normalizzati
+        GlyphOutline con i contorni normalizzati
     """
-    if not contours:
-        return []
+    outline = GlyphOutline.from_contours(contours)
+    if not outline:
+        return outline
     
     # Trova min/max per normalizzare
-    all_points = [pt for c in contours for pt in c]
-    min_x = min(p[0] for p in all_points)
-    max_x = max(p[0] for p in all_points)
-    min_y = min(p[1] for p in all_points)
-    max_y = max(p[1] for p in all_points)
+    min_x, min_y, max_x, max_y = outline.bounds
     
     # Calcola il fattore di scala
     height = max_y - min_y
     width = max_x - min_x
     if height == 0 or width == 0:
-        return contours  # Evita divisione per zero
+        return outline  # Evita divisione per zero
     
     # Calcola il fattore di scala mantenendo le proporzioni
     scale = min(target_height / height, target_height / width)
@@ -241,101 +462,96 @@ def normalize_glyph_contours(contours, target_height=1000):
     center_x = (min_x + max_x) / 2
     center_y = (min_y + max_y) / 2
     
-    normalized = []
-    for contour in contours:
-        new_contour = []
-        for x, y in contour:
-            # Centra, scala e sposta
-            new_x = (x - center_x) * scale + target_height/2
-            new_y = (y - center_y) * scale + target_height/2
-            new_contour.append((new_x, new_y))
-        normalized.append(new_contour)
-    
-    return normalized
+    # Centra, scala e sposta tutti i punti in un'unica operazione
+    return outline.transform(scale, target_height / 2 - center_x * scale, target_height / 2 - center_y * scale)
 
 
 def contours_to_glyph(contours):
     """
-    Converte una lista di contorni in un oggetto Glyph per FontTools.
+    Converte i contorni in un oggetto Glyph per FontTools.
     Gestisce correttamente i buchi interni delle lettere.
     
     Args:
-        contours: Lista di contorni
+        contours: GlyphOutline o lista di contorni
         
     Returns:
         Oggetto Glyph
     """
-    from fontTools.pens.ttGlyphPen import TTGlyphPen
+    outline = GlyphOutline.from_contours(contours)
     
     # Controlla se abbiamo contorni validi
-    if not contours:
+    if not outline:
         print("Nessun contorno da convertire in glifo")
         return TTGlyphPen(None).glyph()
         
-    print(f"Conversione di {len(contours)} contorni in glifo")
+    print(f"Conversione di {len(outline)} contorni in glifo")
     
     # 1. Separa i contorni esterni e interni (buchi)
-    # I contorni esterni sono in senso antiorario (CCW)
-    # I contorni interni (buchi) sono in senso orario (CW)
-    exteriors = []
-    interiors = []
-    
-    for c in contours:
-        if not c or len(c) < 3:
-            continue
-            
-        # Calcola l'orientamento del contorno (segno dell'area)
-        # Se l'area è negativa, il contorno è in senso orario (CW)
-        area = 0
-        for i in range(len(c) - 1):
-            area += c[i][0] * c[i+1][1] - c[i+1][0] * c[i][1]
-            
-        # Assicura che il contorno sia chiuso
-        if c[0] != c[-1]:
-            c = c + [c[0]]
-        
-        if area < 0:  # Senso orario (CW) - buco interno
-            interiors.append(c)
-            print(f"  Contorno interno rilevato con {len(c)} punti")
-        else:  # Senso antiorario (CCW) - contorno esterno
-            exteriors.append(c)
-            print(f"  Contorno esterno rilevato con {len(c)} punti")
+    # I contorni esterni sono in senso antiorario (CCW), area positiva
+    # I contorni interni (buchi) sono in senso orario (CW), area negativa
+    areas = outline.signed_areas()
+    valid = outline.lengths >= 3
+    exteriors = np.nonzero(valid & (areas >= 0))[0]
+    interiors = np.nonzero(valid & (areas < 0))[0]
     
     print(f"  Totale: {len(exteriors)} contorni esterni, {len(interiors)} contorni interni")
     
     # 2. Ordina i contorni esterni per area (i più grandi prima)
-    sorted_exteriors = []
-    if exteriors:
-        exterior_areas = []
-        for c in exteriors:
-            # Calcola l'area del contorno
-            area = 0
-            for i in range(len(c) - 1):
-                area += c[i][0] * c[i+1][1] - c[i+1][0] * c[i][1]
-            exterior_areas.append(abs(area) / 2)
-            
-        # Ordina i contorni esterni per area decrescente
-        sorted_exteriors = [c for _, c in sorted(zip(exterior_areas, exteriors), 
-                                              key=lambda pair: -pair[0])]
+    exteriors = exteriors[np.argsort(-areas[exteriors], kind="stable")]
     
-    # 3. Crea il glifo usando la penna
+    # 3. Crea il glifo usando la penna: prima gli esterni, poi i buchi
     pen = TTGlyphPen(None)
     
-    # Disegna prima i contorni esterni
-    for c in sorted_exteriors:
-        pen.moveTo(c[0])
+    for i in np.concatenate([exteriors, interiors]):
+        c = outline[i].tolist()
+        
+        # Assicura che il contorno sia chiuso
+        if c[0] != c[-1]:
+            c.append(c[0])
+        
+        pen.moveTo(tuple(c[0]))
         for pt in c[1:]:
-            pen.lineTo(pt)
+            pen.lineTo(tuple(pt))
         pen.closePath()
     
-    # Poi disegna i contorni interni (buchi)
-    for c in interiors:
-        pen.moveTo(c[0])
-        for pt in c[1:]:
-            pen.lineTo(pt)
+    # Converti in glifo TTF
+    return pen.glyph()
+
+
+def curve_contours_to_glyph(curve_contours):
+    """
+    Converte contorni quadratici in un oggetto Glyph per FontTools,
+    mantenendo le curve invece di approssimarle con segmenti.
+    
+    Args:
+        curve_contours: Lista di tuple (points, on_curve) in formato TrueType,
+            con il primo punto sulla curva e senza ripetere il punto iniziale
+        
+    Returns:
+        Oggetto Glyph
+    """
+    pen = TTGlyphPen(None)
+    
+    for points, on_curve in curve_contours:
+        if len(points) < 2:
+            continue
+        
+        pen.moveTo(tuple(points[0]))
+        off_points = []
+        for pt, on in zip(points[1:], on_curve[1:]):
+            if not on:
+                off_points.append(tuple(pt))
+            elif off_points:
+                pen.qCurveTo(*off_points, tuple(pt))
+                off_points = []
+            else:
+                pen.lineTo(tuple(pt))
+        
+        # Curva finale che torna al punto iniziale
+        if off_points:
+            pen.qCurveTo(*off_points, tuple(points[0]))
         pen.closePath()
     
-    # Converti in glifo TTF
     return pen.glyph()
 
 
@@ -4,9 +4,18 @@ Gestisce operazioni come taglio, unione e trasformazione di contorni di glifi.
 """
 
 import traceback
+import numpy as np
+import shapely
 from shapely.geometry import Polygon, MultiPolygon
 from shapely.ops import unary_union
-from shapely.affinity import scale, translate
+
+from glyph_outline import GlyphOutline
+import axis_clipper
+
+# Motori di ritaglio per i tagli paralleli agli assi:
+# "shapely" usa l'intersezione GEOS, "numpy" il ritaglio vettoriale di axis_clipper
+CLIP_BACKENDS = ("shapely", "numpy")
+DEFAULT_CLIP_BACKEND = "shapely"
 
 def polygon_from_contour(contour):
     """
@@ -14,16 +23,17 @@ def polygon_from_contour(contour):
     Gestisce correttamente i contorni complessi e garantisce validità.
     
     Args:
-        contour: Lista di punti (x, y)
+        contour: Lista o array NumPy (N, 2) di punti (x, y)
         
     Returns:
         Oggetto Polygon Shapely o None in caso di errore
     """
-    if not contour or len(contour) < 3:
+    if contour is None or len(contour) < 3:
         return None
     
-    if contour[0] != contour[-1]:
-        contour = contour + [contour[0]]
+    contour = np.asarray(contour, dtype=np.float64)
+    if not np.array_equal(contour[0], contour[-1]):
+        contour = np.vstack([contour, contour[:1]])
     
     try:
         poly = Polygon(contour)
@@ -43,9 +53,266 @@ def polygon_from_contour(contour):
         return None
 
 
+def _valid_rings(outline):
+    """
+    Contorni utilizzabili come anelli Shapely, con i poligoni costruiti in blocco.
+    I contorni che si autointersecano vengono sostituiti dagli anelli esterni
+    delle parti restituite da make_valid, con lo stesso verso dell'originale.
+    
+    Returns:
+        Tuple (polygons, signs): array di Polygon e verso di ogni contorno (+1/-1)
+    """
+    outline = outline.select(outline.ring_mask())
+    if not outline:
+        return np.empty(0, dtype=object), np.empty(0)
+    signs = np.sign(outline.signed_areas())
+    polygons = shapely.polygons(shapely.linearrings(outline.coords, indices=outline.contour_ids()))
+    
+    invalid = np.nonzero(~shapely.is_valid(polygons))[0]
+    if len(invalid) == 0:
+        return polygons, signs
+    
+    repaired = shapely.make_valid(polygons[invalid])
+    parts, part_index = shapely.get_parts(repaired, return_index=True)
+    # make_valid può restituire collezioni che contengono MultiPolygon
+    parts, nested_index = shapely.get_parts(parts, return_index=True)
+    part_index = part_index[nested_index]
+    is_polygon = shapely.get_type_id(parts) == 3
+    parts = shapely.polygons(shapely.get_exterior_ring(parts[is_polygon]))
+    
+    keep = np.ones(len(polygons), dtype=bool)
+    keep[invalid] = False
+    polygons = np.concatenate([polygons[keep], parts])
+    signs = np.concatenate([signs[keep], signs[invalid][part_index[is_polygon]]])
+    return polygons, signs
+
+
+def polygon_from_outline(outline):
+    """
+    Costruisce la geometria di un glifo in un'unica passata, con la regola
+    di riempimento nonzero dei font: un contorno è un bordo esterno se
+    il numero di avvolgimento passa da zero a non zero attraversandolo,
+    un buco nel caso opposto. Il numero di avvolgimento all'esterno di ogni
+    contorno è la somma dei versi dei contorni che lo contengono.
+    Solo i contorni esterni che si sovrappongono vengono uniti.
+    
+    Args:
+        outline: GlyphOutline o lista di contorni
+        
+    Returns:
+        Polygon o MultiPolygon Shapely, oppure None se non ci sono contorni validi
+    """
+    outline = GlyphOutline.from_contours(outline)
+    if not outline:
+        return None
+    
+    polygons, signs = _valid_rings(outline)
+    nonzero = signs != 0
+    polygons, signs = polygons[nonzero], signs[nonzero]
+    if len(polygons) == 0:
+        return None
+    if len(polygons) == 1:
+        return polygons[0]
+    
+    # Coppie (contorno, contorno che lo contiene interamente): prima il
+    # filtro sui rettangoli di ingombro, poi il predicato solo sulle candidate
+    bounds = shapely.bounds(polygons)
+    inner, outer = np.nonzero(
+        (bounds[:, None, 0] >= bounds[None, :, 0]) & (bounds[:, None, 1] >= bounds[None, :, 1]) &
+        (bounds[:, None, 2] <= bounds[None, :, 2]) & (bounds[:, None, 3] <= bounds[None, :, 3])
+    )
+    distinct = inner != outer
+    inner, outer = inner[distinct], outer[distinct]
+    if len(inner):
+        contained = shapely.within(polygons[inner], polygons[outer])
+        inner, outer = inner[contained], outer[contained]
+    
+    winding_outside = np.zeros(len(polygons), dtype=np.int64)
+    np.add.at(winding_outside, inner, signs[outer].astype(np.int64))
+    winding_inside = winding_outside + signs.astype(np.int64)
+    
+    shells = (winding_outside == 0) & (winding_inside != 0)
+    holes = (winding_outside != 0) & (winding_inside == 0)
+    
+    # Ogni buco appartiene al contorno esterno più interno che lo contiene
+    areas = shapely.area(polygons)
+    owner = np.full(len(polygons), -1)
+    candidates = holes[inner] & shells[outer]
+    for i, o in sorted(zip(inner[candidates], outer[candidates]), key=lambda pair: -areas[pair[1]]):
+        owner[i] = o
+    
+    shell_idx = np.nonzero(shells)[0]
+    if len(shell_idx) == 0:
+        return None
+    hole_idx = np.nonzero(holes & (owner >= 0))[0]
+    
+    # Anelli ordinati per poligono: prima l'esterno, poi i suoi buchi
+    polygon_of = np.full(len(polygons), -1)
+    polygon_of[shell_idx] = np.arange(len(shell_idx))
+    ring_idx = np.concatenate([shell_idx, hole_idx])
+    ring_polygon = np.concatenate([polygon_of[shell_idx], polygon_of[owner[hole_idx]]])
+    ring_order = np.lexsort((np.arange(len(ring_idx)) >= len(shell_idx), ring_polygon))
+    rings = shapely.get_exterior_ring(polygons[ring_idx[ring_order]])
+    result = shapely.polygons(rings, indices=ring_polygon[ring_order])
+    
+    # Solo i poligoni con buchi possono essere diventati non validi
+    invalid = np.zeros(len(result), dtype=bool)
+    with_holes = np.unique(polygon_of[owner[hole_idx]])
+    if len(with_holes):
+        invalid[with_holes] = ~shapely.is_valid(result[with_holes])
+    if invalid.any():
+        # Buchi che toccano l'esterno lungo un lato (come dopo un taglio):
+        # l'area del poligono è l'esterno meno l'unione dei suoi buchi
+        hole_polygon = polygon_of[owner[hole_idx]]
+        for k in np.nonzero(invalid)[0]:
+            result[k] = shapely.difference(
+                polygons[shell_idx[k]], shapely.union_all(polygons[hole_idx[hole_polygon == k]])
+            )
+    
+    if len(result) == 1 and not invalid[0]:
+        return result[0]
+    
+    # Contorni esterni sovrapposti (o riparati): solo questi vengono uniti
+    bounds = shapely.bounds(result)
+    left, right = np.nonzero(
+        (bounds[:, None, 0] <= bounds[None, :, 2]) & (bounds[None, :, 0] <= bounds[:, None, 2]) &
+        (bounds[:, None, 1] <= bounds[None, :, 3]) & (bounds[None, :, 1] <= bounds[:, None, 3])
+    )
+    pairs = left < right
+    left, right = left[pairs], right[pairs]
+    touching = shapely.intersects(result[left], result[right])
+    overlapping = invalid.copy()
+    overlapping[left[touching]] = True
+    overlapping[right[touching]] = True
+    
+    parts = list(result[~overlapping])
+    if overlapping.any():
+        merged = shapely.union_all(result[overlapping])
+        parts.extend(shapely.get_parts(merged))
+    parts = [p for p in parts if shapely.get_type_id(p) == 3 and not p.is_empty]
+    
+    if not parts:
+        return None
+    if len(parts) == 1:
+        return parts[0]
+    return MultiPolygon(parts)
+
+
+def _node_along_lines(coords, ring_offsets, axis, lines):
+    """
+    Aggiunge ai lati che giacciono su una retta di taglio i vertici degli
+    altri pezzi che cadono sulla stessa retta, così i lati condivisi da
+    due pezzi adiacenti coincidono punto per punto.
+    I punti a distanza trascurabile da una retta vengono portati sulla retta.
+    
+    Args:
+        coords: Array (N, 2) dei punti di tutti gli anelli (chiusi)
+        ring_offsets: Offset degli anelli in coords
+        axis: 0 per rette verticali (x costante), 1 per orizzontali
+        lines: Valori delle rette di taglio
+        
+    Returns:
+        Tuple (coords, ring_offsets) con i punti aggiunti
+    """
+    lines = np.unique(np.asarray(lines, dtype=np.float64))
+    if len(lines) == 0 or len(coords) == 0:
+        return coords, ring_offsets
+    
+    coords = coords.copy()
+    value = coords[:, axis]
+    tolerance = 1e-9 * max(1.0, float(np.abs(coords).max()))
+    above = np.minimum(np.searchsorted(lines, value), len(lines) - 1)
+    below = np.maximum(above - 1, 0)
+    nearest = np.where(np.abs(lines[above] - value) < np.abs(lines[below] - value), above, below)
+    on_line = np.abs(lines[nearest] - value) <= tolerance
+    value[on_line] = lines[nearest[on_line]]
+    
+    # Lati interni agli anelli (l'ultimo punto chiude l'anello) che stanno su una retta
+    start = np.ones(len(coords), dtype=bool)
+    start[ring_offsets[1:] - 1] = False
+    edges = np.nonzero(start & on_line & np.roll(on_line, -1))[0]
+    edges = edges[nearest[edges] == nearest[edges + 1]]
+    
+    position = coords[:, 1 - axis]
+    edge_ids, inserted = [], []
+    for k in np.unique(nearest[edges]):
+        points = np.unique(position[on_line & (nearest == k)])
+        line_edges = edges[nearest[edges] == k]
+        a, b = position[line_edges], position[line_edges + 1]
+        first = np.searchsorted(points, np.minimum(a, b), side="right")
+        last = np.searchsorted(points, np.maximum(a, b), side="left")
+        counts = np.maximum(last - first, 0)
+        if not counts.any():
+            continue
+        # Punti interni a ogni lato, nel verso del lato
+        step = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        index = np.where(np.repeat(a < b, counts), np.repeat(first, counts) + step, np.repeat(last - 1, counts) - step)
+        points_xy = np.empty((len(index), 2))
+        points_xy[:, axis] = lines[k]
+        points_xy[:, 1 - axis] = points[index]
+        edge_ids.append(np.repeat(line_edges, counts))
+        inserted.append(points_xy)
+    
+    if not edge_ids:
+        return coords, ring_offsets
+    
+    # Ogni punto aggiunto va subito dopo l'inizio del suo lato
+    edge_ids = np.concatenate(edge_ids)
+    inserted = np.concatenate(inserted)
+    order = np.argsort(edge_ids, kind="stable")
+    edge_ids, inserted = edge_ids[order], inserted[order]
+    added = np.bincount(edge_ids, minlength=len(coords))
+    shift = np.concatenate([[0], np.cumsum(added)])
+    
+    result = np.empty((len(coords) + len(inserted), 2))
+    result[np.arange(len(coords)) + shift[:-1]] = coords
+    rank = np.arange(len(edge_ids)) - (shift[edge_ids + 1] - added[edge_ids])
+    result[edge_ids + shift[edge_ids] + 1 + rank] = inserted
+    return result, ring_offsets + shift[ring_offsets]
+
+
+def merge_disjoint_pieces(pieces, x_lines=(), y_lines=()):
+    """
+    Unisce pezzi con interni disgiunti che si toccano solo lungo rette
+    di taglio note (le celle di un mixaggio). Invece di un'unione generale
+    i lati condivisi vengono resi identici e poi cancellati a coppie
+    con l'unione di copertura di GEOS, in tempo lineare.
+    
+    Args:
+        pieces: Sequenza di Polygon o MultiPolygon Shapely
+        x_lines: Valori x dei tagli verticali
+        y_lines: Valori y dei tagli orizzontali
+        
+    Returns:
+        Polygon o MultiPolygon Shapely, oppure None se non ci sono pezzi
+    """
+    parts = shapely.get_parts(np.asarray(list(pieces), dtype=object))
+    if len(parts):
+        parts = parts[(shapely.get_type_id(parts) == 3) & ~shapely.is_empty(parts)]
+    if len(parts) == 0:
+        return None
+    if len(parts) == 1:
+        return parts[0]
+    
+    _, coords, (ring_offsets, polygon_offsets) = shapely.to_ragged_array(parts)
+    coords, ring_offsets = _node_along_lines(coords, ring_offsets, 1, y_lines)
+    coords, ring_offsets = _node_along_lines(coords, ring_offsets, 0, x_lines)
+    noded = shapely.from_ragged_array(shapely.GeometryType.POLYGON, coords, (ring_offsets, polygon_offsets))
+    
+    try:
+        result = shapely.coverage_union_all(noded)
+    except shapely.errors.GEOSException as e:
+        print(f"Unione di copertura non riuscita ({e}), uso l'unione generale")
+        return unary_union(parts)
+    if not result.is_valid:
+        print("Unione di copertura non valida, uso l'unione generale")
+        return unary_union(parts)
+    return result
+
+
 def polygon_to_contours(poly):
     """
-    Converte un poligono Shapely in una lista di contorni.
+    Converte un poligono Shapely nei contorni di un glifo.
     Supporta MultiPolygon per risultati complessi delle operazioni.
     Gestisce correttamente i buchi (contorni interni).
     
@@ -53,63 +320,48 @@ def polygon_to_contours(poly):
         poly: Oggetto Polygon o MultiPolygon Shapely
         
     Returns:
-        Lista di contorni, dove ogni contorno è una lista di tuple (x, y)
+        GlyphOutline con i contorni esterni in senso antiorario (CCW)
+        e i buchi in senso orario (CW)
     """
     if not poly or poly.is_empty:
-        return []
+        return GlyphOutline()
     
-    contours = []
+    outline = GlyphOutline.from_shapely(poly)
     
-    if isinstance(poly, MultiPolygon):
-        for geom in poly.geoms:
-            contours.extend(polygon_to_contours(geom))
-        return contours
+    # Debug
+    if len(outline) > 1:
+        holes = int((outline.signed_areas() < 0).sum())
+        print(f"Estratti {len(outline)} contorni ({len(outline) - holes} esterni + {holes} buchi)")
     
-    # Estrai contorno esterno - assicurandosi che sia chiuso e in senso antiorario (CCW)
-    exterior = list(poly.exterior.coords)
-    if exterior:
-        # Verifica che il contorno sia chiuso (primo punto = ultimo punto)
-        if exterior[0] != exterior[-1]:
-            exterior.append(exterior[0])
-        
-        # Verifica l'orientamento (deve essere CCW per contorni esterni)
-        # Se è in senso orario (CW), inverti
-        area = 0
-        for i in range(len(exterior) - 1):
-            area += exterior[i][0] * exterior[i+1][1] - exterior[i+1][0] * exterior[i][1]
-        
-        if area < 0:  # Se l'area è negativa, il contorno è in senso orario (CW)
-            exterior = exterior[::-1]  # Inverti l'ordine
-        
-        contours.append(exterior)
-    
-    # Estrai "buchi" interni - assicurandosi che siano in senso orario (CW)
-    for interior in poly.interiors:
-        hole = list(interior.coords)
-        if hole:
-            # Verifica che il contorno sia chiuso
-            if hole[0] != hole[-1]:
-                hole.append(hole[0])
-            
-            # Verifica l'orientamento (deve essere CW per buchi)
-            # Se è in senso antiorario (CCW), inverti
-            area = 0
-            for i in range(len(hole) - 1):
-                area += hole[i][0] * hole[i+1][1] - hole[i+1][0] * hole[i][1]
-            
-            if area > 0:  # Se l'area è positiva, il contorno è in senso antiorario (CCW)
-                hole = hole[::-1]  # Inverti l'ordine
-            
-            contours.append(hole)
+    return outline
+
+
+def clip_polygon_to_box(poly, x0, y0, x1, y1, backend=DEFAULT_CLIP_BACKEND):
+    """
+    Ritaglia un poligono con un rettangolo parallelo agli assi.
     
-    # Debug
-    if len(contours) > 1:
-        print(f"Estratti {len(contours)} contorni (1 esterno + {len(contours)-1} buchi)")
+    Args:
+        poly: Oggetto Polygon o MultiPolygon Shapely
+        x0, y0, x1, y1: Limiti del rettangolo
+        backend: Motore di ritaglio ("shapely" o "numpy")
+        
+    Returns:
+        Geometria Shapely, vuota se il rettangolo non interseca il poligono
+    """
+    from shapely.geometry import box
     
-    return contours
+    if backend == "shapely":
+        part = poly.intersection(box(x0, y0, x1, y1))
+        return part.buffer(0) if not part.is_empty else part
+    if backend == "numpy":
+        # GEOS serve solo per ricomporre i pezzi di anello ritagliati
+        outline = axis_clipper.clip_to_box(GlyphOutline.from_shapely(poly), x0, y0, x1, y1)
+        part = polygon_from_outline(outline)
+        return part if part is not None else Polygon()
+    raise ValueError(f"Motore di ritaglio non supportato: {backend}")
 
 
-def cut_polygon_at_y(poly, y_cut):
+def cut_polygon_at_y(poly, y_cut, backend=DEFAULT_CLIP_BACKEND):
     """
     Versione migliorata: Taglia un poligono ad un valore y specifico
     usando l'operazione di intersezione diretta con rettangoli.
@@ -117,6 +369,7 @@ def cut_polygon_at_y(poly, y_cut):
     Args:
         poly: Oggetto Polygon o MultiPolygon Shapely
         y_cut: Valore y dove tagliare
+        backend: Motore di ritaglio ("shapely" o "numpy")
         
     Returns:
         Tuple (top_part, bottom_part) con parti del poligono
@@ -140,14 +393,8 @@ def cut_polygon_at_y(poly, y_cut):
     
     # Esegui le intersezioni
     try:
-        top_part = poly.intersection(top_box)
-        bottom_part = poly.intersection(bottom_box)
-        
-        # Aggiungi buffer per garantire validità
-        if top_part and not top_part.is_empty:
-            top_part = top_part.buffer(0)
-        if bottom_part and not bottom_part.is_empty:
-            bottom_part = bottom_part.buffer(0)
+        top_part = clip_polygon_to_box(poly, *top_box.bounds, backend=backend)
+        bottom_part = clip_polygon_to_box(poly, *bottom_box.bounds, backend=backend)
         
         # Verifica i risultati del taglio
         if top_part and not top_part.is_empty:
@@ -168,7 +415,7 @@ def cut_polygon_at_y(poly, y_cut):
         return None, None
 
 
-def cut_polygon_at_x(poly, x_cut):
+def cut_polygon_at_x(poly, x_cut, backend=DEFAULT_CLIP_BACKEND):
     """
     Versione migliorata: Taglia un poligono ad un valore x specifico
     usando l'operazione di intersezione diretta con rettangoli.
@@ -176,6 +423,7 @@ def cut_polygon_at_x(poly, x_cut):
     Args:
         poly: Oggetto Polygon o MultiPolygon Shapely
         x_cut: Valore x dove tagliare
+        backend: Motore di ritaglio ("shapely" o "numpy")
         
     Returns:
         Tuple (left_part, right_part) con parti del poligono
@@ -199,14 +447,8 @@ def cut_polygon_at_x(poly, x_cut):
     
     # Esegui le intersezioni
     try:
-        left_part = poly.intersection(left_box)
-        right_part = poly.intersection(right_box)
-        
-        # Aggiungi buffer per garantire validità
-        if left_part and not left_part.is_empty:
-            left_part = left_part.buffer(0)
-        if right_part and not right_part.is_empty:
-            right_part = right_part.buffer(0)
+        left_part = clip_polygon_to_box(poly, *left_box.bounds, backend=backend)
+        right_part = clip_polygon_to_box(poly, *right_box.bounds, backend=backend)
         
         # Verifica i risultati del taglio
         if left_part and not left_part.is_empty:
@@ -228,7 +470,7 @@ def cut_polygon_at_x(poly, x_cut):
 
 
 # Per compatibilità con il codice esistente
-def cut_polygon_quadrants(poly, x_cut, y_cut):
+def cut_polygon_quadrants(poly, x_cut, y_cut, backend=DEFAULT_CLIP_BACKEND):
     """
     Taglia un poligono in quattro quadranti usando tagli sia orizzontali che verticali.
     
@@ -236,6 +478,7 @@ def cut_polygon_quadrants(poly, x_cut, y_cut):
         poly: Oggetto Polygon o MultiPolygon Shapely
         x_cut: Valore x dove tagliare
         y_cut: Valore y dove tagliare
+        backend: Motore di ritaglio ("shapely" o "numpy")
         
     Returns:
         Tuple (top_left, top_right, bottom_left, bottom_right) con parti del poligono
@@ -256,10 +499,10 @@ def cut_polygon_quadrants(poly, x_cut, y_cut):
     
     # Esegui le intersezioni
     try:
-        top_left = poly.intersection(top_left_box).buffer(0)
-        top_right = poly.intersection(top_right_box).buffer(0)
-        bottom_left = poly.intersection(bottom_left_box).buffer(0)
-        bottom_right = poly.intersection(bottom_right_box).buffer(0)
+        top_left = clip_polygon_to_box(poly, *top_left_box.bounds, backend=backend)
+        top_right = clip_polygon_to_box(poly, *top_right_box.bounds, backend=backend)
+        bottom_left = clip_polygon_to_box(poly, *bottom_left_box.bounds, backend=backend)
+        bottom_right = clip_polygon_to_box(poly, *bottom_right_box.bounds, backend=backend)
         
         return top_left, top_right, bottom_left, bottom_right
     except Exception as e:
@@ -267,32 +510,38 @@ def cut_polygon_quadrants(poly, x_cut, y_cut):
         return None, None, None, None
 
 
-def normalize_glyph_polygon(poly, target_height=1000):
+def normalization_transform(contours, cap_height=None, target_height=1000):
     """
-    Normalizza un poligono di glifo mantenendo le proporzioni.
+    Trasformazione che porta un glifo nello spazio comune di mixaggio.
+    Con la cap height del font la scala è la stessa per tutti i glifi del font:
+    le maiuscole sono alte target_height, la linea di base resta a y = 0 e
+    il glifo viene solo centrato in orizzontale. Senza cap height il glifo
+    viene adattato al proprio rettangolo e centrato nello spazio di mixaggio.
     
     Args:
-        poly: Oggetto Polygon o MultiPolygon Shapely
+        contours: GlyphOutline o lista di contorni appiattiti
+        cap_height: Altezza delle maiuscole del font sorgente (opzionale)
         target_height: Altezza target per la normalizzazione
         
     Returns:
-        Poligono normalizzato
+        Tuple (scale, dx, dy) per GlyphOutline.transform, oppure None se il glifo è degenere
     """
-    if poly is None or poly.is_empty:
-        return poly
-
-    minx, miny, maxx, maxy = poly.bounds
-    width = maxx - minx
-    height = maxy - miny
+    outline = GlyphOutline.from_contours(contours)
+    outline = outline.select(outline.lengths >= 3)
+    if not outline:
+        return None
 
-    if height == 0 or width == 0:
-        return poly
+    min_x, min_y, max_x, max_y = outline.bounds
+    width = max_x - min_x
+    height = max_y - min_y
+    if width == 0 or height == 0:
+        return None
 
-    # Fattore di scala per mantenere le proporzioni
-    scale_factor = min(target_height / height, target_height / width)
+    center_x = min_x + width / 2
+    if cap_height:
+        scale = target_height / cap_height
+        return scale, target_height / 2 - center_x * scale, 0.0
 
-    # Centratura e ridimensionamento
-    centered = translate(poly, -minx - width/2, -miny - height/2)
-    scaled = scale(centered, xfact=scale_factor, yfact=scale_factor)
-    
-    return translate(scaled, target_height/2, target_height/2)
\ No newline at end of file
+    scale = min(target_height / height, target_height / width)
+    center_y = min_y + height / 2
+    return scale, target_height / 2 - center_x * scale, target_height / 2 - center_y * scale
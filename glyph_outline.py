@@ -0,0 +1,237 @@
+"""
+Modulo per la rappresentazione compatta dei contorni di un glifo.
+Tutti i punti stanno in un unico array di coordinate, i contorni
+sono delimitati da un array di offset: niente liste di tuple.
+"""
+
+import numpy as np
+import shapely
+
+
+class GlyphOutline:
+    """
+    Contorni di un glifo: coords è un array (N, 2) float64 con i punti
+    di tutti i contorni, il contorno i è coords[offsets[i]:offsets[i + 1]].
+    Ogni contorno è chiuso ripetendo il primo punto.
+    I limiti vengono calcolati una sola volta, al primo accesso.
+    """
+    __slots__ = ("coords", "offsets", "_bounds")
+
+    def __init__(self, coords=None, offsets=None):
+        if coords is None:
+            coords = np.empty((0, 2), dtype=np.float64)
+        self.coords = np.ascontiguousarray(coords, dtype=np.float64).reshape(-1, 2)
+        if offsets is None:
+            offsets = [0, len(self.coords)] if len(self.coords) else [0]
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self._bounds = None
+
+    @classmethod
+    def from_contours(cls, contours):
+        """
+        Costruisce i contorni da una sequenza di contorni separati.
+
+        Args:
+            contours: Lista di contorni (liste di tuple o array (N, 2));
+                i contorni vuoti vengono scartati
+
+        Returns:
+            GlyphOutline
+        """
+        if isinstance(contours, GlyphOutline):
+            return contours
+        arrays = [
+            np.asarray(c, dtype=np.float64).reshape(-1, 2)
+            for c in contours if c is not None and len(c) > 0
+        ]
+        if not arrays:
+            return cls()
+        offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(a) for a in arrays])
+        return cls(np.concatenate(arrays), offsets)
+
+    @classmethod
+    def from_shapely(cls, geometry):
+        """
+        Estrae i contorni dei poligoni di una geometria Shapely
+        con i costruttori ragged di Shapely, senza oggetti intermedi.
+        I contorni esterni sono antiorari, i buchi orari.
+
+        Args:
+            geometry: Polygon, MultiPolygon o collezione di geometrie
+
+        Returns:
+            GlyphOutline
+        """
+        if geometry is None or geometry.is_empty:
+            return cls()
+
+        parts = shapely.get_parts(geometry)
+        parts = parts[(shapely.get_type_id(parts) == 3) & ~shapely.is_empty(parts)]
+        if len(parts) == 0:
+            return cls()
+
+        _, coords, (ring_offsets, polygon_offsets) = shapely.to_ragged_array(parts)
+        outline = cls(coords, ring_offsets)
+
+        # Il primo anello di ogni poligono è l'esterno
+        exterior = np.zeros(len(outline), dtype=bool)
+        exterior[polygon_offsets[:-1]] = True
+        flip = np.nonzero((outline.signed_areas() > 0) != exterior)[0]
+        if len(flip):
+            order = np.arange(len(outline.coords))
+            for i in flip:
+                start, end = ring_offsets[i], ring_offsets[i + 1]
+                order[start:end] = order[start:end][::-1]
+            outline = cls(outline.coords[order], ring_offsets)
+
+        return outline
+
+    @classmethod
+    def concatenate(cls, outlines):
+        """
+        Unisce più GlyphOutline in un unico buffer.
+
+        Args:
+            outlines: Sequenza di GlyphOutline
+
+        Returns:
+            GlyphOutline con tutti i contorni, nell'ordine dato
+        """
+        outlines = [o for o in outlines if o is not None and len(o)]
+        if not outlines:
+            return cls()
+        if len(outlines) == 1:
+            return outlines[0]
+        starts = np.cumsum([0] + [o.num_points for o in outlines[:-1]])
+        offsets = [outlines[0].offsets] + [o.offsets[1:] + s for o, s in zip(outlines[1:], starts[1:])]
+        return cls(np.concatenate([o.coords for o in outlines]), np.concatenate(offsets))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        coords = self.coords
+        offsets = self.offsets
+        for i in range(len(offsets) - 1):
+            yield coords[offsets[i]:offsets[i + 1]]
+
+    def __getitem__(self, index):
+        count = len(self)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("Indice di contorno fuori dai limiti")
+        return self.coords[self.offsets[index]:self.offsets[index + 1]]
+
+    def __repr__(self):
+        return f"GlyphOutline({len(self)} contorni, {self.num_points} punti)"
+
+    @property
+    def num_points(self):
+        """Numero totale di punti"""
+        return len(self.coords)
+
+    @property
+    def lengths(self):
+        """Numero di punti di ogni contorno"""
+        return np.diff(self.offsets)
+
+    @property
+    def bounds(self):
+        """Limiti (min_x, min_y, max_x, max_y), oppure None se non ci sono punti"""
+        if self._bounds is None and len(self.coords):
+            min_x, min_y = self.coords.min(axis=0)
+            max_x, max_y = self.coords.max(axis=0)
+            self._bounds = (float(min_x), float(min_y), float(max_x), float(max_y))
+        return self._bounds
+
+    def contour_ids(self):
+        """Indice del contorno di ogni punto"""
+        return np.repeat(np.arange(len(self)), self.lengths)
+
+    def signed_areas(self):
+        """
+        Area con segno di ogni contorno (positiva se antiorario).
+
+        Returns:
+            Array (numero di contorni,)
+        """
+        if len(self) == 0:
+            return np.empty(0)
+        x = self.coords[:, 0]
+        y = self.coords[:, 1]
+        # Indice del punto successivo, con chiusura ciclica su ogni contorno
+        following = np.arange(1, len(self.coords) + 1)
+        following[self.offsets[1:] - 1] = self.offsets[:-1]
+        cross = x * y[following] - x[following] * y
+        return 0.5 * np.add.reduceat(cross, self.offsets[:-1])
+
+    def select(self, mask):
+        """
+        Contorni selezionati da una maschera booleana o da una lista di indici.
+
+        Returns:
+            GlyphOutline
+        """
+        indices = np.arange(len(self))[mask]
+        if len(indices) == len(self):
+            return self
+        lengths = self.lengths[indices]
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(lengths)
+        starts = self.offsets[:-1][indices]
+        gather = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return GlyphOutline(self.coords[gather], offsets)
+
+    def transform(self, scale, dx, dy):
+        """
+        Applica x' = x * scale + dx, y' = y * scale + dy a tutti i punti.
+
+        Returns:
+            GlyphOutline
+        """
+        return GlyphOutline(self.coords * scale + np.array([dx, dy]), self.offsets)
+
+    def reversed(self):
+        """
+        Contorni con il verso di percorrenza invertito (i punti di ogni
+        contorno in ordine opposto), con un unico indice su tutto il buffer.
+
+        Returns:
+            GlyphOutline
+        """
+        if len(self) == 0:
+            return self
+        ids = self.contour_ids()
+        gather = self.offsets[ids] + self.offsets[ids + 1] - 1 - np.arange(len(self.coords))
+        return GlyphOutline(self.coords[gather], self.offsets)
+
+    def ring_mask(self):
+        """Maschera dei contorni con almeno tre punti, esclusa la chiusura"""
+        lengths = self.lengths
+        closed = np.zeros(len(self), dtype=bool)
+        nonempty = lengths > 0
+        closed[nonempty] = np.all(
+            self.coords[self.offsets[:-1][nonempty]] == self.coords[self.offsets[1:][nonempty] - 1], axis=1
+        )
+        return lengths >= np.where(closed, 4, 3)
+
+    def to_polygons(self):
+        """
+        Un poligono Shapely per ogni contorno, costruiti in blocco
+        dal buffer di coordinate (linearrings con indici).
+        I contorni con meno di tre punti distinti vengono scartati.
+
+        Returns:
+            Array NumPy di Polygon
+        """
+        outline = self.select(self.ring_mask())
+        if len(outline) == 0:
+            return np.empty(0, dtype=object)
+        rings = shapely.linearrings(outline.coords, indices=outline.contour_ids())
+        return shapely.polygons(rings)
+
+    def to_lists(self):
+        """Contorni come liste di tuple (x, y)"""
+        return [[tuple(pt) for pt in contour.tolist()] for contour in self]
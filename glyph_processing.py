@@ -3,79 +3,52 @@ Modulo per il processamento e la miscelazione dei glifi.
 Contiene algoritmi per combinare glifi da diversi font.
 """
 
-import random
 import traceback
-from shapely.ops import unary_union
-from shapely.geometry import MultiPolygon
+import numpy as np
+import shapely
 
 # Importa le funzioni dai moduli
 from geometry_utils import (
-    polygon_from_contour, normalize_glyph_polygon,
-    cut_polygon_at_y, cut_polygon_at_x,
-    cut_polygon_quadrants
+    polygon_from_outline, normalization_transform, merge_disjoint_pieces,
+    CLIP_BACKENDS, DEFAULT_CLIP_BACKEND
 )
+from glyph_outline import GlyphOutline
+from axis_clipper import slice_grid
+from mix_plan import MixPlan
 
-from font_utils import get_glyph_contours, polygon_to_glyph
+from font_utils import polygon_to_glyph
 
 
-def mix_multiple_polygons(polygons, cut_points):
-    """
-    Mixa più poligoni usando tagli orizzontali.
-    Ogni sezione proviene da un font diverso.
-    
-    Args:
-        polygons: Lista di poligoni Shapely
-        cut_points: Lista di punti di taglio normalizzati (0-1000)
-        
-    Returns:
-        Poligono Shapely risultante
-    """
-    if len(polygons) < 2:
-        return polygons[0] if polygons else None
-
-    # Ordina i punti di taglio
-    sorted_cuts = sorted(cut_points)
-    result = None
-    
-    for i, poly in enumerate(polygons):
-        if poly is None or poly.is_empty:
-            continue
-            
-        # Determina i limiti verticali per questa sezione
-        lower = sorted_cuts[i-1] if i > 0 else 0
-        upper = sorted_cuts[i] if i < len(sorted_cuts) else 1000
-        
-        # Estrai la sezione corrispondente
-        _, temp = cut_polygon_at_y(poly, lower)
-        if temp and not temp.is_empty:
-            section, _ = cut_polygon_at_y(temp, upper)
-            if section and not section.is_empty:
-                # Unisci al risultato
-                result = unary_union([result, section]) if result else section
-    
-    return result
-
-
-def mix_fonts_deterministic(polygons, h_cuts, v_cuts=None):
+def mix_fonts_deterministic(polygons, h_cuts, v_cuts=None, backend=DEFAULT_CLIP_BACKEND, plan=None,
+                            piece_cache=None, piece_keys=None, bounds=None):
     """
     Mixa i font in modo deterministico, assicurando che parti di ogni font 
     siano visibili nel risultato finale.
     
     Args:
         polygons: Lista di poligoni Shapely
-        h_cuts: Lista di punti di taglio orizzontali
+        h_cuts: Lista di punti di taglio orizzontali (0-1000)
         v_cuts: Lista di punti di taglio verticali (opzionale)
+        backend: Motore di ritaglio ("shapely" o "numpy")
+        plan: MixPlan da riusare; se indicato sostituisce h_cuts e v_cuts
+        piece_cache: PieceCache con i pezzi già ritagliati (opzionale)
+        piece_keys: Chiave di ogni poligono per la cache (font, glifo, normalizzazione)
+        bounds: Riquadro della griglia; se None, il bound di tutti i poligoni validi
         
     Returns:
         Poligono Shapely risultante
     """
-    from shapely.ops import unary_union
-    from shapely.geometry import box
-
+    if backend not in CLIP_BACKENDS:
+        raise ValueError(f"Motore di ritaglio non supportato: {backend}")
+    
     if not polygons or len(polygons) < 2:
         return polygons[0] if polygons else None
     
-    valid_polygons = [p for p in polygons if p and not p.is_empty]
+    if piece_cache is None or piece_keys is None:
+        piece_cache, piece_keys = None, [None] * len(polygons)
+    valid = [(p, key) for p, key in zip(polygons, piece_keys) if p and not p.is_empty]
+    valid_polygons = [p for p, _ in valid]
+    valid_keys = [key for _, key in valid]
     if not valid_polygons:
         return None
         
@@ -99,128 +72,104 @@ def mix_fonts_deterministic(polygons, h_cuts, v_cuts=None):
     max_x = max(maxs_x)
     max_y = max(maxs_y)
     
-    # Assicurati che ci siano punti di taglio coerenti
-    if not h_cuts:
-        h_cuts = [500]  # Dividi a metà orizzontalmente
+    # Piano di mixaggio: costruito qui solo se non viene riusato quello della generazione
+    if plan is None:
+        plan = MixPlan(
+            [cut / 1000.0 for cut in h_cuts] if h_cuts else None,
+            [cut / 1000.0 for cut in v_cuts] if v_cuts else None
+        )
+    layout = plan.layout(len(valid_polygons))
+    if bounds is None:
+        bounds = (min_x, min_y, max_x, max_y)
     
-    use_vertical = v_cuts and len(v_cuts) > 0
+    # Griglia come array di limiti e font assegnato a ogni cella
+    x_edges, y_edges = plan.edges(bounds)
+    rows, cols = plan.rows, plan.cols
+    row_idx, col_idx, font_idx = layout.row_idx, layout.col_idx, layout.font_idx
     
-    # Normalizza i punti di taglio da 0-1000 a coordinate reali
-    h_cuts_real = [min_y + (max_y - min_y) * cut / 1000.0 for cut in h_cuts]
+    # Pezzi già in cache: una cella è identificata dal font e dai suoi limiti,
+    # quindi spostando un taglio cambiano solo le celle adiacenti
+    parts = np.empty(len(font_idx), dtype=object)
+    missing = np.arange(len(font_idx))
+    cell_keys = None
+    if piece_cache is not None:
+        cell_keys = [
+            (valid_keys[f], backend, "cell", float(x_edges[c]), float(y_edges[r]), float(x_edges[c + 1]), float(y_edges[r + 1]))
+            for f, r, c in zip(font_idx.tolist(), row_idx.tolist(), col_idx.tolist())
+        ]
+        for i, key in enumerate(cell_keys):
+            parts[i] = piece_cache.get(key)
+        missing = np.nonzero([part is None for part in parts])[0]
+        print(f"Celle in cache: {len(parts) - len(missing)} di {len(parts)}")
+    computed = missing
     
-    if use_vertical:
-        v_cuts_real = [min_x + (max_x - min_x) * cut / 1000.0 for cut in v_cuts]
-        # Aggiungi i bordi
-        all_h_cuts = [min_y] + h_cuts_real + [max_y]
-        all_v_cuts = [min_x] + v_cuts_real + [max_x]
-        
-        # Determina la dimensione della griglia
-        rows = len(all_h_cuts) - 1
-        cols = len(all_v_cuts) - 1
-        
-        print(f"Creating a {rows}x{cols} grid with vertical cuts")
-        print(f"Horizontal cuts: {all_h_cuts}")
-        print(f"Vertical cuts: {all_v_cuts}")
+    if len(missing) and backend == "numpy":
+        # Fasce e poi colonne sugli anelli, solo per le celle da calcolare;
+        # GEOS solo per ricomporre i pezzi
+        outlines = [GlyphOutline.from_shapely(p) for p in valid_polygons]
+        assignment = np.full((rows, cols), -1, dtype=np.int64)
+        assignment[row_idx[missing], col_idx[missing]] = font_idx[missing]
+        try:
+            pieces = slice_grid(outlines, x_edges, y_edges, assignment)
+            for i in missing:
+                piece = pieces[row_idx[i] * cols + col_idx[i]]
+                poly = polygon_from_outline(piece) if len(piece) else None
+                parts[i] = poly if poly is not None else shapely.Polygon()
+            missing = missing[:0]
+        except ValueError as e:
+            print(f"Ritaglio NumPy non riuscito ({e}), uso Shapely")
+    
+    if len(missing):
+        # Fasce orizzontali: ogni font viene tagliato una sola volta per riga,
+        # e solo nelle righe in cui compare una cella da calcolare
+        needed = np.unique(layout.strip_of_cell[missing])
+        strips = np.empty(len(layout.strip_font), dtype=object)
+        strip_todo = needed
+        if piece_cache is not None:
+            strip_keys = {
+                s: (valid_keys[layout.strip_font[s]], backend, "strip",
+                    float(y_edges[layout.strip_row[s]]), float(y_edges[layout.strip_row[s] + 1]))
+                for s in needed.tolist()
+            }
+            for s, key in strip_keys.items():
+                strips[s] = piece_cache.get(key)
+            strip_todo = needed[[strips[s] is None for s in needed.tolist()]]
         
-        # Prepara la matrice di assegnazione
-        font_assignments = []
-        num_fonts = len(valid_polygons)
+        if len(strip_todo):
+            font_polygons = np.empty(len(valid_polygons), dtype=object)
+            font_polygons[:] = valid_polygons
+            strips[strip_todo] = shapely.intersection(
+                font_polygons[layout.strip_font[strip_todo]],
+                plan.place(layout.strip_boxes[strip_todo], bounds)
+            )
+            if piece_cache is not None:
+                for s in strip_todo.tolist():
+                    piece_cache.put(strip_keys[s], strips[s])
         
-        if num_fonts == 2:
-            # Schema a 4 quadranti alternati per 2 font
-            font_assignments = [
-                [0, 1],
-                [1, 0]
-            ]
-        elif num_fonts == 3:
-            # Schema per 3 font
-            font_assignments = [
-                [0, 1, 2],
-                [2, 0, 1]
-            ]
-        elif num_fonts == 4:
-            # Schema per 4 font
-            font_assignments = [
-                [0, 1, 2, 3],
-                [3, 2, 1, 0]
-            ]
+        # Colonne: ogni cella lavora solo sulla fascia del suo font
+        if cols > 1:
+            parts[missing] = shapely.intersection(
+                strips[layout.strip_of_cell[missing]], plan.place(layout.cell_boxes[missing], bounds)
+            )
         else:
-            # Schema generico
-            for i in range(rows):
-                row_assignments = []
-                for j in range(cols):
-                    row_assignments.append((i + j) % num_fonts)
-                font_assignments.append(row_assignments)
-        
-        # Adatta la matrice alla dimensione effettiva della griglia
-        while len(font_assignments) < rows:
-            font_assignments.append(font_assignments[-1])
-        font_assignments = font_assignments[:rows]
-        
-        for i in range(rows):
-            while len(font_assignments[i]) < cols:
-                font_assignments[i].append(font_assignments[i][-1])
-            font_assignments[i] = font_assignments[i][:cols]
-        
-        print("Font assignment matrix:")
-        for row in font_assignments:
-            print(row)
-        
-        # Crea le parti e uniscile
-        result_polygons = []
-        
-        for i in range(rows):
-            for j in range(cols):
-                # Determina quale font usare per questa cella
-                font_idx = font_assignments[i][j]
-                if font_idx >= len(valid_polygons):
-                    continue
-                    
-                poly = valid_polygons[font_idx]
-                
-                # Crea un rettangolo per questa cella
-                cell_box = box(all_v_cuts[j], all_h_cuts[i], all_v_cuts[j+1], all_h_cuts[i+1])
-                
-                # Interseca il poligono del font con la cella
-                cell_part = poly.intersection(cell_box)
-                
-                if cell_part and not cell_part.is_empty:
-                    print(f"Cell [{i},{j}] using font {font_idx} - intersection success")
-                    result_polygons.append(cell_part)
-                else:
-                    print(f"Cell [{i},{j}] using font {font_idx} - empty intersection")
-    else:
-        # Mixaggio orizzontale senza tagli verticali
-        print(f"Creating horizontal slices with {len(h_cuts_real)+1} sections")
-        print(f"Horizontal cuts: {h_cuts_real}")
-        
-        # Aggiungi i bordi
-        all_h_cuts = [min_y] + h_cuts_real + [max_y]
-        result_polygons = []
-        
-        # Per ogni sezione orizzontale...
-        for i in range(len(all_h_cuts) - 1):
-            # Seleziona il font da usare per questa sezione (in modo ciclico)
-            font_idx = i % len(valid_polygons)
-            poly = valid_polygons[font_idx]
-            
-            # Crea un rettangolo per questa sezione
-            section_box = box(min_x, all_h_cuts[i], max_x, all_h_cuts[i+1])
-            
-            # Interseca il poligono del font con la sezione
-            section_part = poly.intersection(section_box)
-            
-            if section_part and not section_part.is_empty:
-                print(f"Section {i} using font {font_idx} - intersection success")
-                result_polygons.append(section_part)
-            else:
-                print(f"Section {i} using font {font_idx} - empty intersection")
+            parts[missing] = strips[layout.strip_of_cell[missing]]
     
-    # Unisci tutte le parti
+    # Le celle appena calcolate vanno in cache
+    if piece_cache is not None:
+        for i in computed.tolist():
+            piece_cache.put(cell_keys[i], parts[i])
+    
+    non_empty = ~shapely.is_empty(parts)
+    result_polygons = list(parts[non_empty])
+    
+    print(f"Intersections: {int(non_empty.sum())} non-empty cells of {rows * cols}")
+    
+    # Le celle non si sovrappongono: basta ricucirle lungo i tagli
     if result_polygons:
-        result = unary_union(result_polygons)
-        print(f"Final mixed polygon has bounds: {result.bounds}")
-        return result
+        result = merge_disjoint_pieces(result_polygons, x_edges[1:-1], y_edges[1:-1])
+        if result is not None:
+            print(f"Final mixed polygon has bounds: {result.bounds}")
+            return result
     
     # Fallback
     print("WARNING: Mixing failed, returning first valid polygon")
@@ -247,25 +196,30 @@ def mix_polygons_quadrants(polygons, x_cut, y_cut):
     return mix_fonts_deterministic(polygons, h_cuts, v_cuts)
 
 
-def assemble_letter_multiple_fonts(font_paths, glyph_name, h_cuts=None, v_cuts=None, normalize=True, cut_method="horizontal"):
+def assemble_letter_multiple_fonts(session, glyph_name, h_cuts=None, v_cuts=None, normalize=True, cut_method="horizontal",
+                                   clip_backend=DEFAULT_CLIP_BACKEND, plan=None, piece_cache=None):
     """
     Assembla un glifo da più font con diversi metodi di taglio.
     
     Args:
-        font_paths: Lista di percorsi ai font
+        session: FontSession con i font sorgente già aperti
         glyph_name: Nome del glifo da assemblare (es. "A")
         h_cuts: Punti di taglio orizzontali (0-1 normalizzati)
         v_cuts: Punti di taglio verticali (0-1 normalizzati)
         normalize: Se True, normalizza le dimensioni dei glifi
         cut_method: Metodo di taglio ("horizontal", "checkerboard", "quadrants")
+        clip_backend: Motore di ritaglio ("shapely" o "numpy")
+        plan: MixPlan della generazione; se indicato sostituisce h_cuts e v_cuts
+        piece_cache: PieceCache con glifi e pezzi delle generazioni precedenti (opzionale)
     
     Returns:
         Poligono Shapely assemblato
     """
     polygons = []
+    keys = []
     
     # Verifica i parametri di input
-    print(f"\n=== Assemblaggio lettera '{glyph_name}' con {len(font_paths)} font ===")
+    print(f"\n=== Assemblaggio lettera '{glyph_name}' con {len(session)} font ===")
     print(f"Metodo di taglio: {cut_method}")
     print(f"Tagli orizzontali: {h_cuts}")
     print(f"Tagli verticali: {v_cuts}")
@@ -275,26 +229,38 @@ def assemble_letter_multiple_fonts(font_paths, glyph_name, h_cuts=None, v_cuts=N
     normalized_v_cuts = [x * 1000 for x in v_cuts] if v_cuts else []
     
     # Leggi i contorni da ogni font
-    for i, font_path in enumerate(font_paths):
+    for i, source in enumerate(session):
+        # Chiave del glifo in cache: font (con data e dimensione del file), glifo e normalizzazione
+        key = (getattr(source, "identity", source.path), glyph_name, normalize, getattr(session, "tolerance", None))
+        keys.append(key)
+        if piece_cache is not None:
+            poly = piece_cache.get((key, "glyph"))
+            if poly is not None:
+                polygons.append(poly)
+                continue
+        
         try:
-            print(f"Lettura font {i+1}: {os.path.basename(font_path)}")
-            font = TTFont(font_path)
-            contours = get_glyph_contours(font, glyph_name)
-            font.close()
+            print(f"Lettura font {i+1}: {source.name}")
+            contours = source.get_contours(glyph_name)
             
             # Debug: mostra quanti contorni sono stati estratti
             print(f"  Font {i+1}: Estratti {len(contours)} contorni per '{glyph_name}'")
             
-            # Converti contorni in poligono
+            # Normalizzazione del font applicata direttamente alle coordinate
+            if normalize:
+                transform = normalization_transform(contours, source.cap_height)
+                if transform is None:
+                    print(f"  Errore nella normalizzazione del glifo del font {i+1}")
+                    polygons.append(None)
+                    continue
+                contours = GlyphOutline.from_contours(contours).transform(*transform)
+            
+            # Converti contorni in poligono (buchi assegnati con la regola nonzero)
             poly = None
             try:
-                # Crea un poligono per ogni contorno e uniscili
-                contour_polys = [polygon_from_contour(c) for c in contours if c and len(c) >= 3]
-                # Filtra i poligoni nulli o vuoti
-                valid_polys = [p for p in contour_polys if p and not p.is_empty]
+                poly = polygon_from_outline(contours)
                 
-                if valid_polys:
-                    poly = unary_union(valid_polys)
+                if poly is not None:
                     print(f"  Poligono creato con bounds: {poly.bounds}")
                 else:
                     print(f"  Nessun poligono valido creato dai contorni")
@@ -304,12 +270,15 @@ def assemble_letter_multiple_fonts(font_paths, glyph_name, h_cuts=None, v_cuts=N
                 poly = None
                 
             polygons.append(poly)
+            if piece_cache is not None:
+                piece_cache.put((key, "glyph"), poly)
         except Exception as e:
-            print(f"Errore nel leggere font {font_path}: {str(e)}")
+            print(f"Errore nel leggere font {source.path}: {str(e)}")
             traceback.print_exc()
             polygons.append(None)
     
     # Filtriamo i poligoni nulli
+    valid_keys = [key for p, key in zip(polygons, keys) if p and not p.is_empty]
     valid_polygons = [p for p in polygons if p and not p.is_empty]
     if not valid_polygons:
         print(f"Nessun poligono valido per il glifo '{glyph_name}'")
@@ -317,22 +286,6 @@ def assemble_letter_multiple_fonts(font_paths, glyph_name, h_cuts=None, v_cuts=N
     
     print(f"Ottenuti {len(valid_polygons)} poligoni validi su {len(polygons)} totali")
     
-    # Normalizza la dimensione dei glifi se richiesto
-    if normalize:
-        normalized_polygons = []
-        for i, poly in enumerate(valid_polygons):
-            normalized = normalize_glyph_polygon(poly, target_height=1000)
-            if normalized and not normalized.is_empty:
-                normalized_polygons.append(normalized)
-                print(f"  Poligono {i+1} normalizzato con bounds: {normalized.bounds}")
-            else:
-                print(f"  Errore nella normalizzazione del poligono {i+1}")
-        
-        valid_polygons = normalized_polygons
-        if not valid_polygons:
-            print(f"Errore: tutti i poligoni sono stati persi durante la normalizzazione")
-            return None
-    
     # Usa il nuovo metodo di mixaggio deterministico
     use_vertical = cut_method == "checkerboard" or len(normalized_v_cuts) > 0
     
@@ -343,7 +296,12 @@ def assemble_letter_multiple_fonts(font_paths, glyph_name, h_cuts=None, v_cuts=N
     result = mix_fonts_deterministic(
         valid_polygons,
         normalized_h_cuts,
-        normalized_v_cuts if use_vertical else None
+        normalized_v_cuts if use_vertical else None,
+        backend=clip_backend,
+        plan=plan,
+        piece_cache=piece_cache,
+        piece_keys=valid_keys,
+        bounds=plan.frame(glyph_name, None) if plan is not None else None
     )
     
     if result is None or result.is_empty:
@@ -352,8 +310,78 @@ def assemble_letter_multiple_fonts(font_paths, glyph_name, h_cuts=None, v_cuts=N
     
     print(f"Mixaggio completato con successo per '{glyph_name}'")
     return result
-    
-import os
+
+def _slice_rings_separately(outlines, x_edges, y_edges, assignment):
+    """
+    Taglio di riserva per l'anteprima: ogni contorno viene tagliato da solo,
+    reso antiorario e poi riportato al suo verso, così i contorni che si
+    sovrappongono non vengono ricomposti tra loro. I pezzi si disegnano
+    correttamente con la regola di riempimento nonzero.
+    """
+    pieces = []
+    for font_index, outline in enumerate(outlines):
+        mask = np.where(assignment == font_index, 0, -1)
+        rows, cols = np.nonzero(mask == 0)
+        for ring, area in zip(outline, outline.signed_areas()):
+            ring = GlyphOutline(ring)
+            if area < 0:
+                ring = ring.reversed()
+            try:
+                part = GlyphOutline.concatenate(slice_grid([ring], x_edges, y_edges, mask))
+            except ValueError:
+                # Contorno che si autointerseca: ritaglio di Shapely senza riparazione
+                polygon = ring.to_polygons()[0]
+                parts = shapely.get_parts([
+                    shapely.clip_by_rect(polygon, x_edges[c], y_edges[r], x_edges[c + 1], y_edges[r + 1])
+                    for r, c in zip(rows, cols)
+                ])
+                part = GlyphOutline.from_shapely(shapely.multipolygons(parts[shapely.get_type_id(parts) == 3]))
+            pieces.append(part.reversed() if area < 0 else part)
+    return GlyphOutline.concatenate(pieces)
 
 
-from fontTools.ttLib import TTFont
\ No newline at end of file
+def preview_letter_outline(session, glyph_name, plan, normalize=True):
+    """
+    Mixaggio veloce a bassa fedeltà per l'anteprima dal vivo.
+    I contorni dei font vengono tagliati direttamente con slice_grid, senza
+    costruire i poligoni e senza riparare le geometrie non valide: i pezzi
+    non vengono nemmeno uniti, servono solo a disegnare la lettera.
+    
+    Args:
+        session: FontSession con i font sorgente (di solito con appiattimento grossolano)
+        glyph_name: Lettera da assemblare
+        plan: MixPlan con i tagli correnti
+        normalize: Se True, normalizza le dimensioni dei glifi
+    
+    Returns:
+        GlyphOutline con i pezzi di tutte le celle (vuoto se non ci sono contorni)
+    """
+    outlines = []
+    for source in session:
+        outline = GlyphOutline.from_contours(source.get_contours(glyph_name))
+        outline = outline.select(outline.ring_mask())
+        if not outline:
+            continue
+        if normalize:
+            transform = normalization_transform(outline, source.cap_height)
+            if transform is None:
+                continue
+            outline = outline.transform(*transform)
+        outlines.append(outline)
+    
+    if len(outlines) < 2:
+        return outlines[0] if outlines else GlyphOutline()
+    
+    x_edges, y_edges = plan.edges(GlyphOutline.concatenate(outlines).bounds)
+    assignment = plan.layout(len(outlines)).assignment
+    
+    # slice_grid vuole i contorni esterni antiorari: nei font TrueType sono orari
+    oriented = []
+    for outline in outlines:
+        areas = outline.signed_areas()
+        oriented.append(outline.reversed() if areas[np.argmax(np.abs(areas))] < 0 else outline)
+    try:
+        return GlyphOutline.concatenate(slice_grid(oriented, x_edges, y_edges, assignment))
+    except ValueError:
+        # Contorni sovrapposti: non si possono ricomporre insieme
+        return _slice_rings_separately(outlines, x_edges, y_edges, assignment)
@@ -6,7 +6,6 @@ Contiene la finestra principale e la gestione degli eventi dell'interfaccia.
 import os
 import sys
 import traceback
-import random
 from string import ascii_uppercase
 
 # PyQt5 per la GUI
@@ -15,15 +14,23 @@ from PyQt5.QtWidgets import (
     QWidget, QComboBox, QListWidget, QSlider, QTabWidget,
     QFileDialog, QMessageBox, QProgressBar, QGroupBox, QScrollArea,
     QGridLayout, QSizePolicy, QLineEdit, QListWidgetItem, QCheckBox,
-    QDialog, QTextEdit
+    QDialog, QTextEdit, QSpinBox
 )
-from PyQt5.QtGui import QFontDatabase, QFont
-from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFontDatabase, QFont, QRegExpValidator
+from PyQt5.QtCore import Qt, QTimer, QRect, QRegExp
 
 from fontTools.ttLib import TTFont
 
 from visualization import LetterPreviewWidget, AlphabetPreviewWidget
 from generator import FontGeneratorThread
+from curve_fitting import DEFAULT_FIT_ERROR
+from bezier_utils import DEFAULT_FLATTEN_TOLERANCE
+from parallel_assembly import DEFAULT_WORKERS
+from piece_cache import PieceCache
+from result_cache import ResultCache
+from font_mixer import new_seed
+from mix_plan import MixPlan
+from live_preview import LivePreview, FullPreviewThread, PREVIEW_DELAY_MS, PREVIEW_LETTERS
 
 
 class FontMixerApp(QMainWindow):
@@ -44,6 +51,30 @@ class FontMixerApp(QMainWindow):
         self.letters_dict = {}
         self.output_font_path = ""
         
+        # Pezzi ritagliati riusati tra una generazione e l'altra
+        # e con l'anteprima in qualità piena, che usa la stessa tolleranza
+        self.piece_cache = PieceCache()
+        self.flatten_tolerance = DEFAULT_FLATTEN_TOLERANCE
+        
+        # Font già generati: stessi font e parametri (o seme) non vengono rigenerati
+        self.result_cache = ResultCache()
+        self.generation_seed = None
+        
+        # Anteprima dal vivo dei tagli: bassa fedeltà durante il trascinamento,
+        # qualità piena al rilascio degli slider
+        self.live_preview = LivePreview()
+        self.full_preview_thread = None
+        self.preview_threads = []
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_DELAY_MS)
+        self.preview_timer.timeout.connect(self.updateLivePreview)
+        
+        # Generazione in corso e generazioni annullate non ancora terminate
+        self.generator_thread = None
+        self.stopped_threads = []
+        self.streamed_letters = {}
+        
         self.setupUi()
         self.loadAvailableFonts()
         
@@ -105,7 +136,12 @@ class FontMixerApp(QMainWindow):
         generate_layout = QHBoxLayout()
         self.btn_generate = QPushButton("GENERA FONT")
         self.btn_generate.setMinimumHeight(40)
-        generate_layout.addWidget(self.btn_generate)
+        generate_layout.addWidget(self.btn_generate, 3)
+        
+        self.btn_cancel = QPushButton("Annulla")
+        self.btn_cancel.setMinimumHeight(40)
+        self.btn_cancel.setEnabled(False)
+        generate_layout.addWidget(self.btn_cancel, 1)
         
         progress_layout = QHBoxLayout()
         self.progress_bar = QProgressBar()
@@ -125,9 +161,9 @@ class FontMixerApp(QMainWindow):
         preview_controls_layout = QHBoxLayout()
         
         # Lettere scroll
-        letters_scroll = QScrollArea()
-        letters_scroll.setWidgetResizable(True)
-        letters_scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.letters_scroll = QScrollArea()
+        self.letters_scroll.setWidgetResizable(True)
+        self.letters_scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         
         letters_container = QWidget()
         
@@ -158,7 +194,7 @@ class FontMixerApp(QMainWindow):
             letters_grid_layout.addWidget(letter_widget, row, col)
             self.letter_widgets[letter] = letter_widget
         
-        letters_scroll.setWidget(letters_container)
+        self.letters_scroll.setWidget(letters_container)
         
         preview_controls = QWidget()
         preview_controls_panel = QVBoxLayout(preview_controls)
@@ -181,7 +217,7 @@ class FontMixerApp(QMainWindow):
         preview_controls_panel.addWidget(self.btn_test_text)
         preview_controls_panel.addStretch()
         
-        preview_controls_layout.addWidget(letters_scroll, 7)
+        preview_controls_layout.addWidget(self.letters_scroll, 7)
         preview_controls_layout.addWidget(preview_controls, 3)
         
         preview_alphabet_group = QGroupBox("Anteprima Alfabeto Completo")
@@ -200,6 +236,7 @@ class FontMixerApp(QMainWindow):
         self.btn_move_up.clicked.connect(self.onMoveUp)
         self.btn_move_down.clicked.connect(self.onMoveDown)
         self.btn_generate.clicked.connect(self.onGenerateFont)
+        self.btn_cancel.clicked.connect(self.onCancelGeneration)
         self.combo_cut_method.currentIndexChanged.connect(self.onCutMethodChanged)
         self.btn_export.clicked.connect(self.onExportFont)
         self.btn_load_in_system.clicked.connect(self.onLoadInSystem)
@@ -230,6 +267,14 @@ class FontMixerApp(QMainWindow):
             "Personalizzato", 
         ])
         cut_method_layout.addWidget(self.combo_cut_method)
+        
+        cut_method_layout.addSpacing(20)
+        cut_method_layout.addWidget(QLabel("Seme:"))
+        self.seed_edit = QLineEdit()
+        self.seed_edit.setPlaceholderText("nuovo a ogni generazione")
+        self.seed_edit.setValidator(QRegExpValidator(QRegExp(r"\d{0,19}")))
+        self.seed_edit.setToolTip("Con lo stesso seme i tagli casuali di ogni lettera sono sempre gli stessi")
+        cut_method_layout.addWidget(self.seed_edit)
         mix_layout.addLayout(cut_method_layout)
         
         # Normalizzazione dimensione
@@ -244,6 +289,32 @@ class FontMixerApp(QMainWindow):
         self.check_vertical_cuts = QCheckBox()
         self.check_vertical_cuts.setChecked(False)
         norm_layout.addWidget(self.check_vertical_cuts)
+
+        norm_layout.addSpacing(20)
+        norm_layout.addWidget(QLabel("Mantieni curve:"))
+        self.check_preserve_curves = QCheckBox()
+        self.check_preserve_curves.setChecked(False)
+        norm_layout.addWidget(self.check_preserve_curves)
+
+        norm_layout.addSpacing(20)
+        norm_layout.addWidget(QLabel("Comprimi contorni:"))
+        self.check_fit_curves = QCheckBox()
+        self.check_fit_curves.setChecked(False)
+        norm_layout.addWidget(self.check_fit_curves)
+
+        norm_layout.addSpacing(20)
+        norm_layout.addWidget(QLabel("Ritaglio NumPy:"))
+        self.check_numpy_clip = QCheckBox()
+        self.check_numpy_clip.setChecked(False)
+        norm_layout.addWidget(self.check_numpy_clip)
+
+        norm_layout.addSpacing(20)
+        norm_layout.addWidget(QLabel("Processi:"))
+        self.spin_workers = QSpinBox()
+        self.spin_workers.setRange(1, DEFAULT_WORKERS)
+        self.spin_workers.setValue(1)
+        self.spin_workers.setToolTip("Numero di processi che assemblano le lettere in parallelo")
+        norm_layout.addWidget(self.spin_workers)
         norm_layout.addStretch()
         
         mix_layout.addLayout(norm_layout)
@@ -270,6 +341,7 @@ class FontMixerApp(QMainWindow):
             
             slider.valueChanged.connect(lambda v, lbl=value_label: lbl.setText(f"{v}%"))
             slider.valueChanged.connect(self.updateCutPreview)
+            slider.sliderReleased.connect(self.startFullPreview)
             
             self.h_cut_sliders.append((slider, value_label))
             
@@ -297,29 +369,149 @@ class FontMixerApp(QMainWindow):
             
             slider.valueChanged.connect(lambda v, lbl=value_label: lbl.setText(f"{v}%"))
             slider.valueChanged.connect(self.updateCutPreview)
+            slider.sliderReleased.connect(self.startFullPreview)
             
             self.v_cut_sliders.append((slider, value_label))
         
         mix_layout.addWidget(self.v_cuts_group)
         
+        # Striscia di lettere ricalcolate mentre si spostano i tagli
+        self.live_preview_group = QGroupBox("Anteprima dal vivo")
+        live_preview_layout = QHBoxLayout(self.live_preview_group)
+        
+        self.live_letter_widgets = {}
+        for letter in PREVIEW_LETTERS:
+            letter_widget = LetterPreviewWidget(letter)
+            letter_widget.setMinimumSize(80, 110)
+            live_preview_layout.addWidget(letter_widget)
+            self.live_letter_widgets[letter] = letter_widget
+        
+        mix_layout.addWidget(self.live_preview_group)
+        
+        self.check_normalize.stateChanged.connect(self.refreshLivePreview)
+        self.check_vertical_cuts.stateChanged.connect(self.refreshLivePreview)
+        
         # Inizialmente nascondi i gruppi di sliders
         self.h_cuts_group.setVisible(False)
         self.v_cuts_group.setVisible(False)
+        self.live_preview_group.setVisible(False)
         
     def updateCutPreview(self):
-        """Aggiorna l'anteprima delle linee di taglio quando gli slider cambiano"""
-        if not self.letters_dict:
-            return  # Nessuna lettera da visualizzare
-        
-        # Ottieni i valori di taglio correnti
-        h_cuts = self.getCustomCutPoints()
-        v_cuts = self.getCustomVerticalCutPoints()
+        """
+        Aggiorna l'anteprima delle linee di taglio quando gli slider cambiano
+        e programma il ricalcolo delle lettere visibili (con un breve ritardo,
+        così gli spostamenti ravvicinati producono un solo ricalcolo).
+        """
+        h_cuts, v_cuts = self.getPreviewCuts()
         
         # Aggiorna le linee di taglio in ogni widget lettera
-        for letter, widget in self.letter_widgets.items():
+        widgets = list(self.live_letter_widgets.values())
+        if self.letters_dict:
+            widgets.extend(self.letter_widgets.values())
+        for widget in widgets:
             widget.setCutLines(h_cuts)
             widget.setVerticalCutLines(v_cuts)
         
+        self.preview_timer.start()
+    
+    def getPreviewCuts(self):
+        """Punti di taglio (orizzontali, verticali) del metodo selezionato; vuoti se casuale"""
+        h_cuts = []
+        v_cuts = []
+        method = self.combo_cut_method.currentText()
+        num_cuts = self.font_list.count() - 1
+        
+        if method == "Personalizzato":
+            h_cuts = self.getCustomCutPoints()
+            if self.check_vertical_cuts.isChecked():
+                v_cuts = self.getCustomVerticalCutPoints()
+        elif method == "Equidistante":
+            h_cuts = [(i + 1) / (num_cuts + 1) for i in range(num_cuts)]
+            if self.check_vertical_cuts.isChecked():
+                v_cuts = h_cuts.copy()
+        return h_cuts, v_cuts
+    
+    def getPreviewPlan(self):
+        """MixPlan dei tagli correnti, oppure None se i tagli sono casuali o i font meno di due"""
+        if self.font_list.count() < 2 or self.combo_cut_method.currentText() == "Casuale":
+            return None
+        h_cuts, v_cuts = self.getPreviewCuts()
+        return MixPlan(h_cuts, v_cuts)
+    
+    def visibleLetterWidgets(self):
+        """
+        Widget delle lettere attualmente sullo schermo, raggruppati per lettera:
+        la striscia del generatore e, dopo una generazione, le lettere visibili
+        della scheda di anteprima.
+        """
+        targets = {}
+        widgets = list(self.live_letter_widgets.items())
+        widgets.extend((letter, widget) for letter, widget in self.letter_widgets.items() if letter in self.letters_dict)
+        for letter, widget in widgets:
+            if widget.isVisible() and not widget.visibleRegion().isEmpty():
+                targets.setdefault(letter, []).append(widget)
+        return targets
+    
+    def updateLivePreview(self):
+        """Ricalcola in bassa fedeltà le lettere visibili con i tagli correnti"""
+        plan = self.getPreviewPlan()
+        targets = self.visibleLetterWidgets()
+        if plan is None or not targets:
+            return
+        
+        try:
+            self.live_preview.set_fonts(self.getSelectedFontPaths())
+            results = self.live_preview.mix(list(targets), plan, self.check_normalize.isChecked())
+        except Exception as e:
+            print(f"Errore nell'anteprima dal vivo: {str(e)}")
+            traceback.print_exc()
+            return
+        
+        for letter, contours in results.items():
+            for widget in targets[letter]:
+                widget.setContours(contours)
+    
+    def startFullPreview(self):
+        """Avvia il ricalcolo in qualità piena delle lettere visibili (al rilascio di uno slider)"""
+        plan = self.getPreviewPlan()
+        targets = self.visibleLetterWidgets()
+        if plan is None or not targets:
+            return
+        
+        # Un ricalcolo ancora in corso è superato da questo
+        if self.full_preview_thread is not None:
+            self.full_preview_thread.requestInterruption()
+        
+        thread = FullPreviewThread(
+            self.getSelectedFontPaths(),
+            list(targets),
+            plan,
+            normalize=self.check_normalize.isChecked(),
+            mix_method="checkerboard" if self.check_vertical_cuts.isChecked() else "horizontal",
+            clip_backend="numpy" if self.check_numpy_clip.isChecked() else "shapely",
+            piece_cache=self.piece_cache,
+            flatten_tolerance=self.flatten_tolerance
+        )
+        thread.preview_complete.connect(lambda results, t=thread: self.onFullPreviewComplete(t, results))
+        thread.finished.connect(lambda t=thread: self.preview_threads.remove(t))
+        self.preview_threads.append(thread)
+        self.full_preview_thread = thread
+        thread.start()
+    
+    def onFullPreviewComplete(self, thread, results):
+        """Mostra le lettere in qualità piena, se nel frattempo i tagli non sono cambiati"""
+        if thread is not self.full_preview_thread or self.preview_timer.isActive():
+            return
+        targets = self.visibleLetterWidgets()
+        for letter, contours in results.items():
+            for widget in targets.get(letter, []):
+                widget.setContours(contours)
+    
+    def refreshLivePreview(self):
+        """Ricalcola subito l'anteprima dal vivo e poi la sua versione in qualità piena"""
+        self.updateLivePreview()
+        self.startFullPreview()
+        
     def loadAvailableFonts(self):
         """Carica i font disponibili dalla cartella 'fonts'"""
         font_dir = "fonts"
@@ -364,6 +556,7 @@ class FontMixerApp(QMainWindow):
         
         # Aggiorna visibilità e stato degli slider orizzontali
         self.h_cuts_group.setVisible(method == "Personalizzato")
+        self.live_preview_group.setVisible(method != "Casuale" and can_generate)
         for i, (slider, label) in enumerate(self.h_cut_sliders):
             enabled = i < num_cuts and method == "Personalizzato"
             slider.setEnabled(enabled)
@@ -444,6 +637,7 @@ class FontMixerApp(QMainWindow):
             
             # Aggiorna i punti di taglio
             self.updateCutSliders()
+            self.refreshLivePreview()
     
     def onRemoveFont(self):
         """Rimuove i font selezionati dalla lista"""
@@ -457,6 +651,7 @@ class FontMixerApp(QMainWindow):
             
         self.updateUI()
         self.updateCutSliders()
+        self.refreshLivePreview()
     
     def onMoveUp(self):
         """Sposta il font selezionato verso l'alto"""
@@ -469,6 +664,7 @@ class FontMixerApp(QMainWindow):
         self.font_list.setCurrentItem(item)
         
         self.updateUI()
+        self.refreshLivePreview()
     
     def onMoveDown(self):
         """Sposta il font selezionato verso il basso"""
@@ -481,6 +677,7 @@ class FontMixerApp(QMainWindow):
         self.font_list.setCurrentItem(item)
         
         self.updateUI()
+        self.refreshLivePreview()
     
     def onCutMethodChanged(self, index):
         """Gestisce il cambio del metodo di taglio"""
@@ -489,11 +686,13 @@ class FontMixerApp(QMainWindow):
         
         self.h_cuts_group.setVisible(method == "Personalizzato")
         self.v_cuts_group.setVisible(method == "Personalizzato" and use_vertical)
+        self.seed_edit.setEnabled(method == "Casuale")
         
         self.updateUI()
         
         if method == "Equidistante":
             self.updateEqualCutSliders()
+        self.refreshLivePreview()
             
     def getCustomVerticalCutPoints(self):
         """Ottiene i punti di taglio verticali personalizzati"""
@@ -575,7 +774,10 @@ class FontMixerApp(QMainWindow):
             )
             return
         
-        self.btn_generate.setEnabled(False)
+        # Una nuova richiesta sostituisce la generazione ancora in corso
+        if self.stopGeneration():
+            print("Generazione precedente annullata")
+        
         self.progress_bar.setValue(0)
         self.progress_status.setText("Inizializzazione...")
         
@@ -584,6 +786,7 @@ class FontMixerApp(QMainWindow):
         cut_method = self.combo_cut_method.currentText().lower()
         h_cuts = None
         v_cuts = None
+        seed = None
         
         # Determina i punti di taglio in base al metodo selezionato
         if cut_method == "personalizzato":
@@ -597,16 +800,17 @@ class FontMixerApp(QMainWindow):
             if self.check_vertical_cuts.isChecked():
                 v_cuts = h_cuts.copy()
         else:  # casuale
-            num_cuts = self.font_list.count() - 1
-            h_cuts = [random.uniform(0.2, 0.8) for _ in range(num_cuts)]
-            h_cuts.sort()  # Ordinati per chiarezza
-            
-            if self.check_vertical_cuts.isChecked():
-                v_cuts = [random.uniform(0.2, 0.8) for _ in range(num_cuts)]
-                v_cuts.sort()
+            # I tagli di ogni lettera derivano dal seme: indicato o nuovo, viene
+            # mostrato alla fine per poter riprodurre il font
+            seed_text = self.seed_edit.text().strip()
+            seed = int(seed_text) if seed_text else new_seed()
+        self.generation_seed = seed
         
         use_vertical_cuts = self.check_vertical_cuts.isChecked()
         normalize = self.check_normalize.isChecked()
+        preserve_curves = self.check_preserve_curves.isChecked()
+        fit_error = DEFAULT_FIT_ERROR if self.check_fit_curves.isChecked() else None
+        clip_backend = "numpy" if self.check_numpy_clip.isChecked() else "shapely"
         
         font_name = self.font_name_edit.text().strip()
         if not font_name:
@@ -620,14 +824,112 @@ class FontMixerApp(QMainWindow):
             v_cuts,
             normalize,
             use_vertical_cuts,  
-            font_name
+            font_name,
+            flatten_tolerance=self.flatten_tolerance,
+            preserve_curves=preserve_curves,
+            fit_error=fit_error,
+            clip_backend=clip_backend,
+            workers=self.spin_workers.value(),
+            piece_cache=self.piece_cache,
+            priority_letters=self.visiblePreviewLetters(),
+            seed=seed,
+            result_cache=self.result_cache
         )
         
         self.generator_thread.update_progress.connect(self.updateProgress)
         self.generator_thread.generation_complete.connect(self.onGenerationComplete)
+        self.generator_thread.generation_cancelled.connect(self.onGenerationCancelled)
+        self.generator_thread.letter_ready.connect(self.onLetterReady)
         
+        # Le anteprime si riempiono man mano che le lettere sono pronte
+        self.streamed_letters = {}
+        for widget in self.letter_widgets.values():
+            widget.setContours([])
+        self.alphabet_preview.setLetters(self.streamed_letters)
+        
+        self.btn_cancel.setEnabled(True)
         self.generator_thread.start()
     
+    def stopGeneration(self):
+        """
+        Annulla la generazione in corso. I suoi segnali vengono scollegati,
+        così una generazione superata non aggiorna più l'interfaccia; il thread
+        resta referenziato finché non termina (entro la lettera in corso).
+        Le cache dei pezzi e dei contorni restano valide per la generazione successiva.
+        
+        Returns:
+            True se c'era una generazione da annullare
+        """
+        thread = self.generator_thread
+        self.generator_thread = None
+        self.btn_cancel.setEnabled(False)
+        if thread is None or thread.isFinished():
+            return False
+        
+        thread.cancel()
+        thread.update_progress.disconnect()
+        thread.generation_complete.disconnect()
+        thread.generation_cancelled.disconnect()
+        thread.letter_ready.disconnect()
+        self.stopped_threads.append(thread)
+        thread.finished.connect(self.onStoppedThreadFinished)
+        # Il thread può essere terminato prima del collegamento al segnale
+        if thread.isFinished():
+            self.releaseStoppedThread(thread)
+        return True
+    
+    def onStoppedThreadFinished(self):
+        """Rilascia un thread annullato quando termina"""
+        self.releaseStoppedThread(self.sender())
+    
+    def releaseStoppedThread(self, thread):
+        """Toglie un thread annullato dalla lista; può essere chiamato più volte"""
+        if thread in self.stopped_threads:
+            self.stopped_threads.remove(thread)
+    
+    def visiblePreviewLetters(self):
+        """
+        Lettere della scheda di anteprima che rientrano nell'area visibile
+        della griglia scorrevole (anche se la scheda non è quella attiva).
+        """
+        container = self.letters_scroll.widget()
+        viewport = self.letters_scroll.viewport()
+        visible = QRect(-container.x(), -container.y(), viewport.width(), viewport.height())
+        return [
+            letter for letter, widget in self.letter_widgets.items()
+            if widget.geometry().intersects(visible)
+        ]
+    
+    def onLetterReady(self, letter, contours):
+        """Mostra subito una lettera appena assemblata nelle anteprime"""
+        self.streamed_letters[letter] = contours
+        if letter in self.letter_widgets:
+            h_cuts, v_cuts = self.getPreviewCuts()
+            widget = self.letter_widgets[letter]
+            widget.setContours(contours)
+            widget.setCutLines(h_cuts)
+            widget.setVerticalCutLines(v_cuts)
+        self.alphabet_preview.update()
+    
+    def onCancelGeneration(self):
+        """Gestisce il pulsante Annulla"""
+        if self.stopGeneration():
+            self.onGenerationCancelled()
+    
+    def onGenerationCancelled(self):
+        """Riporta l'interfaccia allo stato iniziale dopo un annullamento"""
+        self.btn_cancel.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.progress_status.setText("Annullato")
+        self.restoreLetterPreviews()
+    
+    def restoreLetterPreviews(self):
+        """Rimette nelle anteprime le lettere dell'ultimo font generato"""
+        for widget in self.letter_widgets.values():
+            widget.setContours([])
+        self.updateLetterPreviews()
+        self.alphabet_preview.setLetters(self.letters_dict)
+    
     def updateProgress(self, value, status):
         """Aggiorna la barra di progresso"""
         self.progress_bar.setValue(value)
@@ -636,8 +938,10 @@ class FontMixerApp(QMainWindow):
     def onGenerationComplete(self, success, message, letters_dict):
         """Gestisce il completamento della generazione"""
         self.btn_generate.setEnabled(True)
+        self.btn_cancel.setEnabled(False)
         
         if not success:
+            self.restoreLetterPreviews()
             QMessageBox.warning(self, "Errore", f"Generazione fallita:\n{message}")
             return
         
@@ -665,10 +969,15 @@ class FontMixerApp(QMainWindow):
                 print("Passaggio alla tab di anteprima")
                 self.tabs.setCurrentIndex(1)
                 
+                seed_message = ""
+                if self.generation_seed is not None:
+                    seed_message = f"\nSeme: {self.generation_seed}"
+                    self.seed_edit.setPlaceholderText(f"nuovo a ogni generazione (ultimo: {self.generation_seed})")
+                
                 QMessageBox.information(
                     self, 
                     "Font Generato", 
-                    f"Font generato con successo!\nSalvato in: {self.output_font_path}"
+                    f"Font generato con successo!\nSalvato in: {self.output_font_path}{seed_message}"
                 )
             else:
                 err_message = "Il file generato non è stato trovato o non contiene dati validi.\n"
@@ -692,19 +1001,7 @@ class FontMixerApp(QMainWindow):
             return
             
         try:
-            h_cuts = []
-            v_cuts = []
-            method = self.combo_cut_method.currentText()
-            num_cuts = self.font_list.count() - 1
-            
-            if method == "Personalizzato":
-                h_cuts = self.getCustomCutPoints()
-                if self.check_vertical_cuts.isChecked():
-                    v_cuts = self.getCustomVerticalCutPoints()
-            elif method == "Equidistante":
-                h_cuts = [(i + 1) / (num_cuts + 1) for i in range(num_cuts)]
-                if self.check_vertical_cuts.isChecked():
-                    v_cuts = h_cuts.copy()
+            h_cuts, v_cuts = self.getPreviewCuts()
             
             print(f"Aggiornamento anteprime con h_cuts={h_cuts}, v_cuts={v_cuts}")
             
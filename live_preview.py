@@ -0,0 +1,125 @@
+"""
+Modulo per l'anteprima dal vivo del mixaggio mentre si spostano i tagli.
+Durante il trascinamento degli slider le lettere visibili vengono ricalcolate
+in bassa fedeltà (appiattimento grossolano, nessuna riparazione delle geometrie);
+al rilascio un thread ricalcola le stesse lettere con la qualità piena.
+Nessun file di font viene scritto.
+"""
+
+import time
+import traceback
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from bezier_utils import DEFAULT_FLATTEN_TOLERANCE
+from font_session import FontSession
+from outline_cache import OutlineCache
+from glyph_processing import preview_letter_outline
+from glyph_outline import GlyphOutline
+from parallel_assembly import assemble_letter
+
+# Tolleranza di appiattimento dell'anteprima dal vivo, in unità del font
+PREVIEW_FLATTEN_TOLERANCE = 4.0
+
+# Attesa dopo l'ultimo spostamento di uno slider prima del ricalcolo (ms)
+PREVIEW_DELAY_MS = 30
+
+# Lettere mostrate nella striscia di anteprima del generatore
+PREVIEW_LETTERS = "AGKRSW"
+
+
+class LivePreview:
+    """
+    Mixaggio in bassa fedeltà delle lettere visibili.
+    Mantiene aperta una FontSession con appiattimento grossolano finché
+    i font selezionati non cambiano: i contorni vengono letti una sola volta.
+    """
+    def __init__(self, tolerance=PREVIEW_FLATTEN_TOLERANCE):
+        self.tolerance = tolerance
+        self.session = None
+
+    def set_fonts(self, font_paths):
+        """Apre i font indicati, riusando la sessione se sono gli stessi"""
+        font_paths = list(font_paths)
+        if self.session is not None and self.session.font_paths == font_paths:
+            return
+        self.close()
+        if len(font_paths) >= 2:
+            self.session = FontSession(font_paths, None, self.tolerance)
+
+    def mix(self, letters, plan, normalize=True):
+        """
+        Ricalcola le lettere indicate con il piano di mixaggio corrente.
+
+        Args:
+            letters: Lettere da ricalcolare
+            plan: MixPlan con i tagli correnti
+            normalize: Se True, normalizza le dimensioni dei glifi
+
+        Returns:
+            Dizionario {lettera: GlyphOutline}; le lettere che non si
+            riescono a ricomporre vengono omesse
+        """
+        if self.session is None:
+            return {}
+        start = time.perf_counter()
+        results = {}
+        for letter in letters:
+            try:
+                results[letter] = preview_letter_outline(self.session, letter, plan, normalize)
+            except Exception as e:
+                print(f"Anteprima dal vivo non riuscita per '{letter}': {str(e)}")
+        print(f"Anteprima dal vivo: {len(results)} lettere in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return results
+
+    def close(self):
+        """Chiude i font della sessione di anteprima"""
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+
+class FullPreviewThread(QThread):
+    """
+    Thread per il ricalcolo in qualità piena delle lettere visibili
+    al rilascio di uno slider. Usa lo stesso assemblaggio della generazione
+    ma non crea il font.
+    """
+    preview_complete = pyqtSignal(dict)  # {lettera: contorni}
+
+    def __init__(self, font_paths, letters, plan, normalize=True, mix_method="horizontal",
+                 clip_backend="shapely", piece_cache=None, flatten_tolerance=DEFAULT_FLATTEN_TOLERANCE):
+        super().__init__()
+        self.font_paths = font_paths
+        self.letters = list(letters)
+        self.plan = plan
+        self.normalize = normalize
+        self.mix_method = mix_method
+        self.clip_backend = clip_backend
+        self.piece_cache = piece_cache  # Condivisa con la generazione: i pezzi restano validi
+        self.flatten_tolerance = flatten_tolerance  # La stessa della generazione, per gli stessi pezzi
+
+    def run(self):
+        """Assembla le lettere e le invia all'interfaccia"""
+        results = {}
+        try:
+            with FontSession(self.font_paths, OutlineCache(), self.flatten_tolerance) as session:
+                for letter in self.letters:
+                    if self.isInterruptionRequested():
+                        return
+                    try:
+                        contours, _ = assemble_letter(
+                            session, letter, self.plan.h_cuts, self.plan.v_cuts, self.normalize,
+                            self.mix_method, self.clip_backend, False, self.flatten_tolerance,
+                            self.plan, self.piece_cache
+                        )
+                    except Exception as e:
+                        print(f"Errore nell'anteprima della lettera {letter}: {str(e)}")
+                        traceback.print_exc()
+                        contours = GlyphOutline()
+                    results[letter] = contours
+        except Exception as e:
+            print(f"Errore nell'anteprima in qualità piena: {str(e)}")
+            traceback.print_exc()
+            return
+        self.preview_complete.emit(results)
@@ -1,13 +1,12 @@
 """
 Entry point dell'applicazione Font Mixer.
-Avvia la GUI e imposta le cartelle necessarie.
+Avvia la GUI e imposta le cartelle necessarie; con --batch esegue
+invece i lavori di un manifest e con --explore genera tutte le
+combinazioni dei font di una cartella, senza interfaccia grafica.
 """
 
 import os
 import sys
-from PyQt5.QtWidgets import QApplication
-
-from gui import FontMixerApp
 
 
 def main():
@@ -15,17 +14,30 @@ def main():
     Funzione principale che avvia l'applicazione.
     Crea le cartelle necessarie e inizializza l'interfaccia.
     """
+    if "--batch" in sys.argv[1:]:
+        # Modalità da riga di comando: PyQt5 non viene importato
+        import batch
+        args = [arg for arg in sys.argv[1:] if arg != "--batch"]
+        sys.exit(batch.main(args))
+    if "--explore" in sys.argv[1:]:
+        import explorer
+        args = [arg for arg in sys.argv[1:] if arg != "--explore"]
+        sys.exit(explorer.main(args))
+
+    from PyQt5.QtWidgets import QApplication
+    from gui import FontMixerApp
+
     app = QApplication(sys.argv)
-    
+
     for folder in ["fonts", "output"]:
         if not os.path.exists(folder):
             os.makedirs(folder)
-    
+
     window = FontMixerApp()
     window.show()
-    
+
     sys.exit(app.exec_())
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,187 @@
+"""
+Modulo per il piano di mixaggio di una generazione.
+Tagli, matrice di assegnazione dei font e rettangoli di fasce e celle
+vengono costruiti una volta e riusati da tutte le lettere.
+"""
+
+import numpy as np
+import shapely
+
+
+def build_font_assignments(num_fonts, rows, cols):
+    """
+    Costruisce la matrice che assegna un font a ogni cella della griglia.
+
+    Args:
+        num_fonts: Numero di font disponibili
+        rows: Numero di righe della griglia
+        cols: Numero di colonne della griglia
+
+    Returns:
+        Lista di righe, ognuna lista di indici di font
+    """
+    font_assignments = []
+
+    if num_fonts == 2:
+        # Schema a 4 quadranti alternati per 2 font
+        font_assignments = [
+            [0, 1],
+            [1, 0]
+        ]
+    elif num_fonts == 3:
+        # Schema per 3 font
+        font_assignments = [
+            [0, 1, 2],
+            [2, 0, 1]
+        ]
+    elif num_fonts == 4:
+        # Schema per 4 font
+        font_assignments = [
+            [0, 1, 2, 3],
+            [3, 2, 1, 0]
+        ]
+    else:
+        # Schema generico
+        for i in range(rows):
+            row_assignments = []
+            for j in range(cols):
+                row_assignments.append((i + j) % num_fonts)
+            font_assignments.append(row_assignments)
+
+    # Adatta la matrice alla dimensione effettiva della griglia
+    while len(font_assignments) < rows:
+        font_assignments.append(font_assignments[-1])
+    font_assignments = font_assignments[:rows]
+
+    for i in range(rows):
+        # Copia la riga: le righe duplicate sopra sono la stessa lista
+        font_assignments[i] = list(font_assignments[i])
+        while len(font_assignments[i]) < cols:
+            font_assignments[i].append(font_assignments[i][-1])
+        font_assignments[i] = font_assignments[i][:cols]
+
+    return font_assignments
+
+
+class GridLayout:
+    """
+    Griglia di un piano per un dato numero di font: assegnazione delle celle,
+    fasce (font, riga) necessarie e rettangoli di fasce e celle nello spazio
+    normalizzato, con il rettangolo della lettera portato sul quadrato unitario.
+    """
+    def __init__(self, x_fractions, y_fractions, assignment):
+        self.assignment = np.asarray(assignment, dtype=np.int64)
+        rows = self.assignment.shape[0]
+
+        # Celle con un font e fasce (font, riga) in cui il font compare
+        self.row_idx, self.col_idx = np.nonzero(self.assignment >= 0)
+        self.font_idx = self.assignment[self.row_idx, self.col_idx]
+        strip_keys, self.strip_of_cell = np.unique(self.font_idx * rows + self.row_idx, return_inverse=True)
+        self.strip_font, self.strip_row = strip_keys // rows, strip_keys % rows
+
+        self.strip_boxes = shapely.box(
+            0.0, y_fractions[self.strip_row], 1.0, y_fractions[self.strip_row + 1]
+        )
+        self.cell_boxes = shapely.box(
+            x_fractions[self.col_idx], y_fractions[self.row_idx],
+            x_fractions[self.col_idx + 1], y_fractions[self.row_idx + 1]
+        )
+
+
+class MixPlan:
+    """
+    Piano di mixaggio: posizioni dei tagli come frazioni (0-1) del rettangolo
+    di ingombro della lettera e matrice di assegnazione dei font alle celle.
+    La griglia per un dato numero di font viene costruita alla prima richiesta
+    e poi riusata; le lettere a cui manca un font ne usano una con meno font.
+
+    Una matrice personalizzata (assignment) sostituisce lo schema predefinito
+    di build_font_assignments: è il punto di estensione per altri schemi.
+    Allo stesso modo i riquadri fissi (frames) sostituiscono il rettangolo
+    di ingombro delle lettere indicate: con lo stesso riquadro i tagli cadono
+    negli stessi punti qualunque siano gli altri font del mixaggio.
+    """
+    def __init__(self, h_cuts, v_cuts=None, assignment=None, frames=None):
+        """
+        Args:
+            h_cuts: Punti di taglio orizzontali (0-1); se vuoti, un taglio a metà
+            v_cuts: Punti di taglio verticali (0-1), opzionali
+            assignment: Matrice (righe, colonne) di indici di font, opzionale
+            frames: Dizionario {lettera: (min_x, min_y, max_x, max_y)} con il
+                riquadro della griglia di ogni lettera, opzionale
+        """
+        h_cuts = list(h_cuts) if h_cuts else [0.5]
+        v_cuts = list(v_cuts) if v_cuts else []
+        self.h_cuts = h_cuts
+        self.v_cuts = v_cuts
+        self.use_vertical = bool(v_cuts)
+        self.y_fractions = np.array([0.0] + [float(c) for c in h_cuts] + [1.0])
+        self.x_fractions = np.array([0.0] + [float(c) for c in v_cuts] + [1.0])
+        self.rows = len(self.y_fractions) - 1
+        self.cols = len(self.x_fractions) - 1
+        self.custom_assignment = None
+        if assignment is not None:
+            self.custom_assignment = np.asarray(assignment, dtype=np.int64)
+            if self.custom_assignment.shape != (self.rows, self.cols):
+                raise ValueError(
+                    f"Matrice di assegnazione {self.custom_assignment.shape} "
+                    f"diversa dalla griglia {self.rows}x{self.cols}"
+                )
+        self.frames = {letter: tuple(map(float, frame)) for letter, frame in (frames or {}).items()}
+        self._layouts = {}
+
+    def __repr__(self):
+        return f"MixPlan({self.rows}x{self.cols}, tagli y={self.h_cuts}, tagli x={self.v_cuts})"
+
+    def assignment_for(self, num_fonts):
+        """
+        Matrice di assegnazione per num_fonts font: quella personalizzata
+        (con le celle dei font mancanti vuote, -1) o lo schema predefinito.
+        """
+        if self.custom_assignment is not None:
+            return np.where(self.custom_assignment < num_fonts, self.custom_assignment, -1)
+        if self.use_vertical:
+            return np.asarray(build_font_assignments(num_fonts, self.rows, self.cols), dtype=np.int64)
+        # Mixaggio orizzontale: una sola colonna, font scelti in modo ciclico
+        return np.arange(self.rows, dtype=np.int64).reshape(-1, 1) % num_fonts
+
+    def layout(self, num_fonts):
+        """GridLayout per num_fonts font, costruita una sola volta"""
+        if num_fonts not in self._layouts:
+            layout = GridLayout(self.x_fractions, self.y_fractions, self.assignment_for(num_fonts))
+            self._layouts[num_fonts] = layout
+            print(f"Piano di mixaggio {self.rows}x{self.cols} per {num_fonts} font:")
+            for row in layout.assignment.tolist():
+                print(row)
+        return self._layouts[num_fonts]
+
+    def frame(self, glyph_name, bounds):
+        """Riquadro della griglia della lettera: quello fisso, se indicato, altrimenti bounds"""
+        return self.frames.get(glyph_name, bounds)
+
+    def edges(self, bounds):
+        """
+        Limiti delle colonne e delle righe nelle coordinate della lettera.
+
+        Args:
+            bounds: Rettangolo (min_x, min_y, max_x, max_y) della lettera
+
+        Returns:
+            Tuple (x_edges, y_edges) di array NumPy
+        """
+        min_x, min_y, max_x, max_y = bounds
+        return (
+            self.x_fractions * (max_x - min_x) + min_x,
+            self.y_fractions * (max_y - min_y) + min_y
+        )
+
+    @staticmethod
+    def place(boxes, bounds):
+        """
+        Porta i rettangoli dello spazio normalizzato sul rettangolo della lettera,
+        con una sola trasformazione per tutti i vertici.
+        """
+        min_x, min_y, max_x, max_y = bounds
+        size = np.array([max_x - min_x, max_y - min_y])
+        origin = np.array([min_x, min_y])
+        return shapely.transform(boxes, lambda coords: coords * size + origin)
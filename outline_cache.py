@@ -0,0 +1,207 @@
+"""
+Modulo per la cache persistente su disco dei contorni dei glifi.
+Memorizza i contorni già appiattiti come array binari compatti,
+indicizzati per hash del file del font, nome del glifo e parametri di appiattimento.
+"""
+
+import os
+import json
+import shutil
+import threading
+import hashlib
+import traceback
+
+import numpy as np
+
+from glyph_outline import GlyphOutline
+
+# Cartella predefinita della cache (relativa come "fonts" e "output")
+DEFAULT_CACHE_DIR = os.path.join("cache", "outlines")
+
+# Da incrementare quando cambia il formato dei contorni memorizzati
+CACHE_VERSION = 2
+
+INDEX_FILE = "index.json"
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """
+    Calcola l'hash SHA-1 del contenuto di un file.
+
+    Args:
+        path: Percorso del file
+        chunk_size: Dimensione dei blocchi letti
+
+    Returns:
+        Stringa esadecimale dell'hash
+    """
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class OutlineCache:
+    """
+    Cache su disco dei contorni estratti dai font sorgente.
+    L'hash di ogni font viene ricalcolato solo quando cambiano
+    mtime o dimensione del file; in quel caso le voci vecchie vengono eliminate.
+    """
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._index = None
+        self._hashes = {}
+
+    def _index_path(self):
+        return os.path.join(self.cache_dir, INDEX_FILE)
+
+    def _load_index(self):
+        if self._index is None:
+            try:
+                with open(self._index_path(), "r", encoding="utf-8") as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _save_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._index_path() + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self._index_path())
+
+    def font_hash(self, path):
+        """
+        Restituisce l'hash del font, usando l'indice se il file non è cambiato.
+
+        Args:
+            path: Percorso del font
+
+        Returns:
+            Hash del contenuto del font
+        """
+        abs_path = os.path.abspath(path)
+        if abs_path in self._hashes:
+            return self._hashes[abs_path]
+
+        stat = os.stat(abs_path)
+        index = self._load_index()
+        entry = index.get(abs_path)
+
+        if entry and entry.get("mtime") == stat.st_mtime and entry.get("size") == stat.st_size:
+            digest = entry["hash"]
+        else:
+            digest = file_hash(abs_path)
+            if entry and entry.get("hash") != digest:
+                self._invalidate(entry["hash"], abs_path)
+            index[abs_path] = {"mtime": stat.st_mtime, "size": stat.st_size, "hash": digest}
+            try:
+                self._save_index()
+            except OSError as e:
+                print(f"Impossibile aggiornare l'indice della cache: {str(e)}")
+
+        self._hashes[abs_path] = digest
+        return digest
+
+    def load_metrics(self, path):
+        """
+        Legge le metriche del font (altezza delle maiuscole, unità per em)
+        salvate nell'indice insieme all'hash del file.
+
+        Args:
+            path: Percorso del font sorgente
+
+        Returns:
+            Dizionario delle metriche, oppure None se non sono ancora state salvate
+        """
+        try:
+            self.font_hash(path)
+        except OSError as e:
+            print(f"Errore nella lettura delle metriche di {os.path.basename(path)}: {str(e)}")
+            return None
+        entry = self._load_index().get(os.path.abspath(path), {})
+        return entry.get("metrics")
+
+    def store_metrics(self, path, metrics):
+        """
+        Salva le metriche del font nell'indice. Vengono scartate insieme
+        alla voce quando il file del font cambia.
+
+        Args:
+            path: Percorso del font sorgente
+            metrics: Dizionario delle metriche (serializzabile in JSON)
+        """
+        try:
+            self.font_hash(path)
+            self._load_index()[os.path.abspath(path)]["metrics"] = dict(metrics)
+            self._save_index()
+        except OSError as e:
+            print(f"Impossibile salvare le metriche di {os.path.basename(path)}: {str(e)}")
+
+    def _invalidate(self, old_hash, abs_path):
+        """Elimina le voci di un hash non più usato da nessun font indicizzato"""
+        index = self._load_index()
+        still_used = any(
+            entry.get("hash") == old_hash
+            for other_path, entry in index.items() if other_path != abs_path
+        )
+        if still_used:
+            return
+        print(f"Cache: contorni obsoleti per {os.path.basename(abs_path)}, eliminazione")
+        shutil.rmtree(os.path.join(self.cache_dir, old_hash), ignore_errors=True)
+
+    def _entry_path(self, path, glyph_name, params):
+        key = json.dumps([CACHE_VERSION, glyph_name, params], sort_keys=True)
+        entry_name = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, self.font_hash(path), entry_name + ".npz")
+
+    def load(self, path, glyph_name, params):
+        """
+        Legge i contorni di un glifo dalla cache.
+
+        Args:
+            path: Percorso del font sorgente
+            glyph_name: Nome del glifo
+            params: Dizionario dei parametri di appiattimento
+
+        Returns:
+            GlyphOutline, oppure None se la voce non esiste
+        """
+        try:
+            entry_path = self._entry_path(path, glyph_name, params)
+            if not os.path.exists(entry_path):
+                return None
+            with np.load(entry_path) as data:
+                coords = data["coords"]
+                offsets = data["offsets"]
+            return GlyphOutline(coords, offsets)
+        except Exception as e:
+            print(f"Errore nella lettura della cache per '{glyph_name}': {str(e)}")
+            return None
+
+    def store(self, path, glyph_name, params, contours):
+        """
+        Scrive i contorni di un glifo nella cache.
+
+        Args:
+            path: Percorso del font sorgente
+            glyph_name: Nome del glifo
+            params: Dizionario dei parametri di appiattimento
+            contours: GlyphOutline (o lista di contorni) da memorizzare
+        """
+        try:
+            entry_path = self._entry_path(path, glyph_name, params)
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+
+            # Il formato su disco coincide con quello di GlyphOutline
+            outline = GlyphOutline.from_contours(contours)
+
+            tmp_path = entry_path + f".{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(f, coords=outline.coords, offsets=outline.offsets)
+            os.replace(tmp_path, entry_path)
+        except Exception as e:
+            print(f"Errore nella scrittura della cache per '{glyph_name}': {str(e)}")
+            traceback.print_exc()
@@ -0,0 +1,119 @@
+"""
+Modulo per l'assemblaggio delle lettere su più processi.
+I contorni dei font sorgente vengono letti una sola volta nel processo
+principale e messi in memoria condivisa; i processi di lavoro ricevono
+solo il descrittore del blocco e restituiscono i risultati allo stesso modo.
+"""
+
+import os
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from geometry_utils import polygon_to_contours
+from glyph_processing import assemble_letter_multiple_fonts
+from curve_mixing import assemble_letter_curves, flatten_curve_contours
+from glyph_outline import GlyphOutline
+from shared_outlines import SharedSourceStore, share_result, take_result, discard_result
+
+# Numero predefinito di processi: uno per core
+DEFAULT_WORKERS = max(1, os.cpu_count() or 1)
+
+# Sessione del processo di lavoro, impostata una volta da _init_worker
+_worker_session = None
+
+
+def assemble_letter(session, letter, h_cuts, v_cuts, normalize, mix_method, clip_backend,
+                    preserve_curves, tolerance, plan=None, piece_cache=None):
+    """
+    Assembla una lettera e la converte nei contorni usati da anteprime e font.
+
+    Args:
+        session: FontSession con i font sorgente
+        letter: Lettera da assemblare
+        h_cuts: Punti di taglio orizzontali (0-1 normalizzati)
+        v_cuts: Punti di taglio verticali (0-1 normalizzati)
+        normalize: Se True, normalizza le dimensioni dei glifi
+        mix_method: Metodo di mixaggio ("horizontal", "checkerboard")
+        clip_backend: Motore di ritaglio dei poligoni
+        preserve_curves: Se True, mantiene le curve originali
+        tolerance: Tolleranza di appiattimento delle curve
+        plan: MixPlan condiviso dalle lettere, oppure None per costruirlo dai tagli
+        piece_cache: PieceCache dei pezzi ritagliati (solo mixaggio con i poligoni)
+
+    Returns:
+        Tuple (contorni, curve): GlyphOutline e contorni quadratici,
+        questi ultimi None se le curve non vengono mantenute
+    """
+    if preserve_curves:
+        # Il dizionario delle lettere riceve solo l'approssimazione usata dalle anteprime
+        curves = assemble_letter_curves(
+            session, letter, h_cuts, v_cuts, normalize, mix_method, tolerance, plan
+        )
+        return flatten_curve_contours(curves, tolerance), curves or []
+
+    poly = assemble_letter_multiple_fonts(
+        session, letter, h_cuts, v_cuts, normalize, mix_method, clip_backend, plan, piece_cache
+    )
+    return (polygon_to_contours(poly) if poly else GlyphOutline()), None
+
+
+def _init_worker(store_info):
+    """Apre il blocco condiviso con i glifi sorgente, una volta per processo"""
+    global _worker_session
+    _worker_session = SharedSourceStore.attach(store_info)
+
+
+def _assemble_task(task):
+    """Assembla la lettera di un'attività e scrive il risultato in memoria condivisa"""
+    letter = task[0]
+    try:
+        contours, curves = assemble_letter(_worker_session, *task)
+        return letter, share_result(contours, curves), None
+    except Exception as e:
+        traceback.print_exc()
+        return letter, share_result(GlyphOutline(), None), str(e)
+
+
+def assemble_letters_parallel(session, tasks, workers=DEFAULT_WORKERS):
+    """
+    Assembla le lettere su un gruppo di processi.
+    I glifi sorgente delle lettere vengono copiati una volta in memoria
+    condivisa; i processi vengono avviati con "spawn", sicuro anche da un thread Qt.
+
+    Args:
+        session: FontSession con i font sorgente
+        tasks: Lista di tuple con gli argomenti di assemble_letter dopo la sessione
+        workers: Numero massimo di processi
+
+    Yields:
+        Tuple (lettera, contorni, curve, errore) nell'ordine di completamento;
+        errore è None se la lettera è stata assemblata. Chiudendo il generatore
+        (close) le lettere non ancora avviate vengono annullate.
+    """
+    letters = list(dict.fromkeys(task[0] for task in tasks))
+    segments = any(task[6] for task in tasks)
+    store = SharedSourceStore.from_session(session, letters, segments)
+    
+    workers = max(1, min(workers, len(tasks)))
+    context = multiprocessing.get_context("spawn")
+    futures = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_worker, initargs=(store.info,)) as pool:
+            futures = [pool.submit(_assemble_task, task) for task in tasks]
+            try:
+                for future in as_completed(futures):
+                    letter, handle, error = future.result()
+                    futures.remove(future)
+                    contours, curves = take_result(handle)
+                    yield letter, contours, curves, error
+            finally:
+                # Generazione interrotta: si attendono solo le lettere già avviate
+                pool.shutdown(wait=True, cancel_futures=True)
+    finally:
+        # Risultati non letti (generazione interrotta): i blocchi vanno eliminati
+        for future in futures:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                discard_result(future.result()[1])
+        store.close()
@@ -0,0 +1,61 @@
+"""
+Modulo per la cache in memoria dei pezzi ritagliati dei glifi.
+Tra una generazione e l'altra i pezzi di fasce e celle con gli stessi
+limiti vengono riusati: spostando un taglio si ritagliano solo le fasce
+e le celle adiacenti. Le voci meno usate di recente vengono eliminate.
+"""
+
+import threading
+from collections import OrderedDict
+
+# Numero massimo predefinito di pezzi in cache
+DEFAULT_MAX_PIECES = 5000
+
+
+class PieceCache:
+    """
+    Cache LRU di geometrie indicizzate per chiave (tuple di font, glifo, limiti...).
+    I valori sono geometrie Shapely, immutabili: possono essere condivisi.
+    Può essere usata da più thread di generazione.
+    """
+    def __init__(self, max_entries=DEFAULT_MAX_PIECES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Valore della chiave, oppure None se non è in cache"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Memorizza un valore, eliminando le voci meno usate se la cache è piena"""
+        if value is None:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Svuota la cache e azzera le statistiche"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Descrizione breve di voci, successi e mancanze"""
+        return f"{len(self._entries)} pezzi in cache, {self.hits} riusati, {self.misses} calcolati"
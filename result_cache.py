@@ -0,0 +1,155 @@
+"""
+Modulo per la cache persistente su disco dei font generati.
+Un risultato è indicizzato dagli hash dei font sorgente e da tutti i
+parametri che ne determinano l'aspetto (metodo di taglio, tagli o seme,
+caratteri...): una generazione già fatta viene restituita subito.
+"""
+
+import os
+import json
+import hashlib
+import threading
+import traceback
+
+import numpy as np
+
+from glyph_outline import GlyphOutline
+from outline_cache import OutlineCache
+
+# Cartella predefinita della cache (accanto a quella dei contorni)
+DEFAULT_RESULT_CACHE_DIR = os.path.join("cache", "results")
+
+# Da incrementare quando cambia il formato dei risultati memorizzati
+# o l'algoritmo di mixaggio (i font in cache non sarebbero più gli stessi)
+RESULT_CACHE_VERSION = 1
+
+
+def _pack_outlines(outlines):
+    """Concatena una sequenza di GlyphOutline: coordinate, offset dei contorni e dei glifi"""
+    outlines = [GlyphOutline.from_contours(o) for o in outlines]
+    glyph_offsets = np.zeros(len(outlines) + 1, dtype=np.int64)
+    glyph_offsets[1:] = np.cumsum([len(o) for o in outlines])
+    merged = GlyphOutline.concatenate(outlines)
+    return merged.coords, merged.offsets, glyph_offsets
+
+
+def _unpack_outlines(coords, offsets, glyph_offsets):
+    """Inverso di _pack_outlines: un GlyphOutline per glifo"""
+    outlines = []
+    for start, end in zip(glyph_offsets[:-1], glyph_offsets[1:]):
+        if end == start:
+            outlines.append(GlyphOutline())
+            continue
+        first, last = offsets[start], offsets[end]
+        outlines.append(GlyphOutline(coords[first:last], offsets[start:end + 1] - first))
+    return outlines
+
+
+class ResultCache:
+    """
+    Cache su disco dei font generati: byte del TTF, contorni delle lettere
+    e curve quadratiche, in un file .npz per risultato.
+    Gli hash dei font sorgente vengono calcolati con l'indice di OutlineCache,
+    quindi rileggendo un font solo quando cambiano mtime o dimensione.
+    """
+    def __init__(self, cache_dir=DEFAULT_RESULT_CACHE_DIR, outline_cache=None):
+        self.cache_dir = cache_dir
+        self.hashes = outline_cache if outline_cache is not None else OutlineCache()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, font_paths, params):
+        """
+        Chiave di un risultato.
+
+        Args:
+            font_paths: Percorsi dei font sorgente, nell'ordine del mixaggio
+            params: Dizionario (serializzabile in JSON) dei parametri di generazione
+
+        Returns:
+            Stringa esadecimale
+        """
+        hashes = [self.hashes.font_hash(path) for path in font_paths]
+        key = json.dumps([RESULT_CACHE_VERSION, hashes, params], sort_keys=True)
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key + ".npz")
+
+    def load(self, key):
+        """
+        Legge un risultato dalla cache.
+
+        Returns:
+            Tuple (byte del font, {lettera: GlyphOutline}, {lettera: curve}),
+            oppure None se la voce non esiste
+        """
+        entry_path = self._entry_path(key)
+        if not os.path.exists(entry_path):
+            self.misses += 1
+            return None
+        try:
+            with np.load(entry_path) as data:
+                font_data = data["font"].tobytes()
+                letters = [str(letter) for letter in data["letters"]]
+                outlines = _unpack_outlines(data["coords"], data["offsets"], data["letter_offsets"])
+                curve_letters = [str(letter) for letter in data["curve_letters"]]
+                curve_points = _unpack_outlines(data["curve_coords"], data["curve_offsets"], data["curve_letter_offsets"])
+                on_curve = data["curve_on"].astype(bool)
+        except Exception as e:
+            print(f"Errore nella lettura della cache dei risultati: {str(e)}")
+            self.misses += 1
+            return None
+
+        curves = {}
+        start = 0
+        for letter, points in zip(curve_letters, curve_points):
+            contours = []
+            for contour in points:
+                contours.append((contour, on_curve[start:start + len(contour)]))
+                start += len(contour)
+            curves[letter] = contours
+
+        self.hits += 1
+        return font_data, dict(zip(letters, outlines)), curves
+
+    def store(self, key, font_data, letters, curves=None):
+        """
+        Scrive un risultato nella cache.
+
+        Args:
+            key: Chiave restituita da key()
+            font_data: Byte del font TTF
+            letters: Dizionario {lettera: GlyphOutline}
+            curves: Dizionario {lettera: [(punti, on_curve)]}, opzionale
+        """
+        try:
+            curves = curves or {}
+            coords, offsets, letter_offsets = _pack_outlines(letters.values())
+            curve_coords, curve_offsets, curve_letter_offsets = _pack_outlines(
+                [[points for points, _ in contours] for contours in curves.values()]
+            )
+            curve_on = [np.asarray(on, dtype=bool) for contours in curves.values() for _, on in contours if len(on)]
+
+            os.makedirs(self.cache_dir, exist_ok=True)
+            entry_path = self._entry_path(key)
+            tmp_path = entry_path + f".{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    font=np.frombuffer(font_data, dtype=np.uint8),
+                    letters=np.array(list(letters), dtype=str),
+                    coords=coords, offsets=offsets, letter_offsets=letter_offsets,
+                    curve_letters=np.array(list(curves), dtype=str),
+                    curve_coords=curve_coords, curve_offsets=curve_offsets,
+                    curve_letter_offsets=curve_letter_offsets,
+                    curve_on=np.concatenate(curve_on) if curve_on else np.empty(0, dtype=bool),
+                )
+            os.replace(tmp_path, entry_path)
+        except Exception as e:
+            print(f"Errore nella scrittura della cache dei risultati: {str(e)}")
+            traceback.print_exc()
+
+    def stats(self):
+        """Descrizione breve di successi e mancanze"""
+        return f"{self.hits} font dalla cache, {self.misses} generati"
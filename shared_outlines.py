@@ -0,0 +1,309 @@
+"""
+Modulo per lo scambio dei contorni tra processi tramite memoria condivisa.
+I contorni vengono scritti come array piatti con offset in un blocco di
+multiprocessing.shared_memory: tra i processi viaggiano solo il nome
+del blocco, la disposizione degli array e gli indici dei glifi.
+"""
+
+import numpy as np
+from multiprocessing import shared_memory
+
+from glyph_outline import GlyphOutline
+
+# Allineamento in byte di ogni array nel blocco
+_ALIGN = 8
+
+
+class SharedArrays:
+    """
+    Più array NumPy in un unico blocco di memoria condivisa.
+    Il descrittore (handle) è una tupla piccola e serializzabile con il nome
+    del blocco e, per ogni array, chiave, dtype, forma e posizione in byte.
+    Chi possiede il blocco lo elimina alla chiusura.
+    """
+    def __init__(self, shm, layout, owner=False):
+        self.shm = shm
+        self.layout = layout
+        self.owner = owner
+        self.arrays = {
+            key: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            for key, dtype, shape, offset in layout
+        }
+        if not owner:
+            # I blocchi aperti da altri processi sono in sola lettura
+            for array in self.arrays.values():
+                array.flags.writeable = False
+
+    @classmethod
+    def create(cls, arrays):
+        """
+        Copia gli array in un nuovo blocco di memoria condivisa.
+
+        Args:
+            arrays: Dizionario {chiave: array}
+
+        Returns:
+            SharedArrays proprietario del blocco
+        """
+        arrays = {key: np.ascontiguousarray(array) for key, array in arrays.items()}
+        layout = []
+        size = 0
+        for key, array in arrays.items():
+            layout.append((key, array.dtype.str, array.shape, size))
+            size += -(-array.nbytes // _ALIGN) * _ALIGN
+        shared = cls(shared_memory.SharedMemory(create=True, size=max(size, _ALIGN)), layout, owner=True)
+        for key, array in arrays.items():
+            shared.arrays[key][...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, handle, owner=False):
+        """
+        Apre un blocco esistente dal suo descrittore.
+        Con owner=True il blocco viene eliminato alla chiusura.
+        """
+        name, layout = handle
+        return cls(shared_memory.SharedMemory(name=name), layout, owner)
+
+    @property
+    def handle(self):
+        """Descrittore serializzabile del blocco"""
+        return self.shm.name, self.layout
+
+    def __getitem__(self, key):
+        return self.arrays[key]
+
+    def __contains__(self, key):
+        return key in self.arrays
+
+    def close(self, unlink=None):
+        """
+        Chiude il blocco in questo processo; lo elimina se ne è il proprietario
+        (o se unlink è True). Gli array letti devono essere già stati copiati.
+        """
+        self.arrays = {}
+        self.shm.close()
+        if self.owner if unlink is None else unlink:
+            self.shm.unlink()
+
+
+def _offsets(lengths):
+    """Offset cumulativi (con lo zero iniziale) da una lista di lunghezze"""
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(lengths)
+    return offsets
+
+
+def _points(arrays):
+    """Concatena una lista di array di punti in un array (N, 2)"""
+    if not arrays:
+        return np.empty((0, 2), dtype=np.float64)
+    return np.concatenate([np.asarray(a, dtype=np.float64).reshape(-1, 2) for a in arrays])
+
+
+def pack_outlines(outlines, prefix=""):
+    """
+    Array piatti di una lista di GlyphOutline: tutti i punti, gli offset
+    dei contorni e, per ogni glifo, l'intervallo dei suoi contorni.
+
+    Returns:
+        Dizionario di array
+    """
+    outlines = [GlyphOutline.from_contours(o if o is not None else []) for o in outlines]
+    merged = GlyphOutline.concatenate(outlines)
+    return {
+        prefix + "coords": merged.coords,
+        prefix + "rings": merged.offsets,
+        prefix + "glyphs": _offsets([len(o) for o in outlines]),
+    }
+
+
+def unpack_outline(arrays, index, prefix="", copy=False):
+    """
+    GlyphOutline del glifo index; senza copia i punti restano nel blocco condiviso.
+    """
+    first, last = arrays[prefix + "glyphs"][index:index + 2]
+    rings = arrays[prefix + "rings"][first:last + 1]
+    coords = arrays[prefix + "coords"][rings[0]:rings[-1]]
+    return GlyphOutline(coords.copy() if copy else coords, rings - rings[0])
+
+
+def pack_segments(glyphs, prefix="segments_"):
+    """
+    Array piatti dei segmenti di Bézier di più glifi (vedi SegmentPen):
+    punti, offset dei segmenti, dei contorni e dei glifi.
+    """
+    contours = [contour for glyph in glyphs for contour in (glyph or [])]
+    segments = [segment for contour in contours for segment in contour]
+    return {
+        prefix + "points": _points(segments),
+        prefix + "segments": _offsets([len(s) for s in segments]),
+        prefix + "contours": _offsets([len(c) for c in contours]),
+        prefix + "glyphs": _offsets([len(g or []) for g in glyphs]),
+    }
+
+
+def unpack_segments(arrays, index, prefix="segments_"):
+    """Contorni del glifo index come liste di array di punti di controllo (copiati)"""
+    points = arrays[prefix + "points"]
+    segments = arrays[prefix + "segments"]
+    contours = arrays[prefix + "contours"]
+    first, last = arrays[prefix + "glyphs"][index:index + 2]
+    return [
+        [points[segments[s]:segments[s + 1]].copy() for s in range(contours[c], contours[c + 1])]
+        for c in range(first, last)
+    ]
+
+
+def pack_curves(glyphs, prefix="curves_"):
+    """
+    Array piatti dei contorni quadratici (points, on_curve) di più glifi.
+    """
+    contours = [contour for glyph in glyphs for contour in (glyph or [])]
+    return {
+        prefix + "points": _points([points for points, _ in contours]),
+        prefix + "on_curve": np.concatenate([np.asarray(on, dtype=bool) for _, on in contours]) if contours else np.empty(0, dtype=bool),
+        prefix + "contours": _offsets([len(points) for points, _ in contours]),
+        prefix + "glyphs": _offsets([len(g or []) for g in glyphs]),
+    }
+
+
+def unpack_curves(arrays, index, prefix="curves_"):
+    """Contorni quadratici del glifo index come liste (punti, on_curve)"""
+    points = arrays[prefix + "points"]
+    on_curve = arrays[prefix + "on_curve"]
+    contours = arrays[prefix + "contours"]
+    first, last = arrays[prefix + "glyphs"][index:index + 2]
+    return [
+        (
+            [tuple(pt) for pt in points[contours[c]:contours[c + 1]].tolist()],
+            on_curve[contours[c]:contours[c + 1]].tolist()
+        )
+        for c in range(first, last)
+    ]
+
+
+class SharedSourceFont:
+    """
+    Font sorgente letto dalla memoria condivisa in un processo di lavoro.
+    Ha la stessa interfaccia di SourceFont usata dall'assemblaggio.
+    """
+    def __init__(self, store, font_index, name, path, cap_height):
+        self.store = store
+        self.font_index = font_index
+        self.name = name
+        self.path = path
+        self.cap_height = cap_height
+
+    def _glyph_index(self, char):
+        return self.store.glyph_index(self.font_index, char)
+
+    def get_contours(self, char):
+        """Contorni (GlyphOutline) del carattere, oppure contorni vuoti"""
+        index = self._glyph_index(char)
+        if index is None:
+            return GlyphOutline()
+        return unpack_outline(self.store.arrays, index)
+
+    def get_segments(self, char):
+        """Segmenti di Bézier del carattere, oppure lista vuota"""
+        index = self._glyph_index(char)
+        if index is None or "segments_points" not in self.store.arrays:
+            return []
+        return unpack_segments(self.store.arrays, index)
+
+
+class SharedSourceStore:
+    """
+    Glifi di tutti i font di una sessione in un unico blocco condiviso.
+    Il glifo del carattere c del font f ha indice f * len(chars) + c.
+    Il processo principale crea il blocco con from_session, i processi
+    di lavoro lo aprono con attach e lo usano come una FontSession.
+    """
+    def __init__(self, arrays, chars, fonts):
+        self.arrays = arrays
+        self.chars = list(chars)
+        self.fonts = [SharedSourceFont(self, i, *font) for i, font in enumerate(fonts)]
+        self._char_index = {char: i for i, char in enumerate(self.chars)}
+
+    @classmethod
+    def from_session(cls, session, chars, segments=False):
+        """
+        Scrive nel blocco condiviso i contorni (e se richiesto i segmenti)
+        dei caratteri indicati per tutti i font della sessione.
+        """
+        outlines = [source.get_contours(char) for source in session for char in chars]
+        arrays = pack_outlines(outlines)
+        if segments:
+            arrays.update(pack_segments([source.get_segments(char) for source in session for char in chars]))
+        fonts = [(source.name, source.path, source.cap_height) for source in session]
+        return cls(SharedArrays.create(arrays), chars, fonts)
+
+    @classmethod
+    def attach(cls, info):
+        """Apre il blocco dal descrittore restituito da info"""
+        handle, chars, fonts = info
+        return cls(SharedArrays.attach(handle), chars, fonts)
+
+    @property
+    def info(self):
+        """Descrittore serializzabile: blocco, caratteri, nomi e metriche dei font"""
+        return self.arrays.handle, self.chars, [(f.name, f.path, f.cap_height) for f in self.fonts]
+
+    def glyph_index(self, font_index, char):
+        """Indice del glifo nel blocco, oppure None se il carattere non c'è"""
+        char_index = self._char_index.get(char)
+        if char_index is None:
+            return None
+        return font_index * len(self.chars) + char_index
+
+    def __len__(self):
+        return len(self.fonts)
+
+    def __iter__(self):
+        return iter(self.fonts)
+
+    def __getitem__(self, index):
+        return self.fonts[index]
+
+    def close(self):
+        """Chiude (e nel processo principale elimina) il blocco condiviso"""
+        self.arrays.close()
+
+
+def share_result(contours, curves):
+    """
+    Scrive il risultato di una lettera in un nuovo blocco condiviso.
+    Il blocco resta in vita finché chi lo riceve non lo legge con take_result.
+
+    Returns:
+        Descrittore del blocco
+    """
+    arrays = pack_outlines([contours])
+    if curves is not None:
+        arrays.update(pack_curves([curves]))
+    shared = SharedArrays.create(arrays)
+    handle = shared.handle
+    shared.close(unlink=False)
+    return handle
+
+
+def take_result(handle):
+    """
+    Legge (copiandolo) il risultato scritto da share_result ed elimina il blocco.
+
+    Returns:
+        Tuple (contorni, curve), curve None se non presenti
+    """
+    shared = SharedArrays.attach(handle, owner=True)
+    try:
+        contours = unpack_outline(shared.arrays, 0, copy=True)
+        curves = unpack_curves(shared.arrays, 0) if "curves_points" in shared else None
+    finally:
+        shared.close()
+    return contours, curves
+
+
+def discard_result(handle):
+    """Elimina un blocco di risultato senza leggerlo"""
+    SharedArrays.attach(handle, owner=True).close()
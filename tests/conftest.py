@@ -0,0 +1,21 @@
+"""
+Configurazione comune dei test: i moduli del progetto stanno nella radice
+del repository e i font di prova nella cartella fonts.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FONTS_DIR = os.path.join(ROOT, "fonts")
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def bundled_fonts():
+    """Percorsi dei font inclusi nel repository, in ordine alfabetico"""
+    return [
+        os.path.join(FONTS_DIR, name) for name in sorted(os.listdir(FONTS_DIR))
+        if name.lower().endswith((".ttf", ".otf"))
+    ]
@@ -0,0 +1,164 @@
+"""
+Test del ritaglio vettoriale NumPy (axis_clipper): deve dare gli stessi
+risultati del ritaglio di Shapely, confrontati per area e differenza
+simmetrica, su griglie orizzontali e a scacchiera, glifi con buchi,
+lati che toccano o coincidono con i tagli e glifi dei font inclusi.
+"""
+
+import io
+import contextlib
+
+import numpy as np
+import pytest
+import shapely
+from shapely.geometry import Point, Polygon, box
+
+from conftest import bundled_fonts
+from axis_clipper import slice_grid, clip_to_box
+from font_session import FontSession
+from geometry_utils import polygon_from_outline, normalization_transform, clip_polygon_to_box
+from glyph_outline import GlyphOutline
+from glyph_processing import mix_fonts_deterministic
+from mix_plan import MixPlan
+
+# Differenza ammessa tra i due ritagli, in proporzione all'area del riferimento
+RELATIVE_TOLERANCE = 1e-6
+
+LETTERS = "ABDGOPQRS"
+
+
+def assert_same_geometry(result, reference, label=""):
+    """Stessa area e differenza simmetrica trascurabile"""
+    result = result if result is not None else Polygon()
+    tolerance = RELATIVE_TOLERANCE * max(reference.area, 1.0)
+    assert abs(result.area - reference.area) <= tolerance, label
+    assert result.symmetric_difference(reference).area <= tolerance, label
+
+
+def numpy_clip(poly, x0, y0, x1, y1):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return polygon_from_outline(clip_to_box(GlyphOutline.from_shapely(poly), x0, y0, x1, y1))
+
+
+def grid_reference(polygons, x_edges, y_edges, assignment):
+    """Pezzo di ogni cella ritagliato da Shapely"""
+    return [
+        polygons[assignment[r][c]].intersection(box(x_edges[c], y_edges[r], x_edges[c + 1], y_edges[r + 1]))
+        for r in range(len(y_edges) - 1) for c in range(len(x_edges) - 1)
+    ]
+
+
+def check_grid(polygons, x_edges, y_edges, assignment, label=""):
+    outlines = [GlyphOutline.from_shapely(p) for p in polygons]
+    pieces = slice_grid(outlines, x_edges, y_edges, assignment)
+    for k, (piece, reference) in enumerate(zip(pieces, grid_reference(polygons, x_edges, y_edges, assignment))):
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = polygon_from_outline(piece) if len(piece) else None
+        assert_same_geometry(result, reference, f"{label} cella {k}")
+
+
+@pytest.fixture(scope="module")
+def font_glyphs():
+    """Poligoni normalizzati di alcune lettere, uno per font"""
+    glyphs = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        with FontSession(bundled_fonts()) as session:
+            for letter in LETTERS:
+                polygons = []
+                for source in session:
+                    outline = source.get_contours(letter)
+                    transform = normalization_transform(outline, source.cap_height)
+                    if transform is None:
+                        continue
+                    poly = polygon_from_outline(outline.transform(*transform))
+                    if poly is not None and not poly.is_empty:
+                        polygons.append(poly)
+                glyphs[letter] = polygons
+    return glyphs
+
+
+def random_shape(rng, snap):
+    """Unione di dischi meno altri dischi: glifi con più parti e buchi"""
+    shape = shapely.union_all([
+        Point(*rng.uniform(0, 100, 2)).buffer(rng.uniform(5, 25), quad_segs=int(rng.integers(2, 8)))
+        for _ in range(rng.integers(1, 6))
+    ])
+    holes = [Point(*rng.uniform(0, 100, 2)).buffer(rng.uniform(2, 12)) for _ in range(rng.integers(0, 5))]
+    if holes:
+        shape = shape.difference(shapely.union_all(holes))
+    if snap:
+        # Vertici sulla griglia di passo 5: lati e vertici cadono sui tagli.
+        # Il passaggio per WKB toglie la griglia dalla geometria, altrimenti
+        # anche l'intersezione di riferimento verrebbe arrotondata
+        shape = shapely.from_wkb(shapely.set_precision(shape, 5).wkb)
+    return shape
+
+
+def test_clip_to_box_random_shapes():
+    rng = np.random.default_rng(1)
+    checked = 0
+    for _ in range(600):
+        snap = rng.random() < 0.3
+        shape = random_shape(rng, snap)
+        if shape.is_empty:
+            continue
+        on_grid = rng.random() < 0.5
+        values = np.arange(0, 101, 5) if on_grid else rng.uniform(-10, 110, 20)
+        (x0, x1), (y0, y1) = np.sort(rng.choice(values, 4, replace=False).reshape(2, 2), axis=1)
+        reference = shape.intersection(box(x0, y0, x1, y1))
+        assert_same_geometry(numpy_clip(shape, x0, y0, x1, y1), reference, f"box {(x0, y0, x1, y1)}")
+        checked += 1
+    assert checked > 500
+
+
+@pytest.mark.parametrize("bounds", [
+    (0, 0, 10, 10),       # rettangolo coincidente con il quadrato
+    (5, 0, 15, 10),       # taglio lungo un lato esistente del buco
+    (10, 0, 20, 10),      # rettangolo che tocca il quadrato solo lungo un lato
+    (10, 10, 20, 20),     # rettangolo che tocca solo un vertice
+    (2, 2, 8, 8),         # rettangolo che contiene esattamente il buco
+    (-5, 4, 15, 4),       # rettangolo degenere di altezza zero
+    (3, -5, 3, 15),       # rettangolo degenere di larghezza zero
+    (-5, 5, 15, 15),      # taglio orizzontale che passa per i vertici del buco
+])
+def test_clip_to_box_touching_edges(bounds):
+    square = Polygon([(0, 0), (10, 0), (10, 10), (0, 10)], [[(2, 2), (2, 5), (5, 5), (5, 2)]])
+    reference = clip_polygon_to_box(square, *bounds, backend="shapely")
+    result = clip_polygon_to_box(square, *bounds, backend="numpy")
+    # Il ritaglio di Shapely può restituire linee o punti: conta solo l'area
+    reference = shapely.union_all([part for part in shapely.get_parts(reference) if part.area > 0])
+    assert_same_geometry(result, reference, str(bounds))
+
+
+@pytest.mark.parametrize("h_cuts,v_cuts", [
+    ([0.5], None),
+    ([0.25, 0.5, 0.75], None),
+    ([0.5], [0.5]),
+    ([0.3, 0.6], [0.25, 0.5, 0.75]),
+])
+def test_slice_grid_font_glyphs(font_glyphs, h_cuts, v_cuts):
+    for letter, polygons in font_glyphs.items():
+        plan = MixPlan(h_cuts, v_cuts)
+        bounds = shapely.union_all(polygons).bounds
+        x_edges, y_edges = plan.edges(bounds)
+        assignment = plan.layout(len(polygons)).assignment.tolist()
+        check_grid(polygons, x_edges, y_edges, assignment, f"{letter} {h_cuts} {v_cuts}")
+
+
+def test_slice_grid_cuts_on_edges():
+    # Tagli che coincidono con lati orizzontali e verticali dei glifi
+    first = Polygon([(0, 0), (100, 0), (100, 100), (0, 100)], [[(20, 20), (20, 50), (50, 50), (50, 20)]])
+    second = Polygon([(0, 0), (50, 0), (50, 50), (100, 50), (100, 100), (0, 100)])
+    x_edges = [0, 20, 50, 100]
+    y_edges = [0, 50, 100]
+    assignment = [[0, 1, 0], [1, 0, 1]]
+    check_grid([first, second], x_edges, y_edges, assignment, "lati sui tagli")
+
+
+@pytest.mark.parametrize("h_cuts,v_cuts", [([500], None), ([250, 500, 750], [300, 700])])
+def test_mix_backends_agree(font_glyphs, h_cuts, v_cuts):
+    for letter, polygons in font_glyphs.items():
+        with contextlib.redirect_stdout(io.StringIO()):
+            reference = mix_fonts_deterministic(polygons, h_cuts, v_cuts, backend="shapely")
+            result = mix_fonts_deterministic(polygons, h_cuts, v_cuts, backend="numpy")
+        assert_same_geometry(result, reference, letter)
@@ -0,0 +1,98 @@
+"""
+Test della compressione dei contorni in curve quadratiche (curve_fitting).
+I glifi dei font inclusi vengono approssimati con diversi errori massimi:
+la curva riappiattita deve restare entro l'errore dal contorno sorgente
+e ogni contorno deve conservare il proprio verso (esterni e buchi).
+"""
+
+import io
+import os
+import contextlib
+
+import numpy as np
+import pytest
+import shapely
+
+from conftest import bundled_fonts, FONTS_DIR
+from curve_fitting import fit_contours
+from font_session import FontSession
+from font_utils import flatten_quadratic_contours
+from font_mixer import mix_fonts
+
+# Errori massimi provati (unità del font)
+FIT_ERRORS = [0.5, 1.0, 4.0]
+
+# Tolleranza con cui le curve approssimate vengono riappiattite per il confronto
+CHECK_TOLERANCE = 0.05
+
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def _dedup(ring):
+    """Toglie i punti consecutivi ripetuti, che rendono indefinita la distanza densificata"""
+    ring = np.asarray(ring, dtype=np.float64)
+    keep = np.concatenate([[True], np.any(np.diff(ring, axis=0) != 0, axis=1)])
+    return ring[keep]
+
+
+def _signed_area(ring):
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+
+def _perimeter(ring):
+    return float(np.linalg.norm(np.diff(ring, axis=0), axis=1).sum())
+
+
+def _check_fit(contours, fit_error, label):
+    """Approssima i contorni e confronta ogni contorno con la sua curva"""
+    contours = [np.asarray(c, dtype=np.float64) for c in contours if len(c) >= 4]
+    fitted = fit_contours(contours, fit_error)
+    assert len(fitted) == len(contours), label
+
+    flat = flatten_quadratic_contours([p for p, _ in fitted], [on for _, on in fitted], CHECK_TOLERANCE)
+    assert len(flat) == len(contours), label
+
+    for source, curve in zip(contours, flat):
+        distance = shapely.hausdorff_distance(
+            shapely.linestrings(_dedup(source)), shapely.linestrings(_dedup(curve)), densify=0.1
+        )
+        assert np.isfinite(distance), label
+        assert distance <= fit_error + CHECK_TOLERANCE, f"{label}: distanza {distance:.2f}"
+
+        # Il verso deve restare lo stesso: un buco invertito verrebbe riempito
+        area = _signed_area(source)
+        if abs(area) > 2 * _perimeter(source) * fit_error:
+            assert np.sign(_signed_area(np.asarray(curve))) == np.sign(area), f"{label}: verso invertito"
+
+
+@pytest.fixture(scope="module")
+def source_glyphs():
+    """Contorni appiattiti delle maiuscole di tutti i font inclusi"""
+    glyphs = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        with FontSession(bundled_fonts()) as session:
+            for source in session:
+                for letter in LETTERS:
+                    outline = source.get_contours(letter)
+                    if len(outline):
+                        glyphs.append((f"{source.name} {letter}", list(outline)))
+    assert glyphs
+    return glyphs
+
+
+@pytest.mark.parametrize("fit_error", FIT_ERRORS)
+def test_fit_source_glyphs(source_glyphs, fit_error):
+    for label, contours in source_glyphs:
+        _check_fit(contours, fit_error, label)
+
+
+@pytest.mark.parametrize("fit_error", FIT_ERRORS)
+def test_fit_mixed_glyphs(fit_error):
+    # Mix con tagli verticali che produceva un punto di controllo
+    # a migliaia di unità e il buco della Q riempito
+    fonts = [os.path.join(FONTS_DIR, "DrukLCG BoldItalic.ttf"), os.path.join(FONTS_DIR, "POPFUN.otf")]
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = mix_fonts(fonts, "equidistante", use_vertical_cuts=True)
+    for letter, outline in result.letters.items():
+        _check_fit(list(outline), fit_error, f"mix {letter}")
@@ -3,10 +3,38 @@ Modulo per la visualizzazione dei glifi e dell'alfabeto.
 Contiene widget personalizzati per la visualizzazione dei contorni.
 """
 
+import numpy as np
 from PyQt5.QtWidgets import QWidget, QSizePolicy
 from PyQt5.QtGui import QPainter, QColor, QPen, QImage, QPainterPath, QTransform, QFont
 from PyQt5.QtCore import Qt, QRectF, QPointF
 
+from glyph_outline import GlyphOutline
+
+
+def _outline_path(outline, center_x, center_y, glyph_center_x, glyph_center_y, scale):
+    """
+    Crea il QPainterPath dei contorni trasformati in coordinate dello schermo.
+    La trasformazione viene applicata a tutti i punti in un'unica operazione;
+    y viene invertita perché nei font cresce verso l'alto.
+    """
+    screen = np.empty_like(outline.coords)
+    screen[:, 0] = center_x + (outline.coords[:, 0] - glyph_center_x) * scale
+    screen[:, 1] = center_y - (outline.coords[:, 1] - glyph_center_y) * scale
+    
+    # Regola nonzero dei font: i pezzi dell'anteprima dal vivo possono sovrapporsi
+    path = QPainterPath()
+    path.setFillRule(Qt.WindingFill)
+    offsets = outline.offsets
+    for i in range(len(outline)):
+        if offsets[i + 1] - offsets[i] < 3:
+            continue
+        points = screen[offsets[i]:offsets[i + 1]].tolist()
+        path.moveTo(*points[0])
+        for x, y in points[1:]:
+            path.lineTo(x, y)
+        path.closeSubpath()
+    return path
+
 
 class LetterPreviewWidget(QWidget):
     """
@@ -16,7 +44,7 @@ class LetterPreviewWidget(QWidget):
     def __init__(self, letter="A", parent=None):
         super().__init__(parent)
         self.letter = letter
-        self.contours = []
+        self.contours = GlyphOutline()
         self.h_cut_lines = []  
         self.v_cut_lines = []  
         self.setMinimumSize(120, 150)
@@ -24,7 +52,7 @@ class LetterPreviewWidget(QWidget):
         
     def setContours(self, contours):
         """Imposta i contorni da visualizzare"""
-        self.contours = contours
+        self.contours = GlyphOutline.from_contours(contours)
         self.update()
         
     def setCutLines(self, cut_points):
@@ -89,14 +117,11 @@ class LetterPreviewWidget(QWidget):
             )
             
         # Disegna il contorno della lettera
-        all_points = [pt for c in self.contours for pt in c]
-        if not all_points:
+        bounds = self.contours.bounds
+        if not bounds:
             return
             
-        min_x = min(p[0] for p in all_points)
-        max_x = max(p[0] for p in all_points)
-        min_y = min(p[1] for p in all_points)
-        max_y = max(p[1] for p in all_points)
+        min_x, min_y, max_x, max_y = bounds
         
         # Fattore di scala
         scale_x = draw_rect.width() / (max_x - min_x) if max_x > min_x else 1
@@ -115,26 +140,9 @@ class LetterPreviewWidget(QWidget):
         painter.setPen(QPen(Qt.black, 1))
         painter.setBrush(QColor(0, 0, 0, 40))
         
-        for contour in self.contours:
-            if len(contour) < 3:
-                continue
-                
-            path = QPainterPath()
-            
-            # Trasforma le coordinate
-            first_x = center_x + (contour[0][0] - glyph_center_x) * scale
-            # Invertiamo y perché nei font y cresce verso l'alto
-            first_y = center_y - (contour[0][1] - glyph_center_y) * scale
-            
-            path.moveTo(first_x, first_y)
-            
-            for x, y in contour[1:]:
-                tx = center_x + (x - glyph_center_x) * scale
-                ty = center_y - (y - glyph_center_y) * scale
-                path.lineTo(tx, ty)
-                
-            path.closeSubpath()
-            painter.drawPath(path)
+        painter.drawPath(_outline_path(
+            self.contours, center_x, center_y, glyph_center_x, glyph_center_y, scale
+        ))
 
 
 class AlphabetPreviewWidget(QWidget):
@@ -222,7 +230,7 @@ class AlphabetPreviewWidget(QWidget):
             painter.save()
             painter.setClipRect(letter_rect)
             
-            contours = self.letters_dict[letter]
+            contours = GlyphOutline.from_contours(self.letters_dict[letter])
             if not contours:
                 # Lettera vuota
                 painter.setPen(Qt.lightGray)
@@ -232,11 +240,7 @@ class AlphabetPreviewWidget(QWidget):
                 painter.restore()
                 continue
                 
-            all_points = [pt for c in contours for pt in c]
-            min_x = min(p[0] for p in all_points)
-            max_x = max(p[0] for p in all_points)
-            min_y = min(p[1] for p in all_points)
-            max_y = max(p[1] for p in all_points)
+            min_x, min_y, max_x, max_y = contours.bounds
             
             scale_x = (cell_width * 0.8) / (max_x - min_x) if max_x > min_x else 1
             scale_y = (cell_height * 0.8) / (max_y - min_y) if max_y > min_y else 1
@@ -251,24 +255,9 @@ class AlphabetPreviewWidget(QWidget):
             painter.setPen(QPen(Qt.black, 1))
             painter.setBrush(QColor(0, 0, 0, 80))
             
-            for contour in contours:
-                if len(contour) < 3:
-                    continue
-                    
-                path = QPainterPath()
-                
-                first_x = center_x + (contour[0][0] - glyph_center_x) * scale
-                first_y = center_y - (contour[0][1] - glyph_center_y) * scale
-                
-                path.moveTo(first_x, first_y)
-                
-                for x_pt, y_pt in contour[1:]:
-                    tx = center_x + (x_pt - glyph_center_x) * scale
-                    ty = center_y - (y_pt - glyph_center_y) * scale
-                    path.lineTo(tx, ty)
-                    
-                path.closeSubpath()
-                painter.drawPath(path)
+            painter.drawPath(_outline_path(
+                contours, center_x, center_y, glyph_center_x, glyph_center_y, scale
+            ))
                 
             painter.setPen(Qt.black)
             font = QFont("Arial", 8)
@@ -284,7 +273,7 @@ def glyph_to_image(contours, width=200, height=200, padding=10):
     Utile per visualizzare i glifi in anteprima.
     
     Args:
-        contours: Lista di contorni
+        contours: GlyphOutline o lista di contorni
         width: Larghezza dell'immagine
         height: Altezza dell'immagine
         padding: Padding attorno al glifo
@@ -292,6 +281,8 @@ def glyph_to_image(contours, width=200, height=200, padding=10):
     Returns:
         Oggetto QImage
     """
+    contours = GlyphOutline.from_contours(contours)
+    
     # Crea un'immagine vuota se non ci sono contorni
     if not contours:
         image = QImage(width, height, QImage.Format_ARGB32)
@@ -299,11 +290,7 @@ def glyph_to_image(contours, width=200, height=200, padding=10):
         return image
     
     # Calcola i limiti del glifo
-    all_points = [pt for c in contours for pt in c]
-    min_x = min(p[0] for p in all_points)
-    max_x = max(p[0] for p in all_points)
-    min_y = min(p[1] for p in all_points)
-    max_y = max(p[1] for p in all_points)
+    min_x, min_y, max_x, max_y = contours.bounds
     
     # Calcola dimensioni effettive
     glyph_width = max_x - min_x
@@ -345,18 +332,19 @@ def glyph_to_image(contours, width=200, height=200, padding=10):
     for contour in contours:
         if len(contour) < 2:
             continue
+        points = contour.tolist()
             
         # Inizia nuovo sottopath
-        start_point = QPointF(contour[0][0], contour[0][1])
+        start_point = QPointF(points[0][0], points[0][1])
         path.moveTo(start_point)
         
         # Aggiungi tutti i punti del contorno
-        for x, y in contour[1:]:
+        for x, y in points[1:]:
             path.lineTo(x, y)
             
         # Chiudi il contorno se necessario
-        if contour[0] != contour[-1]:
-            path.lineTo(contour[0][0], contour[0][1])
+        if points[0] != points[-1]:
+            path.lineTo(points[0][0], points[0][1])
             
         path.closeSubpath()
     